@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Export Layers.
+#
+# Copyright (C) 2013-2019 khalim19 <khalim19@gmail.com>
+#
+# Export Layers is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Export Layers is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Export Layers.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+This module provides rectangle packing for texture atlases.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+
+def pack_rectangles(sizes, max_sheet_width, max_sheet_height):
+  """
+  Pack rectangles into as few sheets of at most `max_sheet_width` x
+  `max_sheet_height` pixels as possible.
+  
+  `sizes` is a list of (width, height) tuples. Rectangles are not rotated.
+  
+  Rectangles are placed on horizontal shelves in the order of decreasing
+  height. Each rectangle is placed on the first shelf of the first sheet with
+  enough space, or on a new shelf or sheet if no such shelf exists.
+  
+  Returns:
+  
+    * list of (sheet index, x, y) tuples in the order of `sizes`,
+    
+    * list of (width, height) tuples of the sheets, cropped to the area covered
+      by the rectangles.
+  
+  Raises:
+  
+  * `ValueError` - A rectangle is larger than the maximum sheet size.
+  """
+  positions = [None] * len(sizes)
+  sheets = []
+  
+  sorted_indices = sorted(
+    range(len(sizes)), key=lambda index: (sizes[index][1], sizes[index][0]), reverse=True)
+  
+  for index in sorted_indices:
+    width, height = sizes[index]
+    
+    if width > max_sheet_width or height > max_sheet_height:
+      raise ValueError(
+        "rectangle of size {}x{} does not fit into a sheet of size {}x{}".format(
+          width, height, max_sheet_width, max_sheet_height))
+    
+    for sheet_index, sheet in enumerate(sheets):
+      position = sheet.insert(width, height)
+      if position is not None:
+        break
+    else:
+      sheet_index = len(sheets)
+      sheets.append(_Sheet(max_sheet_width, max_sheet_height))
+      position = sheets[-1].insert(width, height)
+    
+    positions[index] = (sheet_index, position[0], position[1])
+  
+  return positions, [(sheet.width, sheet.height) for sheet in sheets]
+
+
+class _Sheet(object):
+  
+  def __init__(self, max_width, max_height):
+    self._max_width = max_width
+    self._max_height = max_height
+    
+    # Each shelf is a list of [y, height, x of the free space]
+    self._shelves = []
+    self._next_shelf_y = 0
+    
+    self.width = 0
+    self.height = 0
+  
+  def insert(self, width, height):
+    for shelf in self._shelves:
+      shelf_y, shelf_height, shelf_free_x = shelf
+      if height <= shelf_height and shelf_free_x + width <= self._max_width:
+        shelf[2] += width
+        return self._place(shelf_free_x, shelf_y, width, height)
+    
+    if self._next_shelf_y + height <= self._max_height:
+      shelf_y = self._next_shelf_y
+      self._shelves.append([shelf_y, height, width])
+      self._next_shelf_y += height
+      return self._place(0, shelf_y, width, height)
+    
+    return None
+  
+  def _place(self, x, y, width, height):
+    self.width = max(self.width, x + width)
+    self.height = max(self.height, y + height)
+    return x, y
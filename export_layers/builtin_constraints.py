@@ -75,6 +75,55 @@ def is_layer_in_selected_layers(layer_elem, selected_layers):
   return layer_elem.item.ID in selected_layers
 
 
+def _is_layer_many(columns):
+  return [item_type == pg.itemtree.ITEM for item_type in columns["item_type"]]
+
+
+def _is_nonempty_group_many(columns):
+  return [item_type == pg.itemtree.NONEMPTY_GROUP for item_type in columns["item_type"]]
+
+
+def _is_empty_group_many(columns):
+  return [item_type == pg.itemtree.EMPTY_GROUP for item_type in columns["item_type"]]
+
+
+def _is_path_visible_many(columns):
+  return columns["path_visible"]
+
+
+def _is_top_level_many(columns):
+  return [depth == 0 for depth in columns["depth"]]
+
+
+def _has_matching_file_extension_many(columns, file_extension):
+  file_extension = file_extension.lower()
+  return [
+    file_extension_ == file_extension for file_extension_ in columns["file_extension"]]
+
+
+def _has_matching_default_file_extension_many(columns, layer_exporter):
+  return [
+    file_extension == layer_exporter.default_file_extension
+    for file_extension in columns["file_extension"]]
+
+
+def _is_layer_in_selected_layers_many(columns, selected_layers):
+  return [item_id in selected_layers for item_id in columns["ID"]]
+
+
+pg.objectfilter.set_vectorized_rule_func(is_layer, _is_layer_many)
+pg.objectfilter.set_vectorized_rule_func(is_nonempty_group, _is_nonempty_group_many)
+pg.objectfilter.set_vectorized_rule_func(is_empty_group, _is_empty_group_many)
+pg.objectfilter.set_vectorized_rule_func(is_path_visible, _is_path_visible_many)
+pg.objectfilter.set_vectorized_rule_func(is_top_level, _is_top_level_many)
+pg.objectfilter.set_vectorized_rule_func(
+  has_matching_file_extension, _has_matching_file_extension_many)
+pg.objectfilter.set_vectorized_rule_func(
+  has_matching_default_file_extension, _has_matching_default_file_extension_many)
+pg.objectfilter.set_vectorized_rule_func(
+  is_layer_in_selected_layers, _is_layer_in_selected_layers_many)
+
+
 _BUILTIN_CONSTRAINTS_LIST = [
   {
     "name": "include_layers",
@@ -57,17 +57,208 @@ def insert_foreground_layer(image, layer, layer_exporter, tag):
   _insert_tagged_layer(image, layer_exporter, tag, position=0)
 
 
-def copy_and_insert_layer(image, layer, parent=None, position=0):
-  layer_copy = pdb.gimp_layer_new_from_drawable(layer, image)
-  pdb.gimp_image_insert_layer(image, layer_copy, parent, position)
-  pdb.gimp_item_set_visible(layer_copy, True)
+def copy_and_insert_layer(
+      image, layer, parent=None, position=0, layer_group_composites=None):
+  """
+  Insert a copy of `layer` to `image` and make the copy visible. If `layer` is
+  a layer group, the copy is merged into a single layer.
+  
+  If `layer_group_composites` is a `LayerGroupComposites` instance, merging a
+  layer group reuses the cached composite of the group or the cached composites
+  of its child groups (computing and caching missing composites first) instead
+  of merging the entire subtree again.
+  """
+  if layer_group_composites is not None and pdb.gimp_item_is_group(layer):
+    composite = layer_group_composites.get(layer)
+    if composite is not None:
+      return _insert_layer_copy(image, composite, parent, position)
+  
+  layer_copy = _insert_layer_copy(image, layer, parent, position)
   
   if pdb.gimp_item_is_group(layer_copy):
+    if layer_group_composites is not None:
+      _replace_child_groups_with_composites(
+        image, layer, layer_copy, layer_group_composites)
+    
     layer_copy = pg.pdbutils.merge_layer_group(layer_copy)
+    
+    if layer_group_composites is not None:
+      layer_group_composites.add(layer, pdb.gimp_layer_copy(layer_copy, True))
   
   return layer_copy
 
 
+def _insert_layer_copy(image, layer, parent, position):
+  layer_copy = pdb.gimp_layer_new_from_drawable(layer, image)
+  pdb.gimp_image_insert_layer(image, layer_copy, parent, position)
+  pdb.gimp_item_set_visible(layer_copy, True)
+  
+  return layer_copy
+
+
+def _replace_child_groups_with_composites(
+      image, layer_group, layer_group_copy, layer_group_composites):
+  """
+  Replace child groups in `layer_group_copy` with copies of cached composites
+  of the corresponding child groups of `layer_group`, provided that
+  compositing the merged child group produces the same pixels as compositing
+  the child group itself.
+  """
+  child_elems = layer_group_composites.get_child_elems(layer_group)
+  if child_elems is None:
+    return
+  
+  for position, (child_elem, child_copy) in enumerate(
+        zip(child_elems, layer_group_copy.children)):
+    if not layer_group_composites.is_composite_reusable(child_elem):
+      continue
+    
+    child = child_elem.item
+    
+    if layer_group_composites.get(child) is None:
+      # Merge the child group first so that its composite is also available when
+      # the child group itself is processed.
+      pdb.gimp_image_remove_layer(
+        image, copy_and_insert_layer(image, child, None, 0, layer_group_composites))
+    
+    composite_copy = pdb.gimp_layer_new_from_drawable(
+      layer_group_composites.get(child), image)
+    pdb.gimp_image_insert_layer(image, composite_copy, layer_group_copy, position)
+    pdb.gimp_image_remove_layer(image, child_copy)
+
+
+# GIMP 2.10 introduced new layer modes, while the legacy modes are preserved.
+_NORMAL_LAYER_MODES = frozenset(
+  mode for mode in [
+    gimpenums.NORMAL_MODE, getattr(gimpenums, "LAYER_MODE_NORMAL", None)]
+  if mode is not None)
+
+_PASS_THROUGH_LAYER_MODE = getattr(gimpenums, "LAYER_MODE_PASS_THROUGH", None)
+
+
+class LayerGroupComposites(object):
+  """
+  This class is a cache of merged layer groups (composites) for a single export.
+  
+  A composite is keyed by the layer group ID and the state of its subtree - IDs,
+  visibility, opacity and mode of all items in the subtree. The state is
+  computed from the elements of `layer_tree`, which is also used to obtain
+  child items. The key of each layer group is computed only once and each item
+  attribute is read only once, so that the number of PDB calls does not depend
+  on the depth of the layer tree. Original layers are never modified during
+  export, hence the keys remain valid for the entire export.
+  
+  The cache owns the composites, which are not inserted in any image and must be
+  deleted by calling `delete()`.
+  """
+  
+  def __init__(self, layer_tree):
+    self._layer_tree = layer_tree
+    
+    self._composites = {}
+    self._keys = {}
+    self._item_states = {}
+  
+  def __len__(self):
+    return len(self._composites)
+  
+  def get(self, layer_group):
+    """
+    Return the cached composite of `layer_group` or `None` if there is no
+    composite cached.
+    """
+    key = self._get_key(layer_group)
+    return self._composites.get(key) if key is not None else None
+  
+  def add(self, layer_group, composite):
+    """
+    Cache `composite` as the merged `layer_group`. If `layer_group` is not in
+    the layer tree, `composite` is deleted instead.
+    """
+    key = self._get_key(layer_group)
+    if key is not None and key not in self._composites:
+      self._composites[key] = composite
+    else:
+      pdb.gimp_item_delete(composite)
+  
+  def delete(self):
+    """
+    Delete all cached composites.
+    """
+    for composite in self._composites.values():
+      pdb.gimp_item_delete(composite)
+    
+    self._composites.clear()
+  
+  def get_child_elems(self, layer_group):
+    """
+    Return a list of `itemtree._ItemTreeElement` instances of the children of
+    `layer_group` or `None` if `layer_group` is not in the layer tree.
+    """
+    if layer_group.ID not in self._layer_tree:
+      return None
+    
+    return list(self._layer_tree[layer_group.ID].orig_children)
+  
+  def is_composite_reusable(self, item_elem):
+    """
+    Return `True` if `item_elem` is a layer group whose composite, inserted in
+    place of the layer group, produces the same pixels as the layer group.
+    
+    This applies to visible layer groups in normal mode. Pass-through groups
+    (GIMP 2.10) qualify if they are fully opaque and all their children are in
+    normal mode, since their children are then blended with the layers below
+    the same way as the composite would be.
+    """
+    if item_elem.orig_children is None:
+      return False
+    
+    visible, opacity, mode = self._get_item_state(item_elem.item)
+    
+    if not visible:
+      return False
+    
+    if mode in _NORMAL_LAYER_MODES:
+      return True
+    
+    if _PASS_THROUGH_LAYER_MODE is not None and mode == _PASS_THROUGH_LAYER_MODE:
+      return opacity == 100.0 and all(
+        self._get_item_state(child_elem.item)[2] in _NORMAL_LAYER_MODES
+        for child_elem in item_elem.orig_children)
+    
+    return False
+  
+  def _get_key(self, layer_group):
+    if layer_group.ID not in self._keys:
+      if layer_group.ID in self._layer_tree:
+        self._keys[layer_group.ID] = (
+          layer_group.ID, self._get_subtree_state(self._layer_tree[layer_group.ID]))
+      else:
+        self._keys[layer_group.ID] = None
+    
+    return self._keys[layer_group.ID]
+  
+  def _get_subtree_state(self, item_elem):
+    subtree_state = []
+    
+    for child_elem in item_elem.orig_children:
+      if child_elem.orig_children is not None:
+        child_subtree_state = self._get_key(child_elem.item)[1]
+      else:
+        child_subtree_state = None
+      
+      subtree_state.append(
+        (child_elem.item.ID, self._get_item_state(child_elem.item), child_subtree_state))
+    
+    return tuple(subtree_state)
+  
+  def _get_item_state(self, item):
+    if item.ID not in self._item_states:
+      self._item_states[item.ID] = (item.visible, item.opacity, item.mode)
+    
+    return self._item_states[item.ID]
+
+
 def inherit_transparency_from_layer_groups(image, layer, layer_exporter):
   new_layer_opacity = layer_exporter.current_layer_elem.item.opacity / 100.0
   for parent_elem in layer_exporter.current_layer_elem.parents:
@@ -108,7 +299,11 @@ def _insert_merged_tagged_layer(image, layer_exporter, tag, position=0):
   
   for i, layer_elem in enumerate(layer_exporter.tagged_layer_elems[tag]):
     layer_copy = copy_and_insert_layer(
-      image, layer_elem.item, None, first_tagged_layer_position + i)
+      image,
+      layer_elem.item,
+      None,
+      first_tagged_layer_position + i,
+      layer_exporter.layer_group_composites)
     layer_copy.visible = True
     layer_exporter.operation_executor.execute(
       ["after_insert_layer"], [image, layer_copy, layer_exporter])
@@ -198,6 +393,16 @@ _BUILTIN_PROCEDURES_LIST = [
     "function": resize_to_layer_size,
     "display_name": _("Use layer size"),
   },
+  {
+    "name": "skip_unchanged_layers",
+    "function": None,
+    "display_name": _("Skip layers unchanged since last export"),
+  },
+  {
+    "name": "deduplicate_identical_layers",
+    "function": None,
+    "display_name": _("Link files of identical layers"),
+  },
 ]
 
 BUILTIN_PROCEDURES = collections.OrderedDict(
@@ -27,14 +27,23 @@ from future.builtins import *
 import future.utils
 
 import collections
-import inspect
+import hashlib
+import io
+import itertools
+import json
 import os
+import shutil
+import tarfile
+import tempfile
+import timeit
+import zipfile
 
 from gimp import pdb
 import gimpenums
 
 from export_layers import pygimplib as pg
 
+from . import atlas
 from . import builtin_procedures
 from . import builtin_constraints
 from . import operations
@@ -71,7 +80,9 @@ class LayerExporter(object):
     Defaults to `None` if no export has been performed yet.
   
   * `exported_layers` - List of layers that were successfully exported. Does not
-    include skipped layers (when files with the same names already exist).
+    include skipped layers (when files with the same names already exist or
+    when layers are unchanged since the last export). Includes layers whose
+    files were created as hard links to or copies of files of identical layers.
   
   * `export_context_manager` - Context manager that wraps exporting a single
     layer. This can be used to perform GUI updates before and after export.
@@ -88,6 +99,13 @@ class LayerExporter(object):
     manage operations applied on layers. This property is not `None` only during
     `export()` and can be used to modify the execution of operations while
     processing layers.
+  
+  * `operations_profile_report` (read-only) - If `profile_operations` is `True`
+    during initialization, this is a report of the execution times of operations
+    (procedures and constraints) from the last export as returned by
+    `pygimplib.operations.OperationProfiler.get_report()`. Operations added from
+    export settings are named after the operations (PDB procedure names for PDB
+    procedures). If `profile_operations` is `False`, this is `None`.
   """
   
   def __init__(
@@ -99,7 +117,8 @@ class LayerExporter(object):
         progress_updater=None,
         layer_tree=None,
         export_context_manager=None,
-        export_context_manager_args=None):
+        export_context_manager_args=None,
+        profile_operations=False):
     
     self.initial_run_mode = initial_run_mode
     self.image = image
@@ -130,6 +149,12 @@ class LayerExporter(object):
     
     self._should_stop = False
     
+    self._save_procedure_capabilities = None
+    
+    if "save_procedure_capabilities" in self.export_settings:
+      self.export_settings["save_procedure_capabilities"].connect_event(
+        "after-reset", self._on_save_procedure_capabilities_after_reset)
+    
     self._processing_groups = {
       "layer_contents": [
         self._setup, self._cleanup, self._process_layer, self._postprocess_layer],
@@ -137,7 +162,10 @@ class LayerExporter(object):
         self._preprocess_layer_name, self._preprocess_empty_group_name,
         self._process_layer_name],
       "_postprocess_layer_name": [self._postprocess_layer_name],
-      "export": [self._make_dirs, self._export]
+      "export": [
+        self._make_dirs, self._export, self._export_at_output_scales,
+        self._export_in_additional_file_extensions, self._open_export_archive,
+        self._export_atlas]
     }
     
     self._processing_groups_functions = {}
@@ -147,6 +175,14 @@ class LayerExporter(object):
     
     self._operation_executor = None
     self._initial_operation_executor = pg.operations.OperationExecutor()
+    self._compiled_layer_operations = None
+    
+    self._operation_profiler = (
+      pg.operations.OperationProfiler() if profile_operations else None)
+    
+    # Change counts of operations the current operation executor was created
+    # from. The executor is reused in subsequent exports until these change.
+    self._operation_executor_change_counts = None
   
   @property
   def layer_tree(self):
@@ -156,6 +192,13 @@ class LayerExporter(object):
   def exported_layers(self):
     return self._exported_layers
   
+  @property
+  def operations_profile_report(self):
+    if self._operation_profiler is not None:
+      return self._operation_profiler.get_report()
+    else:
+      return None
+  
   @property
   def current_layer_elem(self):
     return self._current_layer_elem
@@ -176,6 +219,10 @@ class LayerExporter(object):
   def tagged_layer_copies(self):
     return self._tagged_layer_copies
   
+  @property
+  def layer_group_composites(self):
+    return self._layer_group_composites
+  
   @property
   def operation_executor(self):
     return self._operation_executor
@@ -234,6 +281,34 @@ class LayerExporter(object):
     else:
       return None
   
+  def iter_export(self, processing_groups=None, layer_tree=None):
+    """
+    Export layers like `export()`, yielding an `ExportResult` instance as soon
+    as each item (layer or empty layer group) is processed. This allows
+    processing the results while the export is still in progress.
+    
+    `processing_groups` and `layer_tree` have the same meaning as in `export()`.
+    The image copy is always destroyed after the export.
+    
+    Closing the generator stops the export. The cleanup is performed the same
+    way as in `export()` once the generator is exhausted, closed or an
+    exception is raised.
+    """
+    self._init_attributes(processing_groups, layer_tree, False)
+    self._preprocess_layers()
+    
+    exception_occurred = False
+    
+    self._setup()
+    try:
+      for export_result in self._iter_export_layers():
+        yield export_result
+    except Exception:
+      exception_occurred = True
+      raise
+    finally:
+      self._cleanup(exception_occurred)
+  
   def has_exported_layer(self, layer):
     """
     Return `True` if the specified `gimp.Layer` was exported in the last export,
@@ -285,8 +360,10 @@ class LayerExporter(object):
     self._initial_operation_executor.reorder(*args, **kwargs)
   
   def _init_attributes(self, processing_groups, layer_tree, keep_image_copy):
-    self._operation_executor = pg.operations.OperationExecutor()
-    self._add_operations()
+    self._init_operation_executor()
+    
+    if self._operation_profiler is not None:
+      self._operation_profiler.reset()
     
     self._enable_disable_processing_groups(processing_groups)
     
@@ -304,26 +381,61 @@ class LayerExporter(object):
     self._exported_layers_ids = set()
     
     self._current_layer_elem = None
+    self._current_export_result = None
+    self._current_output_filepaths = []
+    self._current_file_size = 0
     
     self._output_directory = self.export_settings["output_directory"].value
+    self._output_file_index = pg.path.FileIndex()
+    # Directories created or verified to exist during the current export
+    self._created_dirpaths = set()
     
     self._image_copy = None
     self._tagged_layer_elems = collections.defaultdict(list)
     self._tagged_layer_copies = collections.defaultdict(pg.utils.return_none_func)
     self._inserted_tagged_layers = collections.defaultdict(pg.utils.return_none_func)
+    # Merged layer groups, reused when merging their parent groups.
+    self._layer_group_composites = builtin_procedures.LayerGroupComposites(
+      self._layer_tree)
     
     self._use_another_image_copy = False
     self._another_image_copy = None
     
+    self._can_skip_resize = self._get_resize_skipping()
+    
     self.progress_updater.reset()
     
     self._file_extension_properties = _get_prefilled_file_extension_properties()
     self._default_file_extension = (
       self.export_settings["file_extension"].value.lstrip(".").lower())
     self._current_file_extension = self._default_file_extension
+    if self._save_procedure_capabilities is None:
+      self._save_procedure_capabilities = self._load_save_procedure_capabilities()
+    self._additional_file_extensions = [
+      file_extension.lstrip(".").lower()
+      for file_extension in self.export_settings.get_value(
+        "additional_file_extensions", [])]
+    self._is_exporting_additional_file_extension = False
     self._current_layer_export_status = ExportStatuses.NOT_EXPORTED_YET
     self._current_overwrite_mode = None
     
+    self._export_archive = None
+    self._atlas = None
+    
+    # List of (scale, file name suffix, subdirectory) tuples
+    self._output_scales = _get_output_scales(
+      self.export_settings.get_value("output_scales", ()),
+      self.export_settings.get_value("output_scale_filename_suffixes", ()),
+      self.export_settings.get_value("output_scale_subdirectories", ()))
+    self._scaled_image = None
+    
+    self._export_manifest = None
+    self._procedures_fingerprint = None
+    
+    # key: (hash of layer contents, file extension)
+    # value: path to the first file exported with the layer contents
+    self._exported_filepaths_by_contents = None
+    
     if self.export_settings["layer_filename_pattern"].value:
       pattern = self.export_settings["layer_filename_pattern"].value
     else:
@@ -331,6 +443,25 @@ class LayerExporter(object):
     
     self._layer_name_renamer = renamer.LayerNameRenamer(self, pattern)
   
+  def _init_operation_executor(self):
+    if self._operation_executor_change_counts == self._get_operations_change_counts():
+      return
+    
+    self._operation_executor = pg.operations.OperationExecutor()
+    self._operation_executor.profiler = self._operation_profiler
+    self._add_operations()
+    self._compile_layer_operations()
+    
+    self._operation_executor_change_counts = self._get_operations_change_counts()
+  
+  def _get_operations_change_counts(self):
+    return (
+      operations.get_change_count(self.export_settings["procedures"]),
+      operations.get_change_count(self.export_settings["constraints"]),
+      self._initial_operation_executor.change_count,
+      self._operation_executor.change_count
+      if self._operation_executor is not None else None)
+  
   def _add_operations(self):
     self._operation_executor.add(
       builtin_procedures.set_active_layer, [operations.DEFAULT_PROCEDURES_GROUP])
@@ -344,11 +475,22 @@ class LayerExporter(object):
       self._initial_operation_executor,
       self._initial_operation_executor.list_groups(include_empty_groups=True))
     
-    for procedure in operations.walk(self.export_settings["procedures"]):
-      add_operation_from_settings(procedure, self._operation_executor)
-    
-    for constraint in operations.walk(self.export_settings["constraints"]):
-      add_operation_from_settings(constraint, self._operation_executor)
+    for operation in itertools.chain(
+          operations.walk(self.export_settings["procedures"]),
+          operations.walk(self.export_settings["constraints"])):
+      operation_id = add_operation_from_settings(operation, self._operation_executor)
+      
+      if self._operation_profiler is not None and operation_id is not None:
+        self._operation_profiler.set_operation_name(operation_id, operation.name)
+  
+  def _compile_layer_operations(self):
+    # key: operation group; value: compiled operations executed for each layer
+    self._compiled_layer_operations = {
+      group: self._operation_executor.compile([group], additional_args_position=0)
+      for group in [
+        "after_insert_layer",
+        operations.DEFAULT_PROCEDURES_GROUP,
+        "after_process_layer"]}
   
   def _enable_disable_processing_groups(self, processing_groups):
     for functions in self._processing_groups.values():
@@ -408,14 +550,30 @@ class LayerExporter(object):
       [self],
       additional_args_position=_LAYER_EXPORTER_ARG_POSITION_IN_CONSTRAINTS)
     
-    self._init_tagged_layer_elems()
+    if self._has_tag_dependent_operations():
+      self._init_tagged_layer_elems()
     
     self._operation_executor.execute(
       [operations.DEFAULT_CONSTRAINTS_GROUP],
       [self],
       additional_args_position=_LAYER_EXPORTER_ARG_POSITION_IN_CONSTRAINTS)
   
+  def _has_tag_dependent_operations(self):
+    for operation in itertools.chain(
+          operations.walk(self.export_settings["procedures"]),
+          operations.walk(self.export_settings["constraints"])):
+      if (operation["enabled"].value
+          and operation["function"].value in _TAG_DEPENDENT_FUNCTIONS):
+        return True
+    
+    return any(
+      self._initial_operation_executor.contains(function, groups="all")
+      for function in _TAG_DEPENDENT_FUNCTIONS)
+  
   def _init_tagged_layer_elems(self):
+    # This loads tags of each matching item, i.e. one parasite lookup per item.
+    # GIMP provides no call to fetch parasites of multiple items at once, hence
+    # loading tags in a separate pass beforehand would not save any PDB calls.
     with self._layer_tree.filter.add_rule_temp(builtin_constraints.has_tags):
       with self._layer_tree.filter["layer_types"].add_rule_temp(
              builtin_constraints.is_nonempty_group):
@@ -424,6 +582,10 @@ class LayerExporter(object):
             self._tagged_layer_elems[tag].append(layer_elem)
   
   def _export_layers(self):
+    for unused_ in self._iter_export_layers():
+      pass
+  
+  def _iter_export_layers(self):
     for layer_elem in self._layer_tree:
       if self._should_stop:
         raise ExportLayersCancelError("export stopped by user")
@@ -438,33 +600,78 @@ class LayerExporter(object):
         raise ValueError(
           "invalid/unsupported item type '{}' in {}".format(
             layer_elem.item_type, layer_elem))
+      
+      yield self._current_export_result
+    
+    for export_result in self._export_atlas():
+      yield export_result
   
   def _process_and_export_item(self, layer_elem):
+    self._current_layer_export_status = ExportStatuses.NOT_EXPORTED_YET
+    self._current_overwrite_mode = None
+    self._current_output_filepaths = []
+    self._current_file_size = 0
+    
     layer = layer_elem.item
+    
+    start_time = timeit.default_timer()
     layer_copy = self._process_layer(layer_elem, self._image_copy, layer)
+    processing_time = timeit.default_timer() - start_time
+    
     self._preprocess_layer_name(layer_elem)
+    
+    start_time = timeit.default_timer()
     self._export_layer(layer_elem, self._image_copy, layer_copy)
+    export_time = timeit.default_timer() - start_time
+    
     self._postprocess_layer(self._image_copy, layer_copy)
     self._postprocess_layer_name(layer_elem)
     
+    self._current_export_result = ExportResult(
+      layer_elem,
+      output_filepaths=self._current_output_filepaths,
+      file_size=self._current_file_size,
+      overwrite_mode=self._current_overwrite_mode,
+      export_status=self._current_layer_export_status,
+      processing_time=processing_time,
+      export_time=export_time,
+      operations_profile_report=self.operations_profile_report)
+    
     self.progress_updater.update_tasks()
     
-    if self._current_overwrite_mode != pg.overwrite.OverwriteModes.SKIP:
+    if (self._current_overwrite_mode != pg.overwrite.OverwriteModes.SKIP
+        and self._current_layer_export_status != ExportStatuses.SKIPPED_UNCHANGED):
       self._exported_layers.append(layer)
       self._exported_layers_ids.add(layer.ID)
-      self._file_extension_properties[self._current_file_extension].processed_count += 1
+      
+      # Files exported at multiple scales are counted during export.
+      if (self._current_layer_export_status != ExportStatuses.ADDED_TO_ATLAS
+          and not self._output_scales):
+        self._file_extension_properties[
+          self._current_file_extension].processed_count += 1
   
   def _process_empty_group(self, layer_elem):
     self._preprocess_empty_group_name(layer_elem)
     
     empty_group_dirpath = layer_elem.get_filepath(self._output_directory)
-    self._make_dirs(empty_group_dirpath, self)
+    if self._export_archive is None:
+      self._make_dirs(empty_group_dirpath, self)
+    else:
+      self._export_archive.add_dir(empty_group_dirpath)
     
     self.progress_updater.update_text(
       _('Creating empty directory "{}"').format(empty_group_dirpath))
     self.progress_updater.update_tasks()
+    
+    self._current_export_result = ExportResult(
+      layer_elem, operations_profile_report=self.operations_profile_report)
   
   def _setup(self):
+    # Opening the output archive may fail, hence it is done before pushing the
+    # GIMP context and creating image copies, which are only released in
+    # `_cleanup()`.
+    self._setup_output()
+    
     pdb.gimp_context_push()
     
     self._image_copy = pg.pdbutils.create_image_from_metadata(self.image)
@@ -479,6 +686,80 @@ class LayerExporter(object):
     
     if pg.config.DEBUG_IMAGE_PROCESSING:
       self._display_id = pdb.gimp_display_new(self._image_copy)
+    
+    if self._is_atlas_enabled():
+      self._atlas = _Atlas(
+        self._image_copy, self.export_settings["atlas_max_sheet_size"].value)
+  
+  def _setup_output(self):
+    if self.export_settings.get_value("output_archive", ""):
+      self._open_export_archive(self.export_settings["output_archive"].value)
+    
+    # Skipping unchanged layers and linking identical files rely on separate
+    # files in the output directory and are hence not applicable when exporting
+    # to an archive or an atlas.
+    if self._export_archive is None and not self._is_atlas_enabled():
+      if self._is_skip_unchanged_layers_enabled():
+        self._export_manifest = _ExportManifest(self._output_directory)
+        self._export_manifest.load()
+        self._procedures_fingerprint = self._get_procedures_fingerprint()
+      
+      if self.export_settings.get_value(
+           "procedures/added/deduplicate_identical_layers/enabled", False):
+        self._exported_filepaths_by_contents = {}
+  
+  def _is_atlas_enabled(self):
+    return self.export_settings.get_value("atlas_max_sheet_size", 0) > 0
+  
+  def _open_export_archive(self, archive_filepath):
+    self._make_dirs(os.path.dirname(os.path.abspath(archive_filepath)), self)
+    
+    export_archive = _ExportArchive(archive_filepath, self._output_directory)
+    try:
+      export_archive.open()
+    except (IOError, OSError, ValueError, tarfile.TarError) as e:
+      raise InvalidOutputDirectoryError(
+        str(e), self._current_layer_elem, self._default_file_extension)
+    
+    self._export_archive = export_archive
+  
+  def _load_save_procedure_capabilities(self):
+    if "save_procedure_capabilities" in self.export_settings:
+      self.export_settings["save_procedure_capabilities"].load()
+      data = self.export_settings["save_procedure_capabilities"].value
+    else:
+      data = None
+    
+    return pg.fileformats.SaveProcedureCapabilities(data)
+  
+  def _on_save_procedure_capabilities_after_reset(self, setting):
+    # Discard capabilities cached from the last export so that they are reloaded
+    # from the reset setting instead of being saved again.
+    self._save_procedure_capabilities = None
+  
+  def _save_save_procedure_capabilities(self):
+    if (self._save_procedure_capabilities.is_modified
+        and "save_procedure_capabilities" in self.export_settings):
+      self.export_settings["save_procedure_capabilities"].set_value(
+        self._save_procedure_capabilities.data)
+      self.export_settings["save_procedure_capabilities"].save()
+  
+  def _is_skip_unchanged_layers_enabled(self):
+    return (
+      self.export_settings.get_value("skip_unchanged_layers", False)
+      or self.export_settings.get_value(
+        "procedures/added/skip_unchanged_layers/enabled", False))
+  
+  def _get_procedures_fingerprint(self):
+    procedures_data = []
+    
+    for procedure in operations.walk(self.export_settings["procedures"]):
+      if procedure["enabled"].value:
+        procedures_data.append([
+          procedure["orig_name"].value,
+          [[setting.name, repr(setting.value)] for setting in procedure["arguments"]]])
+    
+    return json.dumps(procedures_data, sort_keys=True)
   
   def _cleanup(self, exception_occurred=False):
     self._copy_non_modifying_parasites(self._image_copy, self.image)
@@ -500,17 +781,34 @@ class LayerExporter(object):
       if tagged_layer_copy is not None:
         pdb.gimp_item_delete(tagged_layer_copy)
     
+    self._layer_group_composites.delete()
+    
+    if self._export_manifest is not None:
+      self._export_manifest.save()
+    
+    if self._export_archive is not None:
+      self._export_archive.close()
+    
+    if self._atlas is not None:
+      self._atlas.delete()
+    
+    if self._scaled_image is not None:
+      pg.pdbutils.try_delete_image(self._scaled_image)
+    
+    # Capabilities determined during a failed export may be incorrect.
+    if not exception_occurred:
+      self._save_save_procedure_capabilities()
+    
     pdb.gimp_context_pop()
   
   def _process_layer(self, layer_elem, image, layer):
-    layer_copy = builtin_procedures.copy_and_insert_layer(image, layer, None, 0)
-    self._operation_executor.execute(
-      ["after_insert_layer"], [image, layer_copy, self], additional_args_position=0)
+    layer_copy = builtin_procedures.copy_and_insert_layer(
+      image, layer, None, 0, self._layer_group_composites)
+    self._compiled_layer_operations["after_insert_layer"](
+      [image, layer_copy, self])
     
-    self._operation_executor.execute(
-      [operations.DEFAULT_PROCEDURES_GROUP],
-      [image, layer_copy, self],
-      additional_args_position=0)
+    self._compiled_layer_operations[operations.DEFAULT_PROCEDURES_GROUP](
+      [image, layer_copy, self])
     
     layer_copy = self._merge_and_resize_layer(image, layer_copy)
     
@@ -518,8 +816,8 @@ class LayerExporter(object):
     
     layer_copy.name = layer.name
     
-    self._operation_executor.execute(
-      ["after_process_layer"], [image, layer_copy, self], additional_args_position=0)
+    self._compiled_layer_operations["after_process_layer"](
+      [image, layer_copy, self])
     
     return layer_copy
   
@@ -540,10 +838,45 @@ class LayerExporter(object):
         pdb.gimp_image_remove_layer(image, layer)
   
   def _merge_and_resize_layer(self, image, layer):
+    # Merging cannot be skipped even for a single layer as it applies the layer
+    # opacity, mask and mode, which are ignored by file save procedures.
     layer = pdb.gimp_image_merge_visible_layers(image, gimpenums.EXPAND_AS_NECESSARY)
-    pdb.gimp_layer_resize_to_image_size(layer)
+    
+    if not self._can_skip_resize:
+      pdb.gimp_layer_resize_to_image_size(layer)
+    
     return layer
   
+  def _get_resize_skipping(self):
+    """
+    Determine once per export whether resizing each merged layer to the image
+    size can be skipped, based on the procedures applied rather than querying
+    each layer.
+    
+    Resizing can be skipped if no procedure may insert layers into the image
+    copy or change the layer size or offsets and if the image copy is resized
+    to the layer size. The merged layer then covers the entire image copy.
+    """
+    if any(
+         self._initial_operation_executor.list_operations(group, foreach=foreach)
+         for group in ["after_insert_layer", operations.DEFAULT_PROCEDURES_GROUP]
+         for foreach in [False, True]):
+      return False
+    
+    enabled_procedures = [
+      procedure for procedure in operations.walk(self.export_settings["procedures"])
+      if procedure["enabled"].value]
+    
+    if not all(
+         not procedure.get_value("is_pdb_procedure", False)
+         and procedure["orig_name"].value in _LAYER_PRESERVING_PROCEDURES
+         for procedure in enabled_procedures):
+      return False
+    
+    return any(
+      procedure["orig_name"].value == "use_layer_size"
+      for procedure in enabled_procedures)
+  
   def _preprocess_layer_name(self, layer_elem):
     self._layer_name_renamer.rename(layer_elem)
     self._set_file_extension(layer_elem)
@@ -565,8 +898,7 @@ class LayerExporter(object):
     if self.export_settings.get_value(
          "procedures/added/use_file_extensions_in_layer_names/enabled", False):
       orig_file_extension = layer_elem.get_file_extension_from_orig_name()
-      if (orig_file_extension
-          and self._file_extension_properties[orig_file_extension].is_valid):
+      if orig_file_extension and self._is_file_extension_valid(orig_file_extension):
         self._current_file_extension = orig_file_extension
       else:
         self._current_file_extension = self._default_file_extension
@@ -575,44 +907,433 @@ class LayerExporter(object):
     else:
       layer_elem.name += "." + self._current_file_extension
   
+  def _is_file_extension_valid(self, file_extension):
+    return (
+      self._file_extension_properties[file_extension].is_valid
+      and self._save_procedure_capabilities.is_file_extension_supported(file_extension))
+  
   def _get_uniquifier_position(self, str_):
     return len(str_) - len("." + self._current_file_extension)
   
   def _export_layer(self, layer_elem, image, layer):
     self._process_layer_name(layer_elem)
-    self._export(layer_elem, image, layer)
+    
+    file_extension = self._current_file_extension
+    self._export_at_output_scales(layer_elem, image, layer)
     
     if self._current_layer_export_status == ExportStatuses.USE_DEFAULT_FILE_EXTENSION:
       self._set_file_extension(layer_elem)
       self._process_layer_name(layer_elem)
+      self._export_at_output_scales(layer_elem, image, layer)
+      
+      # The export may have failed for reasons unrelated to the file extension
+      # (e.g. insufficient permissions), in which case the export with the
+      # default file extension would fail as well.
+      if self._current_layer_export_status == ExportStatuses.EXPORT_SUCCESSFUL:
+        self._save_procedure_capabilities.set_file_extension_unsupported(file_extension)
+    
+    self._export_in_additional_file_extensions(layer_elem, image, layer)
+  
+  def _export_in_additional_file_extensions(self, layer_elem, image, layer):
+    """
+    Export the already processed layer once per additional file extension. The
+    export status of the layer is determined by the export in the main file
+    extension.
+    """
+    if not self._additional_file_extensions or self._atlas is not None:
+      return
+    
+    orig_name = layer_elem.name
+    orig_file_extension = self._current_file_extension
+    orig_overwrite_mode = self._current_overwrite_mode
+    orig_export_status = self._current_layer_export_status
+    
+    self._is_exporting_additional_file_extension = True
+    
+    try:
+      for file_extension in self._additional_file_extensions:
+        if (file_extension == orig_file_extension
+            or not self._is_file_extension_valid(file_extension)):
+          continue
+        
+        self._current_file_extension = file_extension
+        layer_elem.set_file_extension(file_extension, keep_extra_trailing_periods=True)
+        
+        self._export_at_output_scales(layer_elem, image, layer)
+        
+        if (not self._output_scales
+            and self._current_overwrite_mode != pg.overwrite.OverwriteModes.SKIP
+            and self._current_layer_export_status == ExportStatuses.EXPORT_SUCCESSFUL):
+          self._file_extension_properties[file_extension].processed_count += 1
+    finally:
+      layer_elem.name = orig_name
+      self._is_exporting_additional_file_extension = False
+      self._current_file_extension = orig_file_extension
+      self._current_overwrite_mode = orig_overwrite_mode
+      self._current_layer_export_status = orig_export_status
+  
+  def _export_at_output_scales(self, layer_elem, image, layer):
+    if not self._output_scales:
       self._export(layer_elem, image, layer)
+      return
+    
+    last_successful_overwrite_mode_and_status = None
+    
+    for scale, filename_suffix, subdirectory in self._output_scales:
+      output_filepath = self._get_scaled_output_filepath(
+        layer_elem, filename_suffix, subdirectory)
+      
+      if scale == 1.0:
+        self._export(layer_elem, image, layer, output_filepath)
+      else:
+        scaled_image, scaled_layer = self._create_scaled_layer(layer, scale)
+        try:
+          self._export(layer_elem, scaled_image, scaled_layer, output_filepath)
+        finally:
+          pdb.gimp_image_remove_layer(scaled_image, scaled_layer)
+      
+      if (self._current_layer_export_status
+          == ExportStatuses.USE_DEFAULT_FILE_EXTENSION):
+        # All scales are exported again with the default file extension.
+        return
+      
+      if (self._current_overwrite_mode != pg.overwrite.OverwriteModes.SKIP
+          and self._current_layer_export_status in (
+            ExportStatuses.EXPORT_SUCCESSFUL, ExportStatuses.EXPORT_DEDUPLICATED,
+            ExportStatuses.ADDED_TO_ATLAS)):
+        # Count each exported file so that subsequent scales use the last values
+        # of the file export procedure.
+        if self._current_layer_export_status != ExportStatuses.ADDED_TO_ATLAS:
+          self._file_extension_properties[
+            self._current_file_extension].processed_count += 1
+        
+        last_successful_overwrite_mode_and_status = (
+          self._current_overwrite_mode, self._current_layer_export_status)
+    
+    if last_successful_overwrite_mode_and_status is not None:
+      # The layer is considered exported if exported at least at one scale.
+      self._current_overwrite_mode, self._current_layer_export_status = (
+        last_successful_overwrite_mode_and_status)
+  
+  def _get_scaled_output_filepath(self, layer_elem, filename_suffix, subdirectory):
+    if subdirectory:
+      output_dirpath = os.path.join(self._output_directory, subdirectory)
+    else:
+      output_dirpath = self._output_directory
+    
+    output_filepath = layer_elem.get_filepath(output_dirpath)
+    suffix_position = self._get_uniquifier_position(output_filepath)
+    
+    return (
+      output_filepath[:suffix_position] + filename_suffix
+      + output_filepath[suffix_position:])
   
-  def _export(self, layer_elem, image, layer):
-    output_filepath = layer_elem.get_filepath(self._output_directory)
+  def _create_scaled_layer(self, layer, scale):
+    """
+    Return a copy of the processed layer scaled by `scale`, inserted in a
+    separate image whose canvas matches the scaled layer. The layer copy must be
+    removed by the caller.
+    """
+    if self._scaled_image is None:
+      self._scaled_image = pg.pdbutils.create_image_from_metadata(self._image_copy)
+      pdb.gimp_image_undo_disable(self._scaled_image)
+    
+    scaled_width = max(int(round(layer.width * scale)), 1)
+    scaled_height = max(int(round(layer.height * scale)), 1)
+    
+    scaled_layer = pg.pdbutils.copy_and_paste_layer(layer, self._scaled_image)
+    pdb.gimp_layer_scale(scaled_layer, scaled_width, scaled_height, True)
+    pdb.gimp_layer_set_offsets(scaled_layer, 0, 0)
+    pdb.gimp_image_resize(self._scaled_image, scaled_width, scaled_height, 0, 0)
+    
+    return self._scaled_image, scaled_layer
+  
+  def _export(self, layer_elem, image, layer, output_filepath=None):
+    if output_filepath is None:
+      output_filepath = layer_elem.get_filepath(self._output_directory)
+    
+    if self._atlas is not None:
+      self.progress_updater.update_text(
+        _('Adding "{}" to atlas').format(output_filepath))
+      self._atlas.add(layer, output_filepath)
+      self._current_overwrite_mode = pg.overwrite.OverwriteModes.DO_NOTHING
+      self._current_layer_export_status = ExportStatuses.ADDED_TO_ATLAS
+      return
+    
+    if (self._export_manifest is not None
+        or self._exported_filepaths_by_contents is not None):
+      contents_hash = _get_layer_contents_hash(image, layer)
+    else:
+      contents_hash = None
+    
+    if self._export_manifest is not None:
+      fingerprint = _get_layer_fingerprint(
+        contents_hash,
+        output_filepath,
+        self._current_file_extension,
+        self._procedures_fingerprint)
+      
+      if self._export_manifest.is_up_to_date(output_filepath, fingerprint):
+        self.progress_updater.update_text(
+          _('Skipping unchanged "{}"').format(output_filepath))
+        self._current_layer_export_status = ExportStatuses.SKIPPED_UNCHANGED
+        return
     
     self.progress_updater.update_text(_('Saving "{}"').format(output_filepath))
     
-    self._current_overwrite_mode, output_filepath = pg.overwrite.handle_overwrite(
-      output_filepath, self.overwrite_chooser,
-      self._get_uniquifier_position(output_filepath))
+    if (self._export_manifest is not None
+        and self._can_replace_outdated_files()
+        and self._export_manifest.is_exported_file_unmodified(output_filepath)):
+      # The file is an outdated result of a previous export and is therefore
+      # replaced without asking the user.
+      self._current_overwrite_mode = pg.overwrite.OverwriteModes.REPLACE
+    else:
+      self._current_overwrite_mode, output_filepath = self._handle_overwrite(
+        output_filepath, self._get_uniquifier_position(output_filepath))
     
     if self._current_overwrite_mode == pg.overwrite.OverwriteModes.CANCEL:
       raise ExportLayersCancelError("cancelled")
     
-    if self._current_overwrite_mode != pg.overwrite.OverwriteModes.SKIP:
+    if self._current_overwrite_mode == pg.overwrite.OverwriteModes.SKIP:
+      return
+    
+    if self._export_archive is not None:
+      self._export_to_archive(image, layer, output_filepath)
+    else:
+      self._make_dirs(os.path.dirname(output_filepath), self)
+      
+      if self._current_overwrite_mode == pg.overwrite.OverwriteModes.REPLACE:
+        # Saving over a hard link would also modify the files linked to it.
+        _remove_file_if_hard_linked(output_filepath)
+      
+      if self._exported_filepaths_by_contents is not None:
+        identical_filepath = self._exported_filepaths_by_contents.get(
+          (contents_hash, self._current_file_extension))
+      else:
+        identical_filepath = None
+      
+      if (identical_filepath is None
+          or not self._export_identical(identical_filepath, output_filepath)):
+        self._export_file(image, layer, output_filepath)
+      
+      if self._current_layer_export_status in (
+           ExportStatuses.EXPORT_SUCCESSFUL, ExportStatuses.EXPORT_DEDUPLICATED):
+        self._output_file_index.add(output_filepath)
+        self._add_current_output_file(output_filepath, _get_file_size(output_filepath))
+        
+        if self._export_manifest is not None:
+          self._export_manifest.add(output_filepath, fingerprint)
+        
+        if self._exported_filepaths_by_contents is not None:
+          self._exported_filepaths_by_contents.setdefault(
+            (contents_hash, self._current_file_extension), output_filepath)
+  
+  def _can_replace_outdated_files(self):
+    """
+    Return `True` if files exported previously and not modified since can be
+    replaced without invoking the overwrite chooser, `False` otherwise.
+    
+    This applies if the chosen overwrite mode is "replace" or if the user would
+    be asked how to handle each existing file. A different overwrite mode
+    applied to all files is respected.
+    """
+    if (isinstance(self.overwrite_chooser, pg.overwrite.InteractiveOverwriteChooser)
+        and not self.overwrite_chooser.is_apply_to_all):
+      return True
+    
+    return self.overwrite_chooser.overwrite_mode == pg.overwrite.OverwriteModes.REPLACE
+  
+  def _handle_overwrite(self, output_filepath, uniquifier_position):
+    if self._export_archive is not None:
+      return self._export_archive.handle_overwrite(
+        output_filepath, self.overwrite_chooser, uniquifier_position)
+    else:
+      return pg.overwrite.handle_overwrite(
+        output_filepath, self.overwrite_chooser, uniquifier_position,
+        file_index=self._output_file_index)
+  
+  def _export_atlas(self):
+    """
+    Save the atlas sheets and the atlas index, yielding an `ExportResult`
+    instance for each saved sheet. Since sheets do not correspond to any item,
+    `ExportResult.layer_elem` is `None`.
+    """
+    if self._atlas is None or not self._atlas.frames:
+      return
+    
+    self._current_file_extension = self._default_file_extension
+    
+    try:
+      sheets = self._atlas.create_sheets()
+    except ValueError as e:
+      raise ExportLayersError(str(e), None, self._default_file_extension)
+    
+    atlas_index = collections.OrderedDict([
+      ("sheets", []), ("frames", collections.OrderedDict())])
+    
+    for sheet_number, (sheet_image, sheet_layer, frames) in enumerate(sheets):
+      sheet_width, sheet_height = sheet_image.width, sheet_image.height
+      
+      self._current_layer_export_status = ExportStatuses.NOT_EXPORTED_YET
+      self._current_overwrite_mode = None
+      self._current_output_filepaths = []
+      self._current_file_size = 0
+      
+      start_time = timeit.default_timer()
+      
+      try:
+        sheet_filepath = self._save_atlas_sheet(
+          sheet_image,
+          sheet_layer,
+          os.path.join(
+            self._output_directory,
+            "{}_{}.{}".format(
+              _ATLAS_FILENAME_BASE, sheet_number, self._default_file_extension)))
+      finally:
+        pg.pdbutils.try_delete_image(sheet_image)
+      
+      export_time = timeit.default_timer() - start_time
+      
+      atlas_index["sheets"].append(collections.OrderedDict([
+        ("filename", self._get_atlas_entry_name(sheet_filepath)),
+        ("width", sheet_width),
+        ("height", sheet_height)]))
+      
+      for filepath, x, y, width, height in frames:
+        atlas_index["frames"][self._get_atlas_entry_name(filepath)] = (
+          collections.OrderedDict([
+            ("sheet", sheet_number), ("x", x), ("y", y),
+            ("width", width), ("height", height)]))
+      
+      yield ExportResult(
+        None,
+        output_filepaths=self._current_output_filepaths,
+        file_size=self._current_file_size,
+        overwrite_mode=self._current_overwrite_mode,
+        export_status=self._current_layer_export_status,
+        export_time=export_time,
+        operations_profile_report=self.operations_profile_report)
+    
+    self._save_atlas_index(
+      os.path.join(self._output_directory, _ATLAS_FILENAME_BASE + ".json"),
+      json.dumps(atlas_index, indent=2).encode("utf-8"))
+  
+  def _save_atlas_sheet(self, image, layer, output_filepath):
+    self.progress_updater.update_text(_('Saving "{}"').format(output_filepath))
+    
+    overwrite_mode, output_filepath = self._handle_overwrite(
+      output_filepath, self._get_uniquifier_position(output_filepath))
+    self._current_overwrite_mode = overwrite_mode
+    
+    if overwrite_mode == pg.overwrite.OverwriteModes.CANCEL:
+      raise ExportLayersCancelError("cancelled")
+    
+    if overwrite_mode == pg.overwrite.OverwriteModes.SKIP:
+      return output_filepath
+    
+    if self._export_archive is not None:
+      self._export_to_archive(image, layer, output_filepath)
+    else:
+      self._make_dirs(os.path.dirname(output_filepath), self)
+      
+      if overwrite_mode == pg.overwrite.OverwriteModes.REPLACE:
+        _remove_file_if_hard_linked(output_filepath)
+      
+      self._export_file(image, layer, output_filepath)
+      
+      if self._current_layer_export_status == ExportStatuses.EXPORT_SUCCESSFUL:
+        self._output_file_index.add(output_filepath)
+        self._add_current_output_file(output_filepath, _get_file_size(output_filepath))
+    
+    if self._current_layer_export_status == ExportStatuses.EXPORT_SUCCESSFUL:
+      self._file_extension_properties[self._current_file_extension].processed_count += 1
+    
+    return output_filepath
+  
+  def _save_atlas_index(self, output_filepath, data):
+    overwrite_mode, output_filepath = self._handle_overwrite(
+      output_filepath, len(output_filepath) - len(".json"))
+    
+    if overwrite_mode == pg.overwrite.OverwriteModes.CANCEL:
+      raise ExportLayersCancelError("cancelled")
+    
+    if overwrite_mode == pg.overwrite.OverwriteModes.SKIP:
+      return
+    
+    if self._export_archive is not None:
+      filepath_to_write = self._export_archive.get_temp_filepath(output_filepath)
+    else:
       self._make_dirs(os.path.dirname(output_filepath), self)
+      filepath_to_write = output_filepath
+    
+    try:
+      with io.open(filepath_to_write, "wb") as file_:
+        file_.write(data)
       
+      if self._export_archive is not None:
+        self._export_archive.write(filepath_to_write, output_filepath)
+    except (IOError, OSError) as e:
+      raise ExportLayersError(str(e), None, self._default_file_extension)
+    
+    if self._export_archive is None:
+      self._output_file_index.add(output_filepath)
+  
+  def _get_atlas_entry_name(self, filepath):
+    return os.path.relpath(filepath, self._output_directory).replace(os.sep, "/")
+  
+  def _export_to_archive(self, image, layer, output_filepath):
+    temp_filepath = self._export_archive.get_temp_filepath(output_filepath)
+    
+    self._export_file(image, layer, temp_filepath)
+    
+    if self._current_layer_export_status == ExportStatuses.EXPORT_SUCCESSFUL:
+      file_size = _get_file_size(temp_filepath)
+      
+      try:
+        self._export_archive.write(temp_filepath, output_filepath)
+      except (IOError, OSError) as e:
+        raise ExportLayersError(str(e), layer, self._default_file_extension)
+      
+      self._add_current_output_file(output_filepath, file_size)
+  
+  def _add_current_output_file(self, output_filepath, file_size):
+    self._current_output_filepaths.append(output_filepath)
+    self._current_file_size += file_size
+  
+  def _export_file(self, image, layer, filepath):
+    run_mode = self._get_run_mode()
+    
+    self._export_once_wrapper(self._get_export_func(), run_mode, image, layer, filepath)
+    if self._current_layer_export_status == ExportStatuses.FORCE_INTERACTIVE:
       self._export_once_wrapper(
-        self._get_export_func(), self._get_run_mode(), image, layer, output_filepath)
-      if self._current_layer_export_status == ExportStatuses.FORCE_INTERACTIVE:
-        self._export_once_wrapper(
-          self._get_export_func(),
-          gimpenums.RUN_INTERACTIVE,
-          image,
-          layer,
-          output_filepath)
+        self._get_export_func(), gimpenums.RUN_INTERACTIVE, image, layer, filepath)
+      
+      if self._current_layer_export_status == ExportStatuses.EXPORT_SUCCESSFUL:
+        self._save_procedure_capabilities.set_run_mode_unsupported(
+          self._current_file_extension, run_mode)
+  
+  def _export_identical(self, identical_filepath, output_filepath):
+    """
+    Create `output_filepath` as a hard link to or a copy of the already exported
+    file `identical_filepath` instead of invoking the file export procedure.
+    
+    Return `True` if the file was created, `False` otherwise.
+    """
+    self.progress_updater.update_text(
+      _('Saving "{}" (identical to "{}")').format(output_filepath, identical_filepath))
+    
+    try:
+      _link_or_copy_file(identical_filepath, output_filepath)
+    except (IOError, OSError):
+      return False
+    else:
+      self._current_layer_export_status = ExportStatuses.EXPORT_DEDUPLICATED
+      return True
   
   def _make_dirs(self, dirpath, layer_exporter):
+    if dirpath in self._created_dirpaths:
+      return
+    
     try:
       pg.path.make_dirs(dirpath)
     except OSError as e:
@@ -625,6 +1346,20 @@ class LayerExporter(object):
       
       raise InvalidOutputDirectoryError(
         message, layer_exporter.current_layer_elem, layer_exporter.default_file_extension)
+    else:
+      self._output_file_index.add(dirpath)
+      self._add_created_dirpath(dirpath)
+  
+  def _add_created_dirpath(self, dirpath):
+    # Parent directories are created along with `dirpath` as well.
+    while dirpath and dirpath not in self._created_dirpaths:
+      self._created_dirpaths.add(dirpath)
+      
+      parent_dirpath = os.path.dirname(dirpath)
+      if parent_dirpath == dirpath:
+        break
+      
+      dirpath = parent_dirpath
   
   def _export_once_wrapper(self, export_func, run_mode, image, layer, output_filepath):
     with self.export_context_manager(
@@ -634,9 +1369,17 @@ class LayerExporter(object):
   def _get_run_mode(self):
     file_extension = self._file_extension_properties[self._current_file_extension]
     if file_extension.is_valid and file_extension.processed_count > 0:
-      return gimpenums.RUN_WITH_LAST_VALS
+      run_mode = gimpenums.RUN_WITH_LAST_VALS
+    else:
+      run_mode = self.initial_run_mode
+    
+    # Avoid a failed export attempt if the save procedure is known not to
+    # support the run mode.
+    if not self._save_procedure_capabilities.is_run_mode_supported(
+         self._current_file_extension, run_mode):
+      return gimpenums.RUN_INTERACTIVE
     else:
-      return self.initial_run_mode
+      return run_mode
   
   def _get_export_func(self):
     return pg.fileformats.get_save_procedure(self._current_file_extension)
@@ -661,7 +1404,7 @@ class LayerExporter(object):
       elif self._should_export_again_with_default_file_extension():
         self._prepare_export_with_default_file_extension()
       else:
-        raise ExportLayersError(str(e), layer, self._default_file_extension)
+        raise ExportLayersError(str(e), layer, self._current_file_extension)
     else:
       self._current_layer_export_status = ExportStatuses.EXPORT_SUCCESSFUL
   
@@ -680,7 +1423,11 @@ class LayerExporter(object):
     self._current_layer_export_status = ExportStatuses.FORCE_INTERACTIVE
   
   def _should_export_again_with_default_file_extension(self):
-    return self._current_file_extension != self._default_file_extension
+    # Falling back to the default file extension when exporting in an
+    # additional file extension would only export the same file again.
+    return (
+      self._current_file_extension != self._default_file_extension
+      and not self._is_exporting_additional_file_extension)
   
   def _prepare_export_with_default_file_extension(self):
     self._file_extension_properties[self._current_file_extension].is_valid = False
@@ -704,8 +1451,46 @@ class LayerExporter(object):
 
 _LAYER_EXPORTER_ARG_POSITION_IN_CONSTRAINTS = 1
 
+_ATLAS_FILENAME_BASE = "atlas"
+
+# Built-in procedures that neither insert layers into the image copy nor change
+# the layer size or offsets (except for `use_layer_size` making the layer cover
+# the entire image copy).
+_LAYER_PRESERVING_PROCEDURES = frozenset([
+  "inherit_transparency_from_layer_groups",
+  # Autocropping only affects inserted tagged layers.
+  "autocrop_background",
+  "autocrop_foreground",
+  "ignore_folder_structure",
+  "use_file_extensions_in_layer_names",
+  "use_layer_size",
+  "skip_unchanged_layers",
+  "deduplicate_identical_layers",
+])
+
+# Functions requiring tags of all layers to be loaded before export.
+_TAG_DEPENDENT_FUNCTIONS = [
+  builtin_constraints.has_tags,
+  builtin_constraints.has_no_tags,
+  builtin_procedures.insert_background_layer,
+  builtin_procedures.insert_foreground_layer,
+]
+
 
 def add_operation_from_settings(operation, executor):
+  """
+  Add the operation specified as a setting group to the `executor`
+  (`pygimplib.operations.OperationExecutor` instance) and return the ID of the
+  added operation.
+  
+  Disabled operations and operations without a function are not added, in which
+  case `None` is returned. Since arguments of the operation are processed
+  (including finding placeholders) when adding the operation, the operation
+  must be added again if its settings change.
+  """
+  if not operation["enabled"].value:
+    return None
+  
   if operation.get_value("is_pdb_procedure", False):
     try:
       function = pdb[operation["function"].value.encode(pg.GIMP_CHARACTER_ENCODING)]
@@ -725,18 +1510,17 @@ def add_operation_from_settings(operation, executor):
     if _has_run_mode_param(function):
       function_kwargs = {b"run_mode": function_args[0]}
       function_args = function_args[1:]
-    
-    function = _get_operation_func_for_pdb_procedure(function)
   
   if "constraint" not in operation.tags:
-    function = _get_operation_func_with_replaced_placeholders(function)
-  
-  if "constraint" in operation.tags:
+    function = _get_operation_func(
+      function,
+      function_args,
+      function_kwargs,
+      operation.get_value("is_pdb_procedure", False))
+  else:
     function = _get_constraint_func(function, subfilter=operation["subfilter"].value)
   
-  function = _execute_operation_only_if_enabled(function, operation["enabled"])
-  
-  executor.add(
+  return executor.add(
     function, operation["operation_groups"].value, function_args, function_kwargs)
 
 
@@ -744,35 +1528,63 @@ def _has_run_mode_param(pdb_procedure):
   return pdb_procedure.params and pdb_procedure.params[0][1] == "run-mode"
 
 
-def _get_operation_func_for_pdb_procedure(pdb_procedure):
-  def _pdb_procedure_as_operation(image, layer, layer_exporter, *args, **kwargs):
-    pdb_procedure(*args, **kwargs)
+def _get_operation_func(function, function_args, function_kwargs, is_pdb_procedure):
+  """
+  Return a function executing `function` as an operation, with placeholders
+  in `function_args` and `function_kwargs` replaced with real objects.
   
-  return _pdb_procedure_as_operation
-
-
-def _get_operation_func_with_replaced_placeholders(function):
-  def _operation(image, layer, layer_exporter, *args, **kwargs):
-    new_args, new_kwargs = placeholders.get_replaced_args_and_kwargs(
-      args, kwargs, image, layer, layer_exporter)
-    function(image, layer, layer_exporter, *new_args, **new_kwargs)
+  Positions of placeholders are determined in advance, and the returned function
+  wraps `function` in a single call. The return value of `function` is
+  discarded.
+  """
+  arg_replacement_funcs = [
+    (position, replacement_func)
+    for position, replacement_func in enumerate(
+      placeholders.get_replacement_func(arg) for arg in function_args)
+    if replacement_func is not None]
+  
+  kwarg_replacement_funcs = [
+    (name, replacement_func)
+    for name, replacement_func in (
+      (name, placeholders.get_replacement_func(value))
+      for name, value in function_kwargs.items())
+    if replacement_func is not None]
+  
+  if not arg_replacement_funcs and not kwarg_replacement_funcs:
+    if is_pdb_procedure:
+      def _pdb_procedure_as_operation(image, layer, layer_exporter, *args, **kwargs):
+        function(*args, **kwargs)
+      
+      return _pdb_procedure_as_operation
+    else:
+      def _function_as_operation(image, layer, layer_exporter, *args, **kwargs):
+        function(image, layer, layer_exporter, *args, **kwargs)
+      
+      return _function_as_operation
   
-  return _operation
-
-
-def _execute_operation_only_if_enabled(operation, setting_enabled):
-  def _execute_operation(*operation_args, **operation_kwargs):
-    if setting_enabled.value:
-      return operation(*operation_args, **operation_kwargs)
+  def _operation(image, layer, layer_exporter, *args, **kwargs):
+    args = list(args)
+    
+    for position, replacement_func in arg_replacement_funcs:
+      args[position] = replacement_func(image, layer, layer_exporter)
+    
+    for name, replacement_func in kwarg_replacement_funcs:
+      kwargs[name] = replacement_func(image, layer, layer_exporter)
+    
+    if is_pdb_procedure:
+      function(*args, **kwargs)
     else:
-      return False
+      function(image, layer, layer_exporter, *args, **kwargs)
   
-  return _execute_operation
+  return _operation
 
 
 def _get_constraint_func(rule_func, subfilter=None):
+  layer_exporter_arg_position = _get_layer_exporter_arg_position(rule_func)
+  
   def _add_rule_func(*args):
-    layer_exporter, rule_func_args = _get_args_for_constraint_func(rule_func, args)
+    layer_exporter, rule_func_args = _get_args_for_constraint_func(
+      layer_exporter_arg_position, args)
     
     if subfilter is None:
       object_filter = layer_exporter.layer_tree.filter
@@ -784,13 +1596,14 @@ def _get_constraint_func(rule_func, subfilter=None):
   return _add_rule_func
 
 
-def _get_args_for_constraint_func(rule_func, args):
+def _get_layer_exporter_arg_position(rule_func):
   try:
-    layer_exporter_arg_position = (
-      inspect.getargspec(rule_func).args.index("layer_exporter"))
+    return pg.utils.get_argspec(rule_func).args.index("layer_exporter")
   except ValueError:
-    layer_exporter_arg_position = None
-  
+    return None
+
+
+def _get_args_for_constraint_func(layer_exporter_arg_position, args):
   if layer_exporter_arg_position is not None:
     layer_exporter = args[layer_exporter_arg_position - 1]
     rule_func_args = args
@@ -809,6 +1622,13 @@ def _get_args_for_constraint_func(rule_func, args):
   return layer_exporter, rule_func_args
 
 
+def _get_file_size(filepath):
+  try:
+    return os.path.getsize(filepath)
+  except OSError:
+    return 0
+
+
 class _FileExtension(object):
   """
   This class defines additional properties for a file extension.
@@ -827,6 +1647,416 @@ class _FileExtension(object):
     self.processed_count = 0
 
 
+class _ExportManifest(object):
+  """
+  This class stores fingerprints of exported files in a file (manifest) inside
+  the output directory. The manifest allows skipping export of layers whose
+  fingerprint did not change since the last export.
+  
+  Along with the fingerprint, the size and modification time of each exported
+  file are stored to detect whether the file was modified or deleted since.
+  """
+  
+  MANIFEST_FILENAME = ".export_layers_manifest.json"
+  
+  _MANIFEST_VERSION = 1
+  
+  def __init__(self, output_dirpath):
+    self._output_dirpath = os.path.abspath(output_dirpath)
+    self._manifest_filepath = os.path.join(self._output_dirpath, self.MANIFEST_FILENAME)
+    
+    # key: file path relative to the output directory
+    # value: [fingerprint, file size, file modification time]
+    self._entries = {}
+    self._is_modified = False
+  
+  def load(self):
+    """
+    Load the manifest from the output directory. If the manifest does not exist
+    or is invalid, start with an empty manifest.
+    """
+    try:
+      with io.open(self._manifest_filepath, "rb") as manifest_file:
+        manifest_data = json.loads(manifest_file.read().decode("utf-8"))
+    except (IOError, OSError, ValueError):
+      return
+    
+    if (isinstance(manifest_data, dict)
+        and manifest_data.get("version") == self._MANIFEST_VERSION
+        and isinstance(manifest_data.get("files"), dict)):
+      self._entries = manifest_data["files"]
+  
+  def save(self):
+    """
+    Save the manifest to the output directory if any entry was added.
+    
+    Failure to save the manifest is ignored as it only results in exporting
+    all layers again the next time.
+    """
+    if not self._is_modified:
+      return
+    
+    manifest_data = {"version": self._MANIFEST_VERSION, "files": self._entries}
+    
+    try:
+      with io.open(self._manifest_filepath, "wb") as manifest_file:
+        manifest_file.write(json.dumps(manifest_data, sort_keys=True).encode("utf-8"))
+    except (IOError, OSError):
+      pass
+    else:
+      self._is_modified = False
+  
+  def add(self, filepath, fingerprint):
+    """
+    Add or update the entry for an exported file.
+    """
+    file_stat = self._get_file_stat(filepath)
+    if file_stat is None:
+      return
+    
+    self._entries[self._get_key(filepath)] = [fingerprint] + file_stat
+    self._is_modified = True
+  
+  def is_up_to_date(self, filepath, fingerprint):
+    """
+    Return `True` if the file was exported with the same fingerprint and was not
+    modified since, `False` otherwise.
+    """
+    entry = self._entries.get(self._get_key(filepath))
+    return (
+      entry is not None
+      and entry[0] == fingerprint
+      and entry[1:] == self._get_file_stat(filepath))
+  
+  def is_exported_file_unmodified(self, filepath):
+    """
+    Return `True` if the file was exported previously (regardless of the
+    fingerprint) and was not modified since, `False` otherwise.
+    """
+    entry = self._entries.get(self._get_key(filepath))
+    return entry is not None and entry[1:] == self._get_file_stat(filepath)
+  
+  def _get_key(self, filepath):
+    return os.path.relpath(os.path.abspath(filepath), self._output_dirpath)
+  
+  @staticmethod
+  def _get_file_stat(filepath):
+    try:
+      file_stat = os.stat(filepath)
+    except OSError:
+      return None
+    else:
+      return [file_stat.st_size, file_stat.st_mtime]
+
+
+class _Atlas(object):
+  """
+  This class collects processed layers and packs them into sheets of a texture
+  atlas (see `atlas.pack_rectangles()`).
+  
+  Copies of the layers are kept in a separate image until the sheets are
+  created.
+  
+  Attributes:
+  
+  * `frames` (read-only) - List of (layer copy, file path) tuples, where the file
+    path is the path the layer would be exported to as a separate file.
+  """
+  
+  def __init__(self, image, max_sheet_size):
+    self._image = image
+    self._max_sheet_size = max_sheet_size
+    
+    self._frames_image = None
+    self._frames = []
+  
+  @property
+  def frames(self):
+    return self._frames
+  
+  def add(self, layer, filepath):
+    if self._frames_image is None:
+      self._frames_image = pg.pdbutils.create_image_from_metadata(self._image)
+      pdb.gimp_image_undo_disable(self._frames_image)
+    
+    self._frames.append(
+      (pg.pdbutils.copy_and_paste_layer(layer, self._frames_image), filepath))
+  
+  def create_sheets(self):
+    """
+    Pack the layers and return an iterator of sheets as (sheet image, sheet
+    layer, frames) tuples. Frames are (file path, x, y, width, height) tuples.
+    Sheet images are created one at a time as the iterator advances. The caller
+    is responsible for deleting each sheet image.
+    
+    Raises `ValueError` if a layer is larger than the maximum sheet size.
+    """
+    positions, sheet_sizes = atlas.pack_rectangles(
+      [(layer.width, layer.height) for layer, unused_ in self._frames],
+      self._max_sheet_size,
+      self._max_sheet_size)
+    
+    return self._create_sheets(positions, sheet_sizes)
+  
+  def _create_sheets(self, positions, sheet_sizes):
+    for sheet_index, (sheet_width, sheet_height) in enumerate(sheet_sizes):
+      sheet_image = pg.pdbutils.create_image_from_metadata(self._image)
+      pdb.gimp_image_undo_disable(sheet_image)
+      pdb.gimp_image_resize(sheet_image, sheet_width, sheet_height, 0, 0)
+      
+      frames = []
+      
+      for (layer, filepath), (frame_sheet_index, x, y) in zip(self._frames, positions):
+        if frame_sheet_index != sheet_index:
+          continue
+        
+        frame_layer = pg.pdbutils.copy_and_paste_layer(layer, sheet_image)
+        pdb.gimp_layer_set_offsets(frame_layer, x, y)
+        pdb.gimp_item_set_visible(frame_layer, True)
+        
+        frames.append((filepath, x, y, layer.width, layer.height))
+      
+      sheet_layer = pdb.gimp_image_merge_visible_layers(
+        sheet_image, gimpenums.CLIP_TO_IMAGE)
+      pdb.gimp_layer_resize_to_image_size(sheet_layer)
+      
+      yield sheet_image, sheet_layer, frames
+  
+  def delete(self):
+    if self._frames_image is not None:
+      pg.pdbutils.try_delete_image(self._frames_image)
+      self._frames_image = None
+    
+    self._frames = []
+
+
+class _ExportArchive(object):
+  """
+  This class writes exported files as entries of a ZIP or TAR archive instead of
+  separate files in the output directory.
+  
+  The archive format is determined by the file extension of the archive path
+  (`.zip`, `.tar`, `.tar.gz`, `.tgz`, `.tar.bz2` or `.tbz2`). ZIP entries are
+  stored without compression as most image formats are already compressed.
+  
+  Each file is first saved to a temporary directory and registered as an entry
+  under its path relative to the output directory. Entries are written to the
+  archive when the archive is closed, since entries cannot be removed from ZIP
+  or TAR archives once written. This allows replacing an entry without leaving
+  duplicate entries in the archive. Name conflicts are resolved among the
+  entries of the archive only (see `handle_overwrite()`).
+  """
+  
+  _TAR_MODES = collections.OrderedDict([
+    (".tar.gz", "w:gz"),
+    (".tgz", "w:gz"),
+    (".tar.bz2", "w:bz2"),
+    (".tbz2", "w:bz2"),
+    (".tar", "w"),
+  ])
+  
+  def __init__(self, archive_filepath, output_dirpath):
+    self._archive_filepath = os.path.abspath(archive_filepath)
+    self._output_dirpath = os.path.abspath(output_dirpath)
+    
+    self._archive = None
+    self._temp_dirpath = None
+    self._temp_file_count = 0
+    
+    # key: entry name
+    # value: path to temporary file, or `None` if the entry is a directory
+    self._entries = collections.OrderedDict()
+  
+  @property
+  def archive_filepath(self):
+    return self._archive_filepath
+  
+  def open(self):
+    """
+    Create the archive, replacing an existing file, and the temporary directory
+    for files to be added to the archive.
+    """
+    archive_filepath_lower = self._archive_filepath.lower()
+    
+    if archive_filepath_lower.endswith(".zip"):
+      self._archive = zipfile.ZipFile(
+        self._archive_filepath, "w", zipfile.ZIP_STORED, allowZip64=True)
+    else:
+      for file_extension, mode in self._TAR_MODES.items():
+        if archive_filepath_lower.endswith(file_extension):
+          self._archive = tarfile.open(self._archive_filepath, mode)
+          break
+      else:
+        raise ValueError(
+          _('Unsupported archive format: "{}"').format(self._archive_filepath))
+    
+    self._temp_dirpath = tempfile.mkdtemp()
+  
+  def close(self):
+    """
+    Write the registered entries, finalize the archive and remove the temporary
+    directory.
+    """
+    try:
+      if self._archive is not None:
+        try:
+          for entry_name, temp_filepath in self._entries.items():
+            self._write_entry(entry_name, temp_filepath)
+        finally:
+          self._archive.close()
+          self._archive = None
+    finally:
+      if self._temp_dirpath is not None:
+        shutil.rmtree(self._temp_dirpath, ignore_errors=True)
+        self._temp_dirpath = None
+      
+      self._entries.clear()
+  
+  def exists(self, filepath):
+    """
+    Return `True` if an entry for the specified file path inside the output
+    directory was already added to the archive, `False` otherwise.
+    
+    This method allows using this class as a file index in
+    `pygimplib.path.uniquify_filepath()`.
+    """
+    return self._get_entry_name(filepath) in self._entries
+  
+  def handle_overwrite(self, filepath, overwrite_chooser, uniquifier_position=None):
+    """
+    Handle a conflict between `filepath` and an existing archive entry by
+    executing `overwrite_chooser`. Return the overwrite mode and the file path
+    to write, modified if the entry is to be renamed.
+    
+    `pygimplib.overwrite.OverwriteModes.RENAME_EXISTING` renames the new entry
+    as existing entries keep their names. With
+    `pygimplib.overwrite.OverwriteModes.REPLACE`, the file written by `write()`
+    replaces the existing entry.
+    """
+    if not self.exists(filepath):
+      return pg.overwrite.OverwriteModes.DO_NOTHING, filepath
+    
+    overwrite_chooser.choose(
+      filepath=os.path.join(self._archive_filepath, self._get_entry_name(filepath)))
+    
+    if overwrite_chooser.overwrite_mode in (
+         pg.overwrite.OverwriteModes.RENAME_NEW,
+         pg.overwrite.OverwriteModes.RENAME_EXISTING):
+      filepath = pg.path.uniquify_filepath(
+        filepath, uniquifier_position, file_index=self)
+    
+    return overwrite_chooser.overwrite_mode, filepath
+  
+  def get_temp_filepath(self, filepath):
+    """
+    Return the path of a new temporary file to save the file specified by
+    `filepath` to before adding it to the archive.
+    """
+    self._temp_file_count += 1
+    
+    return os.path.join(
+      self._temp_dirpath,
+      "{}-{}".format(self._temp_file_count, os.path.basename(filepath)))
+  
+  def write(self, temp_filepath, filepath):
+    """
+    Add the saved temporary file to the archive as an entry for `filepath`. If
+    an entry for `filepath` already exists, replace the entry, keeping its
+    position in the archive.
+    """
+    entry_name = self._get_entry_name(filepath)
+    
+    orig_temp_filepath = self._entries.get(entry_name)
+    if orig_temp_filepath is not None and orig_temp_filepath != temp_filepath:
+      os.remove(orig_temp_filepath)
+    
+    self._entries[entry_name] = temp_filepath
+  
+  def add_dir(self, dirpath):
+    """
+    Add an entry for the directory specified by `dirpath` (e.g. an empty layer
+    group) if not added already.
+    """
+    entry_name = self._get_entry_name(dirpath)
+    if entry_name not in self._entries:
+      self._entries[entry_name] = None
+  
+  def _write_entry(self, entry_name, temp_filepath):
+    if temp_filepath is not None:
+      if isinstance(self._archive, zipfile.ZipFile):
+        self._archive.write(temp_filepath, entry_name)
+      else:
+        self._archive.add(temp_filepath, entry_name, recursive=False)
+    else:
+      if isinstance(self._archive, zipfile.ZipFile):
+        zip_info = zipfile.ZipInfo(entry_name + "/")
+        # Unix directory permissions and the MS-DOS directory flag
+        zip_info.external_attr = (0o40755 << 16) | 0x10
+        self._archive.writestr(zip_info, b"")
+      else:
+        tar_info = tarfile.TarInfo(entry_name)
+        tar_info.type = tarfile.DIRTYPE
+        tar_info.mode = 0o755
+        self._archive.addfile(tar_info)
+  
+  def _get_entry_name(self, filepath):
+    return os.path.relpath(os.path.abspath(filepath), self._output_dirpath).replace(
+      os.sep, "/")
+
+
+def _get_layer_contents_hash(image, layer):
+  """
+  Return a hash of the pixel data and attributes of the processed layer.
+  """
+  contents_hash = hashlib.sha1()
+  
+  attributes = [
+    [image.width, image.height, list(pdb.gimp_image_get_resolution(image))],
+    [layer.width, layer.height, list(layer.offsets), layer.type, layer.bpp],
+  ]
+  contents_hash.update(json.dumps(attributes).encode("utf-8"))
+  
+  pixel_region = layer.get_pixel_rgn(0, 0, layer.width, layer.height, False, False)
+  contents_hash.update(pixel_region[0:layer.width, 0:layer.height])
+  
+  return contents_hash.hexdigest()
+
+
+def _get_layer_fingerprint(
+      contents_hash, output_filepath, file_extension, procedures_fingerprint):
+  """
+  Return a fingerprint of the processed layer (given by `contents_hash`) along
+  with the parameters affecting the exported file.
+  """
+  fingerprint_data = [
+    contents_hash, output_filepath, file_extension, procedures_fingerprint]
+  
+  return hashlib.sha1(json.dumps(fingerprint_data).encode("utf-8")).hexdigest()
+
+
+def _link_or_copy_file(src_filepath, dest_filepath):
+  if os.path.abspath(src_filepath) == os.path.abspath(dest_filepath):
+    return
+  
+  if os.path.lexists(dest_filepath):
+    os.remove(dest_filepath)
+  
+  try:
+    os.link(src_filepath, dest_filepath)
+  except (AttributeError, OSError):
+    # `os.link` is not available on Windows in Python 2. Hard links are also
+    # not supported by some file systems and across file systems.
+    shutil.copyfile(src_filepath, dest_filepath)
+
+
+def _remove_file_if_hard_linked(filepath):
+  try:
+    if os.stat(filepath).st_nlink > 1:
+      os.remove(filepath)
+  except OSError:
+    pass
+
+
 def _get_prefilled_file_extension_properties():
   file_extension_properties = collections.defaultdict(_FileExtension)
   
@@ -841,6 +2071,19 @@ def _get_prefilled_file_extension_properties():
   return file_extension_properties
 
 
+def _get_output_scales(scales, filename_suffixes, subdirectories):
+  """
+  Return a list of (scale, file name suffix, subdirectory) tuples. File name
+  suffixes and subdirectories are matched to scales by their index. Missing
+  file name suffixes and subdirectories are empty strings.
+  """
+  return [
+    (scale,
+     filename_suffixes[index] if index < len(filename_suffixes) else "",
+     subdirectories[index] if index < len(subdirectories) else "")
+    for index, scale in enumerate(scales)]
+
+
 @future.utils.python_2_unicode_compatible
 class ExportLayersError(Exception):
   
@@ -881,5 +2124,58 @@ class InvalidPdbProcedureError(ExportLayersError):
 
 class ExportStatuses(object):
   EXPORT_STATUSES = (
-    NOT_EXPORTED_YET, EXPORT_SUCCESSFUL, FORCE_INTERACTIVE, USE_DEFAULT_FILE_EXTENSION
-  ) = (0, 1, 2, 3)
+    NOT_EXPORTED_YET, EXPORT_SUCCESSFUL, FORCE_INTERACTIVE, USE_DEFAULT_FILE_EXTENSION,
+    SKIPPED_UNCHANGED, EXPORT_DEDUPLICATED, ADDED_TO_ATLAS
+  ) = (0, 1, 2, 3, 4, 5, 6)
+
+
+class ExportResult(object):
+  """
+  This class describes the outcome of exporting a single item (layer or empty
+  layer group) or an atlas sheet, as yielded by `LayerExporter.iter_export()`.
+  
+  Attributes:
+  
+  * `layer_elem` - `itemtree._ItemTreeElement` instance that was processed, or
+    `None` for atlas sheets.
+  
+  * `output_filepaths` - List of file paths the item was saved to. When
+    exporting to an archive, these are paths of the files as if they were
+    exported to the output directory. The list is empty for empty layer groups,
+    skipped layers and layers added to an atlas.
+  
+  * `file_size` - Total size of the files in `output_filepaths` in bytes.
+  
+  * `overwrite_mode` - Overwrite mode (one of the
+    `pygimplib.overwrite.OverwriteModes`) determined for the last file the item
+    was to be saved to, or `None` if the item was not to be saved.
+  
+  * `export_status` - Export status of the item, one of the `ExportStatuses`.
+  
+  * `processing_time` - Time in seconds spent processing the item contents.
+  
+  * `export_time` - Time in seconds spent saving the item to files.
+  
+  * `operations_profile_report` - If profiling operations is enabled, this is
+    the report of `LayerExporter.operations_profile_report` covering the export
+    up to and including this item, otherwise `None`.
+  """
+  
+  def __init__(
+        self,
+        layer_elem,
+        output_filepaths=None,
+        file_size=0,
+        overwrite_mode=None,
+        export_status=ExportStatuses.NOT_EXPORTED_YET,
+        processing_time=0.0,
+        export_time=0.0,
+        operations_profile_report=None):
+    self.layer_elem = layer_elem
+    self.output_filepaths = output_filepaths if output_filepaths is not None else []
+    self.file_size = file_size
+    self.overwrite_mode = overwrite_mode
+    self.export_status = export_status
+    self.processing_time = processing_time
+    self.export_time = export_time
+    self.operations_profile_report = operations_profile_report
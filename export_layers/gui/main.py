@@ -490,11 +490,15 @@ class ExportLayersDialog(object):
       _("Edit Constraint"),
       allow_custom_operations=False)
     
+    self._vbox_output_settings = gtk.VBox(homogeneous=False)
+    self._vbox_output_settings.set_spacing(self._DIALOG_VBOX_SPACING)
+    
     self._hbox_operations = gtk.HBox(homogeneous=True)
     self._hbox_operations.set_spacing(self._MORE_SETTINGS_HORIZONTAL_SPACING)
     self._hbox_operations.set_border_width(self._MORE_SETTINGS_BORDER_WIDTH)
     self._hbox_operations.pack_start(self._box_procedures, expand=True, fill=True)
     self._hbox_operations.pack_start(self._box_constraints, expand=True, fill=True)
+    self._hbox_operations.pack_start(self._vbox_output_settings, expand=True, fill=True)
     
     self._vbox_chooser_and_settings = gtk.VBox()
     self._vbox_chooser_and_settings.set_spacing(self._DIALOG_VBOX_SPACING)
@@ -658,6 +662,23 @@ class ExportLayersDialog(object):
       "gui_session/current_directory": [
         pg.setting.SettingGuiTypes.folder_chooser, self._folder_chooser],
     })
+    
+    for setting_name in [
+          "main/additional_file_extensions",
+          "main/output_scales",
+          "main/output_scale_filename_suffixes",
+          "main/output_scale_subdirectories"]:
+      self._add_output_setting_gui(self._settings[setting_name])
+  
+  def _add_output_setting_gui(self, setting):
+    label = gtk.Label()
+    label.set_markup(
+      "<b>{}:</b>".format(gobject.markup_escape_text(setting.display_name)))
+    label.set_alignment(0.0, 0.5)
+    label.set_tooltip_text(setting.description)
+    
+    self._vbox_output_settings.pack_start(label, expand=False, fill=False)
+    self._vbox_output_settings.pack_start(setting.gui.element, expand=True, fill=True)
   
   def _init_gui_previews(self):
     self._name_preview = preview_name_.ExportNamePreview(
@@ -116,8 +116,17 @@ class ExportImagePreview(preview_base_.ExportPreview):
     self._resize_image_operation_id = None
     self._scale_layer_operation_id = None
     
+    # ID of the layer being exported for the preview, `None` outside the export
+    self._previewed_layer_id = None
+    
     self.set_scaling()
     
+    # The constraint is added only once and takes effect only when exporting the
+    # preview. Adding and removing the constraint for each preview would force
+    # the layer exporter to rebuild its operations.
+    self._layer_exporter.add_procedure(
+      self._add_only_previewed_layer_constraint, [operations.DEFAULT_CONSTRAINTS_GROUP])
+    
     self._init_gui()
     
     self._preview_alpha_check_color_first, self._preview_alpha_check_color_second = (
@@ -210,7 +219,7 @@ class ExportImagePreview(preview_base_.ExportPreview):
     
     if should_update:
       layer_elem = self._layer_exporter.layer_tree[layer_id]
-      if self._layer_exporter.layer_tree.filter.is_match(layer_elem):
+      if self._layer_exporter.layer_tree.is_match(layer_elem):
         self.layer_elem = layer_elem
         self._set_layer_name_label(self.layer_elem.name)
   
@@ -358,10 +367,7 @@ class ExportImagePreview(preview_base_.ExportPreview):
     layer_tree = self._layer_exporter.layer_tree
     layer_tree_filter = layer_tree.filter if layer_tree is not None else None
     
-    only_selected_layer_constraint_id = self._layer_exporter.add_constraint(
-      builtin_constraints.is_layer_in_selected_layers,
-      groups=[operations.DEFAULT_CONSTRAINTS_GROUP],
-      args=[[self.layer_elem.item.ID]])
+    self._previewed_layer_id = self.layer_elem.item.ID
     
     try:
       image_preview = self._layer_exporter.export(
@@ -372,15 +378,19 @@ class ExportImagePreview(preview_base_.ExportPreview):
       display_image_preview_failure_message(
         details=traceback.format_exc(), parent=pg.gui.get_toplevel_window(self))
       image_preview = None
-    
-    self._layer_exporter.remove_operation(
-      only_selected_layer_constraint_id, [operations.DEFAULT_CONSTRAINTS_GROUP])
+    finally:
+      self._previewed_layer_id = None
     
     if layer_tree_filter is not None:
       self._layer_exporter.layer_tree.filter = layer_tree_filter
     
     return image_preview
   
+  def _add_only_previewed_layer_constraint(self, layer_exporter):
+    if self._previewed_layer_id is not None:
+      layer_exporter.layer_tree.filter.add_rule(
+        builtin_constraints.is_layer_in_selected_layers, [self._previewed_layer_id])
+  
   def _resize_image_for_layer_exporter(self, image, *args, **kwargs):
     pdb.gimp_image_resize(
       image,
@@ -70,11 +70,16 @@ These events include:
 
 * `"after-clear-operations"` - invoked when calling `clear()` after clearing
   operations.
+
+Modifications of operations (adding, removing, reordering or changing values of
+operations) are counted and can be obtained via `get_change_count()`.
 """
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 from future.builtins import *
 
+import weakref
+
 import gimpenums
 
 from export_layers import pygimplib as pg
@@ -243,6 +248,8 @@ def _create_operations_from_added_data(operations):
     operation = _create_operation_by_type(**dict(operation_dict))
     operations["added"].add([operation])
     
+    _track_changes_in_operation(operations, operation)
+    
     operations.invoke_event("after-add-operation", operation, operation_dict)
 
 
@@ -474,6 +481,8 @@ def add(operations, operation_dict_or_function):
   operations["added"].add([operation])
   operations["_added_data"].value.append(operation_dict)
   
+  _track_changes_in_operation(operations, operation)
+  
   operations.invoke_event("after-add-operation", operation, orig_operation_dict)
   
   return operation
@@ -624,6 +633,8 @@ def reorder(operations, operation_name, new_position):
   
   operations["_added_data"].value.insert(new_position, operation_dict)
   
+  _increment_change_count(operations)
+  
   operations.invoke_event(
     "after-reorder-operation", operation, current_position, new_position)
 
@@ -648,6 +659,8 @@ def remove(operations, operation_name):
   operations["added"].remove([operation_name])
   del operations["_added_data"].value[operation_index]
   
+  _increment_change_count(operations)
+  
   operations.invoke_event("after-remove-operation", operation_name)
 
 
@@ -673,6 +686,42 @@ def _clear(operations):
   operations["added"].remove([operation.name for operation in walk(operations)])
   operations["_added_data"].reset()
   operations["_added_data_values"].reset()
+  
+  _increment_change_count(operations)
+
+
+def get_change_count(operations):
+  """
+  Return the number of modifications made to `operations` - adding, removing
+  or reordering operations or modifying values of settings in operations.
+  
+  This can be used to determine whether objects created from `operations`
+  (such as `pygimplib.operations.OperationExecutor` instances) are still
+  up to date.
+  """
+  return _change_counts.get(operations, 0)
+
+
+def _track_changes_in_operation(operations, operation):
+  _increment_change_count(operations)
+  
+  for setting in operation.walk():
+    for event_type in _CHANGE_EVENT_TYPES:
+      # Events of array settings pass additional arguments (e.g. indexes).
+      setting.connect_event(
+        event_type, lambda setting, *args: _increment_change_count(operations))
+
+
+def _increment_change_count(operations):
+  _change_counts[operations] = _change_counts.get(operations, 0) + 1
+
+
+# key: setting group containing operations
+# value: number of modifications made to the operations
+_change_counts = weakref.WeakKeyDictionary()
+
+_CHANGE_EVENT_TYPES = [
+  "value-changed", "after-add-element", "after-delete-element", "after-reorder-element"]
 
 
 def walk(operations, operation_type=None, setting_name=None):
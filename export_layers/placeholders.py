@@ -83,6 +83,21 @@ def get_replaced_arg(arg, image, layer, layer_exporter):
     return arg
 
 
+def get_replacement_func(arg):
+  """
+  If `arg` is a placeholder object, return a function returning a real object
+  replacing the placeholder. Otherwise, return `None`.
+  
+  The returned function accepts the same arguments as `get_replaced_arg()`
+  except `arg`. This allows finding placeholders among arguments only once if
+  the arguments are replaced repeatedly.
+  """
+  if arg in _PLACEHOLDERS.keys():
+    return _PLACEHOLDERS[arg].replace_args
+  else:
+    return None
+
+
 def get_replaced_args_and_kwargs(func_args, func_kwargs, image, layer, layer_exporter):
   """
   Return arguments and keyword arguments for a function whose placeholder
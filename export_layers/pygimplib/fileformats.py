@@ -47,31 +47,203 @@ def get_save_procedure(file_extension):
   return the default save procedure (as returned by
   `get_default_save_procedure()`).
   """
-  if file_extension in file_formats_dict:
-    file_format = file_formats_dict[file_extension]
-    if file_format.save_procedure_func and file_format.is_installed():
-      return file_format.save_procedure_func
+  return registry.get_save_procedure(file_extension)
+
+
+def get_save_procedure_key(file_extension):
+  """
+  Return a string identifying the file save procedure used for the given file
+  extension.
   
-  return get_default_save_procedure()
+  For installed third-party file formats, the key is the name of the save
+  procedure. Otherwise, `pdb.gimp_file_save()` is used, which determines the
+  actual save procedure from the file extension, hence the key contains the
+  file extension (the first file extension of the file format if the format is
+  known).
+  """
+  file_format = registry.get_file_format(file_extension)
+  
+  if file_format is not None:
+    if file_format.is_third_party() and file_format.is_installed():
+      return file_format.save_procedure_name
+    else:
+      return "gimp-file-save:" + file_format.file_extensions[0]
+  else:
+    return "gimp-file-save:" + file_extension
 
 
 def _save_image_default(run_mode, image, layer, filepath, raw_filepath):
   pdb.gimp_file_save(image, layer, filepath, raw_filepath, run_mode=run_mode)
 
 
+class SaveProcedureCapabilities(object):
+  """
+  This class records capabilities of file save procedures that can only be
+  determined by attempting to save a file - whether a file extension is
+  recognized by GIMP and which run modes a save procedure does not support.
+  
+  Capabilities are stored in `data`, a dictionary suitable for persistent
+  storage, keyed by the GIMP version and then by the save procedure (as returned
+  by `get_save_procedure_key()`). Capabilities recorded for other GIMP versions
+  are discarded.
+  
+  Attributes:
+  
+  * `data` - Dictionary of recorded capabilities.
+  
+  * `is_modified` (read-only) - `True` if a capability was recorded since the
+    instantiation, `False` otherwise.
+  """
+  
+  def __init__(self, data=None):
+    self._gimp_version = ".".join(str(number) for number in gimp.version)
+    
+    if data is not None and self._gimp_version in data:
+      self.data = {self._gimp_version: data[self._gimp_version]}
+    else:
+      self.data = {self._gimp_version: {}}
+    
+    self._is_modified = False
+    self._save_procedure_keys = {}
+  
+  @property
+  def is_modified(self):
+    return self._is_modified
+  
+  def is_file_extension_supported(self, file_extension):
+    return not self._get_capabilities(file_extension).get("unsupported", False)
+  
+  def set_file_extension_unsupported(self, file_extension):
+    capabilities = self._get_capabilities(file_extension, create=True)
+    if not capabilities.get("unsupported", False):
+      capabilities["unsupported"] = True
+      self._is_modified = True
+  
+  def is_run_mode_supported(self, file_extension, run_mode):
+    return run_mode not in self._get_capabilities(file_extension).get(
+      "unsupported_run_modes", [])
+  
+  def set_run_mode_unsupported(self, file_extension, run_mode):
+    capabilities = self._get_capabilities(file_extension, create=True)
+    unsupported_run_modes = capabilities.setdefault("unsupported_run_modes", [])
+    if run_mode not in unsupported_run_modes:
+      unsupported_run_modes.append(run_mode)
+      self._is_modified = True
+  
+  def _get_capabilities(self, file_extension, create=False):
+    if file_extension not in self._save_procedure_keys:
+      self._save_procedure_keys[file_extension] = get_save_procedure_key(file_extension)
+    
+    save_procedure_key = self._save_procedure_keys[file_extension]
+    capabilities_for_version = self.data[self._gimp_version]
+    
+    if create:
+      return capabilities_for_version.setdefault(save_procedure_key, {})
+    else:
+      return capabilities_for_version.get(save_procedure_key, {})
+
+
 def _create_file_formats(file_formats_params):
   return [_FileFormat(**params) for params in file_formats_params]
 
 
-def _create_file_formats_dict(file_formats):
-  file_formats_dict = {}
+class _FileFormatRegistry(object):
+  """
+  This class provides lookup of file formats and their save procedures by file
+  extension.
+  
+  The lookup tables are built on first access, after which each lookup takes
+  constant time:
+  * file formats are checked against the running GIMP version only once,
+  * installed save procedures of third-party file formats are determined by a
+    single PDB query,
+  * file extensions containing periods (e.g. "xcf.gz") are indexed by their
+    last component so that a filename does not have to be scanned period by
+    period.
+  """
+  
+  def __init__(self, file_formats):
+    self._file_formats = file_formats
+    
+    self._file_formats_dict = None
+    self._file_extensions_with_periods = None
+    self._installed_save_procedure_names = None
+    self._save_procedures = {}
+  
+  @property
+  def file_formats_dict(self):
+    """
+    Dictionary of `(file extension, file format)` pairs for file formats
+    supported by the running GIMP version.
+    """
+    if self._file_formats_dict is None:
+      self._init_file_formats_dict()
+    
+    return self._file_formats_dict
   
-  for file_format in file_formats:
-    for file_extension in file_format.file_extensions:
-      if file_extension not in file_formats_dict and file_format.version_check_func():
-        file_formats_dict[file_extension] = file_format
+  def get_file_format(self, file_extension):
+    """
+    Return the file format matching the given file extension, or `None` if there
+    is no such file format.
+    """
+    return self.file_formats_dict.get(file_extension)
   
-  return file_formats_dict
+  def get_file_extensions_with_periods(self, last_component):
+    """
+    Return a list of file extensions containing periods and ending with the
+    specified component (e.g. "gz" for "xcf.gz"). The list is sorted from the
+    longest to the shortest file extension.
+    """
+    if self._file_extensions_with_periods is None:
+      self._init_file_formats_dict()
+    
+    return self._file_extensions_with_periods.get(last_component, [])
+  
+  def is_save_procedure_installed(self, save_procedure_name):
+    if self._installed_save_procedure_names is None:
+      self._init_installed_save_procedure_names()
+    
+    return save_procedure_name in self._installed_save_procedure_names
+  
+  def get_save_procedure(self, file_extension):
+    if file_extension not in self._save_procedures:
+      file_format = self.get_file_format(file_extension)
+      if (file_format is not None
+          and file_format.save_procedure_func and file_format.is_installed()):
+        self._save_procedures[file_extension] = file_format.save_procedure_func
+      else:
+        self._save_procedures[file_extension] = get_default_save_procedure()
+    
+    return self._save_procedures[file_extension]
+  
+  def _init_file_formats_dict(self):
+    self._file_formats_dict = {}
+    self._file_extensions_with_periods = {}
+    
+    for file_format in self._file_formats:
+      if not file_format.version_check_func():
+        continue
+      
+      for file_extension in file_format.file_extensions:
+        if file_extension not in self._file_formats_dict:
+          self._file_formats_dict[file_extension] = file_format
+          
+          if "." in file_extension:
+            self._file_extensions_with_periods.setdefault(
+              file_extension.rsplit(".", 1)[-1], []).append(file_extension)
+    
+    for file_extensions in self._file_extensions_with_periods.values():
+      file_extensions.sort(key=len, reverse=True)
+  
+  def _init_installed_save_procedure_names(self):
+    save_procedure_names = set(
+      file_format.save_procedure_name for file_format in self._file_formats
+      if file_format.is_third_party())
+    
+    unused_, procedure_names = pdb.gimp_procedural_db_query("", "", "", "", "", "", "")
+    
+    self._installed_save_procedure_names = save_procedure_names.intersection(
+      procedure_names)
 
 
 class _FileFormat(object):
@@ -110,7 +282,7 @@ class _FileFormat(object):
     return (
       self.is_builtin()
       or (self.is_third_party()
-          and pdb.gimp_procedural_db_proc_exists(self.save_procedure_name)))
+          and registry.is_save_procedure_installed(self.save_procedure_name)))
 
 
 file_formats = _create_file_formats([
@@ -239,4 +411,4 @@ file_formats = _create_file_formats([
    "file_extensions": ["pcx", "pcc"]},
 ])
 
-file_formats_dict = _create_file_formats_dict(file_formats)
+registry = _FileFormatRegistry(file_formats)
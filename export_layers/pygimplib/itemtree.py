@@ -30,6 +30,9 @@ This module defines the following classes:
 
 * `_ItemTreeElement` - wrapper for `gimp.Item` objects containing custom
   attributes derived from the original `gimp.Item` attributes
+
+* `_ItemTreeColumns` - lazily computed attribute values of all
+  `_ItemTreeElement` objects in an item tree
 """
 
 from __future__ import absolute_import, division, print_function, unicode_literals
@@ -55,6 +58,11 @@ from . import path as pgpath
 from . import utils as pgutils
 
 
+# Values of `_ItemTreeElement.item_type`, also available as attributes of
+# `_ItemTreeElement` objects.
+ITEM_TYPES = ITEM, NONEMPTY_GROUP, EMPTY_GROUP = (0, 1, 2)
+
+
 @future.utils.python_2_unicode_compatible
 class ItemTree(future.utils.with_metaclass(abc.ABCMeta, object)):
   """
@@ -87,6 +95,22 @@ class ItemTree(future.utils.with_metaclass(abc.ABCMeta, object)):
   
   * `filter` - `ObjectFilter` instance that allows filtering items based on
     filters and subfilters.
+  
+  * `columns` (read-only) - Dictionary of attribute values of all items in the
+    item tree (regardless of item filtering), in the order of items in the item
+    tree. Each column is a list computed on first access. Available columns:
+    `"ID"`, `"item_type"`, `"depth"`, `"path_visible"`, `"file_extension"`.
+    If an attribute of an `_ItemTreeElement` that can affect the columns (name,
+    parents, children) changes, only the values of that element are recomputed.
+    Columns are used to match all items against the filter at once (see
+    `ObjectFilter.match_many()`).
+  
+  Results of matching items against the filter are cached until the filter is
+  modified or replaced. If an attribute of an `_ItemTreeElement` that can affect
+  the match (name, parents, children, tags) changes, only the result for that
+  element is discarded. Rules in the filter should therefore only depend on
+  attributes of the matched item, and arguments of rules should not be modified
+  in place while the rules are added to the filter.
   """
   
   def __init__(
@@ -117,11 +141,21 @@ class ItemTree(future.utils.with_metaclass(abc.ABCMeta, object)):
     self._uniquified_itemtree = {}
     
     # key: `_ItemTreeElement` object (parent) or None (root of the item tree)
-    # value: set of `_ItemTreeElement.name` strings
+    # value: `pgpath.StringUniquifier` object containing `_ItemTreeElement.name`
+    # strings
     self._uniquified_itemtree_names = {}
     
     self._validated_itemtree = set()
     
+    # key: `_ItemTreeElement.item.ID`
+    # value: `True` if the item matches `filter`, `False` otherwise
+    self._match_cache = {}
+    self._num_matching_items_in_cache = 0
+    self._match_cache_filter = None
+    self._match_cache_filter_change_count = None
+    
+    self._columns = None
+    
     self._fill_item_tree()
   
   @property
@@ -132,6 +166,13 @@ class ItemTree(future.utils.with_metaclass(abc.ABCMeta, object)):
   def name(self):
     return self._name
   
+  @property
+  def columns(self):
+    if self._columns is None:
+      self._columns = _ItemTreeColumns(list(self._itemtree.values()))
+    
+    return self._columns
+  
   def __getitem__(self, id_or_name):
     """
     Access an `_ItemTreeElement` object by its `_ItemTreeElement.item.ID`
@@ -157,8 +198,19 @@ class ItemTree(future.utils.with_metaclass(abc.ABCMeta, object)):
     """
     Return the number of all item tree elements - that is, all immediate
     children of the image and all nested children.
+    
+    If the `is_filtered` attribute is `True`, return only the number of items
+    that match the filter.
     """
-    return len([item_elem for item_elem in self])
+    if not self.is_filtered:
+      return len(self._itemtree)
+    
+    self._validate_match_cache()
+    
+    if len(self._match_cache) < len(self._itemtree):
+      self._fill_match_cache()
+    
+    return self._num_matching_items_in_cache
   
   def __iter__(self):
     """
@@ -174,9 +226,29 @@ class ItemTree(future.utils.with_metaclass(abc.ABCMeta, object)):
         yield item_elem
     else:
       for item_elem in self._itemtree.values():
-        if self.filter.is_match(item_elem):
+        if self.is_match(item_elem):
           yield item_elem
   
+  def is_match(self, item_elem):
+    """
+    Return `True` if the specified `_ItemTreeElement` object matches the filter,
+    `False` otherwise, regardless of the `is_filtered` attribute.
+    
+    Unlike `filter.is_match()`, the result is cached.
+    """
+    self._validate_match_cache()
+    
+    try:
+      return self._match_cache[item_elem.item.ID]
+    except KeyError:
+      is_match = self.filter.is_match(item_elem)
+      
+      self._match_cache[item_elem.item.ID] = is_match
+      if is_match:
+        self._num_matching_items_in_cache += 1
+      
+      return is_match
+  
   def uniquify_name(
         self,
         item_elem,
@@ -213,7 +285,7 @@ class ItemTree(future.utils.with_metaclass(abc.ABCMeta, object)):
         
         if parent not in self._uniquified_itemtree:
           self._uniquified_itemtree[parent] = set()
-          self._uniquified_itemtree_names[parent] = set()
+          self._uniquified_itemtree_names[parent] = pgpath.StringUniquifier()
         
         if elem not in self._uniquified_itemtree[parent]:
           if elem.name in self._uniquified_itemtree_names[parent]:
@@ -222,8 +294,8 @@ class ItemTree(future.utils.with_metaclass(abc.ABCMeta, object)):
             else:
               position = uniquifier_position_parents
             
-            elem.name = pgpath.uniquify_string(
-              elem.name, self._uniquified_itemtree_names[parent], position)
+            elem.name = self._uniquified_itemtree_names[parent].uniquify(
+              elem.name, position)
           
           self._uniquified_itemtree[parent].add(elem)
           self._uniquified_itemtree_names[parent].add(elem.name)
@@ -232,10 +304,10 @@ class ItemTree(future.utils.with_metaclass(abc.ABCMeta, object)):
       parent = None
       
       if parent not in self._uniquified_itemtree_names:
-        self._uniquified_itemtree_names[parent] = set()
+        self._uniquified_itemtree_names[parent] = pgpath.StringUniquifier()
       
-      item_elem.name = pgpath.uniquify_string(
-        item_elem.name, self._uniquified_itemtree_names[parent], uniquifier_position)
+      item_elem.name = self._uniquified_itemtree_names[parent].uniquify(
+        item_elem.name, uniquifier_position)
       self._uniquified_itemtree_names[parent].add(item_elem.name)
   
   def validate_name(self, item_elem, force_validation=False):
@@ -280,41 +352,77 @@ class ItemTree(future.utils.with_metaclass(abc.ABCMeta, object)):
     """
     self.filter = pgobjectfilter.ObjectFilter(self._filter_match_type)
   
+  def _validate_match_cache(self):
+    if (self.filter is not self._match_cache_filter
+        or self.filter.change_count != self._match_cache_filter_change_count):
+      self._invalidate_match_cache()
+      self._match_cache_filter = self.filter
+      self._match_cache_filter_change_count = self.filter.change_count
+  
+  def _invalidate_match_cache(self):
+    self._match_cache = {}
+    self._num_matching_items_in_cache = 0
+  
+  def _invalidate_match_cache_for_item(self, item_elem):
+    is_match = self._match_cache.pop(item_elem.item.ID, None)
+    if is_match:
+      self._num_matching_items_in_cache -= 1
+  
+  def _fill_match_cache(self):
+    if not self._match_cache:
+      mask = self.filter.match_many(list(self._itemtree.values()), self.columns)
+      
+      self._match_cache = dict(zip(self._itemtree, mask))
+      self._num_matching_items_in_cache = sum(mask)
+    else:
+      # Typically only the few items changed since the last match are missing,
+      # hence matching them one by one is cheaper than matching all items.
+      for item_elem in self._itemtree.values():
+        self.is_match(item_elem)
+  
+  def _update_columns_for_item(self, item_elem):
+    if self._columns is not None:
+      self._columns.update_item_elem(item_elem)
+  
   def _fill_item_tree(self):
     """
     Fill the `_itemtree` and `_itemtree_names` dictionaries.
+    
+    Items are inserted in pre-order - each item group is immediately followed by
+    its children.
     """
     child_items = self._get_children_from_image(self._image)
     child_item_elems = [
-      _ItemTreeElement(item, [], None, self._name) for item in child_items]
+      _ItemTreeElement(item, [], None, self._name, self) for item in child_items]
     
-    item_elem_tree = child_item_elems
+    # Stack of elements yet to be inserted. The next element to insert is the
+    # last element in the stack.
+    item_elem_tree = list(reversed(child_item_elems))
     
     while item_elem_tree:
-      item_elem = item_elem_tree.pop(0)
+      item_elem = item_elem_tree.pop()
       
       self._itemtree[item_elem.item.ID] = item_elem
       self._itemtree_names[item_elem.orig_name] = item_elem
       
-      item_elem_parents = list(item_elem.parents)
       if self._is_group(item_elem.item):
         child_items = self._get_children_from_item(item_elem.item)
       else:
         child_items = None
       
       if child_items is not None:
+        item_elem_parents = list(item_elem.parents)
         item_elem_parents.append(item_elem)
         child_item_elems = [
           _ItemTreeElement(
-            item, item_elem_parents, None, self._name) for item in child_items]
+            item, item_elem_parents, None, self._name, self) for item in child_items]
         
         # We break the convention here and access private attributes from
         # `_ItemTreeElement`.
         item_elem._orig_children = child_item_elems
         item_elem._children = child_item_elems
         
-        for child_item_elem in reversed(child_item_elems):
-          item_elem_tree.insert(0, child_item_elem)
+        item_elem_tree.extend(reversed(child_item_elems))
   
   @abc.abstractmethod
   def _get_children_from_image(self, image):
@@ -404,33 +512,41 @@ class _ItemTreeElement(object):
     a variety of purposes, such as special handling of items with specific tags.
     Tags are stored persistently in the `gimp.Item` object (`item` attribute) as
     parasites. The name of the parasite source is given by the
-    `tags_source_name` attribute.
+    `tags_source_name` attribute. Tags are loaded from the parasite on first
+    access, which takes one PDB call per item as parasites cannot be obtained
+    for multiple items at once.
   
   * `tags_source_name` - Name of the persistent source for the `tags` attribute.
     Defaults to `"tags"` if `None`.
+  
+  * `item_tree` (read-only) - `ItemTree` instance this object belongs to, or
+    `None` if this object does not belong to any item tree. The item tree is
+    notified when attributes of this object that can affect filtering change.
   """
   
-  _ITEM_TYPES = ITEM, NONEMPTY_GROUP, EMPTY_GROUP = (0, 1, 2)
+  _ITEM_TYPES = ITEM, NONEMPTY_GROUP, EMPTY_GROUP = ITEM_TYPES
   
-  def __init__(self, item, parents=None, children=None, tags_source_name=None):
+  def __init__(
+        self, item, parents=None, children=None, tags_source_name=None, item_tree=None):
     if item is None:
       raise TypeError("item cannot be None")
     
     self._item = item
     self._parents = parents if parents is not None else []
     self._children = children
+    self._item_tree = item_tree
     
-    self.name = item.name.decode(pgconstants.GIMP_CHARACTER_ENCODING)
+    self._name = item.name.decode(pgconstants.GIMP_CHARACTER_ENCODING)
     
     self._item_type = None
     self._path_visible = None
     
-    self._orig_name = self.name
+    self._orig_name = self._name
     self._orig_parents = self._parents
     self._orig_children = self._children
     
     self._tags_source_name = tags_source_name if tags_source_name else "tags"
-    self._tags = self._load_tags()
+    self._tags = None
   
   @property
   def item(self):
@@ -443,6 +559,7 @@ class _ItemTreeElement(object):
   @parents.setter
   def parents(self, parents):
     self._parents = parents
+    self._on_changed()
   
   @property
   def children(self):
@@ -451,6 +568,16 @@ class _ItemTreeElement(object):
   @children.setter
   def children(self, children):
     self._children = children
+    self._on_changed()
+  
+  @property
+  def name(self):
+    return self._name
+  
+  @name.setter
+  def name(self, name):
+    self._name = name
+    self._on_changed()
   
   @property
   def depth(self):
@@ -497,12 +624,19 @@ class _ItemTreeElement(object):
   
   @property
   def tags(self):
+    if self._tags is None:
+      self._tags = self._load_tags()
+    
     return self._tags
   
   @property
   def tags_source_name(self):
     return self._tags_source_name
   
+  @property
+  def item_tree(self):
+    return self._item_tree
+  
   def __str__(self):
     return pgutils.stringify_object(self, self.orig_name)
   
@@ -585,24 +719,33 @@ class _ItemTreeElement(object):
     Add the specified tag to the item. If the tag already exists, do nothing.
     The tag is saved to the item persistently.
     """
-    if tag in self._tags:
+    if tag in self.tags:
       return
     
     self._tags.add(tag)
     
     self._save_tags()
+    self._on_changed()
   
   def remove_tag(self, tag):
     """
     Remove the specified tag from the item. If the tag does not exist, raise
     `ValueError`.
     """
-    if tag not in self._tags:
+    if tag not in self.tags:
       raise ValueError("tag '{}' not found in {}".format(tag, self))
     
     self._tags.remove(tag)
     
     self._save_tags()
+    self._on_changed()
+  
+  def _on_changed(self):
+    if self._item_tree is not None:
+      # We break the convention here and access private attributes from
+      # `ItemTree`.
+      self._item_tree._invalidate_match_cache_for_item(self)
+      self._item_tree._update_columns_for_item(self)
   
   def _get_path_visibility(self):
     """
@@ -643,3 +786,47 @@ class _ItemTreeElement(object):
       return tags
     else:
       return set()
+
+
+class _ItemTreeColumns(dict):
+  """
+  This class is a dictionary of columns - lists of attribute values of
+  `_ItemTreeElement` objects. Each column is computed on first access.
+  
+  Accessing a column not defined in `_COLUMN_GETTERS` raises `KeyError`.
+  """
+  
+  _COLUMN_GETTERS = {
+    "ID": lambda item_elem: item_elem.item.ID,
+    "item_type": lambda item_elem: item_elem.item_type,
+    "depth": lambda item_elem: item_elem.depth,
+    "path_visible": lambda item_elem: item_elem.path_visible,
+    "file_extension": lambda item_elem: item_elem.get_file_extension(),
+  }
+  
+  def __init__(self, item_elems):
+    super().__init__()
+    
+    self._item_elems = item_elems
+    self._item_elem_indexes = {
+      item_elem.item.ID: index for index, item_elem in enumerate(item_elems)}
+  
+  def __missing__(self, column_name):
+    get_value = self._COLUMN_GETTERS[column_name]
+    
+    column = [get_value(item_elem) for item_elem in self._item_elems]
+    self[column_name] = column
+    
+    return column
+  
+  def update_item_elem(self, item_elem):
+    """
+    Recompute values of the specified `_ItemTreeElement` object in all columns
+    computed so far.
+    """
+    index = self._item_elem_indexes.get(item_elem.item.ID)
+    if index is None:
+      return
+    
+    for column_name, column in self.items():
+      column[index] = self._COLUMN_GETTERS[column_name](item_elem)
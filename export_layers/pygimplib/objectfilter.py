@@ -16,15 +16,18 @@
 
 """
 This module defines a class to filter objects according to specified filter
-rules.
+rules and functions to register vectorized counterparts of filter rules.
 """
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 from future.builtins import *
 
+import collections
 import inspect
 import contextlib
 
+from . import utils as pgutils
+
 
 class ObjectFilter(object):
   """
@@ -41,8 +44,16 @@ class ObjectFilter(object):
     * MATCH_ANY - For `is_match()` to return `True`, the object must match
       at least one rule.
   
+  * `change_count` (read-only) - Number of modifications (adding or removing
+    rules or subfilters) made to the filter and its subfilters (at any level of
+    nesting). This can be used to determine whether results of `is_match()`
+    cached by the caller are still valid.
+  
   For greater flexibility, the filter can also contain nested `ObjectFilter`
   objects, called "subfilters", each with their own set of rules and match type.
+  
+  Rules and subfilters are compiled into a single function on the first call to
+  `is_match()` after the filter was modified (see `compile()`).
   """
   
   _MATCH_TYPES = MATCH_ALL, MATCH_ANY = (0, 1)
@@ -52,12 +63,25 @@ class ObjectFilter(object):
     
     # Key: function (rule_func)
     # Value: tuple (rule_func_args) or ObjectFilter instance (a subfilter)
-    self._filter_items = {}
+    # Rules and subfilters are evaluated in the order they were added.
+    self._filter_items = collections.OrderedDict()
+    
+    self._change_count = 0
+    
+    # `ObjectFilter` instances containing this instance as a subfilter
+    self._parent_filters = []
+    
+    self._compiled_match_func = None
+    self._compiled_match_func_change_count = None
   
   @property
   def match_type(self):
     return self._match_type
   
+  @property
+  def change_count(self):
+    return self._change_count
+  
   def __bool__(self):
     """
     Return `True` if the filter is not empty, `False` otherwise.
@@ -101,10 +125,12 @@ class ObjectFilter(object):
       raise TypeError("function must have at least one argument (the object to match)")
     
     self._filter_items[rule_func] = rule_func_args
+    
+    self._on_filter_modified()
   
   @staticmethod
   def _is_rule_func_valid(rule_func):
-    num_args = len(inspect.getargspec(rule_func)[0])
+    num_args = len(pgutils.get_argspec(rule_func)[0])
     
     return (
       ((inspect.isfunction(rule_func) or inspect.isbuiltin(rule_func)) and num_args >= 1)
@@ -128,6 +154,7 @@ class ObjectFilter(object):
     """
     if self.has_rule(rule_func):
       del self._filter_items[rule_func]
+      self._on_filter_modified()
     else:
       if raise_if_not_found:
         raise ValueError("'{}' not found in filter".format(rule_func))
@@ -222,6 +249,9 @@ class ObjectFilter(object):
         "subfilter named '{}' is not a subfilter".format(subfilter_name))
     
     self._filter_items[subfilter_name] = subfilter
+    subfilter._parent_filters.append(self)
+    
+    self._on_filter_modified()
   
   def get_subfilter(self, subfilter_name):
     """
@@ -260,7 +290,10 @@ class ObjectFilter(object):
       `raise_if_not_found` is `True`.
     """
     if self.has_subfilter(subfilter_name):
-      del self._filter_items[subfilter_name]
+      subfilter = self._filter_items.pop(subfilter_name)
+      subfilter._parent_filters.remove(self)
+      
+      self._on_filter_modified()
     else:
       if raise_if_not_found:
         raise ValueError(
@@ -332,45 +365,233 @@ class ObjectFilter(object):
     
     If no filter rules are specified, return `True`.
     """
-    if not self._filter_items:
-      return True
+    if self._compiled_match_func_change_count != self._change_count:
+      self._compiled_match_func = self.compile()
+      self._compiled_match_func_change_count = self._change_count
     
-    if self._match_type == self.MATCH_ALL:
-      return self._is_match_all(object_to_match)
+    return self._compiled_match_func(object_to_match)
+  
+  def compile(self):
+    """
+    Return a function accepting one argument - the object to match - that
+    behaves like `is_match()` for the rules and subfilters currently in the
+    filter.
+    
+    Rule arguments are bound to the rules in advance and subfilters with the
+    same match type as their parent filter are flattened into the parent, so
+    that the returned function only performs direct calls to the rules. As with
+    `is_match()`, evaluation stops as soon as the result is known.
+    
+    The returned function does not reflect subsequent modifications of the
+    filter or its subfilters. `is_match()` compiles the filter automatically
+    when needed.
+    """
+    match_funcs = self._get_match_funcs(self._match_type)
+    
+    if match_funcs is None or not match_funcs:
+      return _match_always
+    elif len(match_funcs) == 1:
+      match_func = match_funcs[0]
+      return lambda object_to_match: bool(match_func(object_to_match))
+    elif self._match_type == self.MATCH_ALL:
+      return _get_match_all_func(match_funcs)
     elif self._match_type == self.MATCH_ANY:
-      return self._is_match_any(object_to_match)
+      return _get_match_any_func(match_funcs)
   
-  def reset(self):
+  def match_many(self, objects, columns=None):
     """
-    Reset the filter, removing all rules and subfilters. The match type is
-    preserved.
+    Return a list of booleans, one for each object in the `objects` sequence,
+    indicating whether the object matches the filter. The result is the same as
+    calling `is_match()` for each object.
+    
+    `columns` is an optional dictionary of object attributes (attribute name:
+    sequence of attribute values in the same order as `objects`). Rules with a
+    vectorized counterpart (see `set_vectorized_rule_func()`) are evaluated
+    once over `columns` for all objects. Other rules (or all rules if `columns`
+    is `None`) are called for each object separately and only for objects whose
+    match is not yet determined.
+    
+    Unlike `is_match()`, which evaluates rules in the order they were added,
+    vectorized rules are evaluated first so that the remaining rules are called
+    for as few objects as possible. The other rules are then evaluated in the
+    order they were added. The result does not depend on the order as long as
+    rules have no side effects.
     """
-    self._filter_items.clear()
+    matching_indices = self._get_matching_indices(
+      objects, columns, list(range(len(objects))))
+    
+    mask = [False] * len(objects)
+    for index in matching_indices:
+      mask[index] = True
+    
+    return mask
   
-  def _is_match_all(self, object_to_match):
-    is_match = True
+  def _get_matching_indices(self, objects, columns, indices):
+    if not self._filter_items or not indices:
+      return indices
+    
+    vectorized_filter_items = []
+    other_filter_items = []
     
     for key, value in self._filter_items.items():
-      if isinstance(value, ObjectFilter):
-        is_match = is_match and value.is_match(object_to_match)
+      if (columns is not None
+          and not isinstance(value, ObjectFilter)
+          and key in _vectorized_rule_funcs):
+        vectorized_filter_items.append((key, value))
       else:
-        # key = rule_func, value = rule_func_args
-        is_match = is_match and key(object_to_match, *value)
-      if not is_match:
-        break
+        other_filter_items.append((key, value))
+    
+    filter_items = vectorized_filter_items + other_filter_items
     
-    return is_match
+    if self._match_type == self.MATCH_ALL:
+      for key, value in filter_items:
+        indices = _get_matching_indices_for_filter_item(
+          key, value, objects, columns, indices)
+        if not indices:
+          break
+      
+      return indices
+    elif self._match_type == self.MATCH_ANY:
+      matching_indices = set()
+      remaining_indices = indices
+      
+      for key, value in filter_items:
+        matching_indices.update(
+          _get_matching_indices_for_filter_item(
+            key, value, objects, columns, remaining_indices))
+        remaining_indices = [
+          index for index in remaining_indices if index not in matching_indices]
+        if not remaining_indices:
+          break
+      
+      return [index for index in indices if index in matching_indices]
   
-  def _is_match_any(self, object_to_match):
-    is_match = False
+  def _get_match_funcs(self, match_type):
+    """
+    Return a list of functions to match an object against, each accepting only
+    the object to match. Subfilters with the specified match type are flattened.
+    
+    Return `None` if the filter matches any object (empty filter or a `MATCH_ANY`
+    filter containing an empty subfilter).
+    """
+    if not self._filter_items:
+      return None
+    
+    match_funcs = []
     
     for key, value in self._filter_items.items():
       if isinstance(value, ObjectFilter):
-        is_match = is_match or value.is_match(object_to_match)
+        if value._match_type == match_type:
+          subfilter_match_funcs = value._get_match_funcs(match_type)
+        else:
+          subfilter_match_funcs = [value.compile()]
+        
+        if subfilter_match_funcs is None:
+          if match_type == self.MATCH_ANY:
+            return None
+        else:
+          match_funcs.extend(subfilter_match_funcs)
       else:
         # key = rule_func, value = rule_func_args
-        is_match = is_match or key(object_to_match, *value)
-      if is_match:
-        break
+        match_funcs.append(_get_rule_func_with_bound_args(key, value))
+    
+    return match_funcs
+  
+  def reset(self):
+    """
+    Reset the filter, removing all rules and subfilters. The match type is
+    preserved.
+    """
+    for value in self._filter_items.values():
+      if isinstance(value, ObjectFilter):
+        value._parent_filters.remove(self)
+    
+    self._filter_items.clear()
+    
+    self._on_filter_modified()
+  
+  def _on_filter_modified(self):
+    self._change_count += 1
     
-    return is_match
+    for parent_filter in self._parent_filters:
+      parent_filter._on_filter_modified()
+
+
+def set_vectorized_rule_func(rule_func, vectorized_rule_func):
+  """
+  Register a vectorized counterpart of the `rule_func` rule, used by
+  `ObjectFilter.match_many()`.
+  
+  `vectorized_rule_func` must accept a dictionary of columns (see
+  `ObjectFilter.match_many()`) followed by the same arguments as `rule_func`
+  except the object to match, and return a sequence of values (one value per
+  object, interpreted as a boolean) in the same order as the columns.
+  
+  If `vectorized_rule_func` is `None`, remove the vectorized counterpart.
+  """
+  if vectorized_rule_func is not None:
+    _vectorized_rule_funcs[rule_func] = vectorized_rule_func
+  else:
+    _vectorized_rule_funcs.pop(rule_func, None)
+
+
+def get_vectorized_rule_func(rule_func):
+  """
+  Return the vectorized counterpart of the `rule_func` rule or `None` if
+  `rule_func` has no vectorized counterpart.
+  """
+  return _vectorized_rule_funcs.get(rule_func)
+
+
+# key: rule function
+# value: vectorized counterpart of the rule function
+_vectorized_rule_funcs = {}
+
+
+def _get_matching_indices_for_filter_item(key, value, objects, columns, indices):
+  if isinstance(value, ObjectFilter):
+    return value._get_matching_indices(objects, columns, indices)
+  elif columns is not None and key in _vectorized_rule_funcs:
+    mask = _vectorized_rule_funcs[key](columns, *value)
+    return [index for index in indices if mask[index]]
+  else:
+    # key = rule_func, value = rule_func_args
+    return [index for index in indices if key(objects[index], *value)]
+
+
+def _match_always(object_to_match):
+  return True
+
+
+def _get_rule_func_with_bound_args(rule_func, rule_func_args):
+  if not rule_func_args:
+    return rule_func
+  else:
+    def _rule_func_with_bound_args(object_to_match):
+      return rule_func(object_to_match, *rule_func_args)
+    
+    return _rule_func_with_bound_args
+
+
+def _get_match_all_func(match_funcs):
+  match_funcs = tuple(match_funcs)
+  
+  def _match_all(object_to_match):
+    for match_func in match_funcs:
+      if not match_func(object_to_match):
+        return False
+    return True
+  
+  return _match_all
+
+
+def _get_match_any_func(match_funcs):
+  match_funcs = tuple(match_funcs)
+  
+  def _match_any(object_to_match):
+    for match_func in match_funcs:
+      if match_func(object_to_match):
+        return True
+    return False
+  
+  return _match_any
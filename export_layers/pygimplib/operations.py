@@ -25,6 +25,8 @@ from future.builtins import *
 import collections
 import inspect
 import itertools
+import json
+import timeit
 
 
 class OperationExecutor(object):
@@ -39,6 +41,16 @@ class OperationExecutor(object):
     operations),
   * adding another `OperationExecutor` instance as an operation (i.e. nesting
     the current instance inside another instance).
+  
+  Attributes:
+  
+  * `change_count` (read-only) - Number of modifications (adding, removing or
+    reordering operations) made to the executor. Modifications of nested
+    `OperationExecutor` instances are not included.
+  
+  * `profiler` - `OperationProfiler` instance recording statistics of executed
+    operations, or `None` if operations should not be profiled (default).
+    Nested `OperationExecutor` instances use the same profiler.
   """
   
   _OPERATION_TYPES = _TYPE_OPERATION, _TYPE_FOREACH_OPERATION, _TYPE_EXECUTOR = (0, 1, 2)
@@ -66,6 +78,27 @@ class OperationExecutor(object):
     
     # key: operation ID; value: `_OperationItem` instance
     self._operation_items = {}
+    
+    # Number of modifications of operations, used to recompile execution plans
+    self._change_count = 0
+    
+    # key: (tuple of groups, additional_args_position)
+    # value: `_ExecutionPlan` instance used by `execute()`
+    self._execution_plans = {}
+    
+    self._profiler = None
+  
+  @property
+  def change_count(self):
+    return self._change_count
+  
+  @property
+  def profiler(self):
+    return self._profiler
+  
+  @profiler.setter
+  def profiler(self, profiler):
+    self._profiler = profiler
   
   def add(
         self,
@@ -200,67 +233,30 @@ class OperationExecutor(object):
     `additional_args`. `additional_args_position` also applies to nested
     `OperationExecutor` instances.
     """
-    
-    def _execute_operation(operation, operation_args, operation_kwargs):
-      args = _get_args(operation_args)
-      kwargs = dict(operation_kwargs, **additional_kwargs)
-      return operation(*args, **kwargs)
-    
-    def _get_args(operation_args):
-      if additional_args_position is None:
-        return tuple(operation_args) + tuple(additional_args)
-      else:
-        args = list(operation_args)
-        args[additional_args_position:additional_args_position] = additional_args
-        return tuple(args)
-    
-    def _execute_operation_with_foreach_operations(
-          operation, operation_args, operation_kwargs, group):
-      operation_generators = [
-        _execute_operation(*item.operation)
-        for item in self._foreach_operations[group]]
-      
-      _execute_foreach_operations_once(operation_generators)
-      
-      while operation_generators:
-        result_from_operation = _execute_operation(
-          operation, operation_args, operation_kwargs)
-        _execute_foreach_operations_once(operation_generators, result_from_operation)
-    
-    def _execute_foreach_operations_once(
-          operation_generators, result_from_operation=None):
-      operation_generators_to_remove = []
-      
-      for operation_generator in operation_generators:
-        try:
-          operation_generator.send(result_from_operation)
-        except StopIteration:
-          operation_generators_to_remove.append(operation_generator)
-      
-      for operation_generator_to_remove in operation_generators_to_remove:
-        operation_generators.remove(operation_generator_to_remove)
-    
-    def _execute_executor(executor, group):
-      executor.execute(
-        [group], additional_args, additional_kwargs, additional_args_position)
-    
-    additional_args = additional_args if additional_args is not None else ()
-    additional_kwargs = additional_kwargs if additional_kwargs is not None else {}
-    
-    for group in self._process_groups_arg(groups):
-      if group not in self._operations:
-        self._init_group(group)
-      
-      for item in self._operations[group]:
-        if item.operation_type != self._TYPE_EXECUTOR:
-          operation, operation_args, operation_kwargs = item.operation
-          if self._foreach_operations[group]:
-            _execute_operation_with_foreach_operations(
-              operation, operation_args, operation_kwargs, group)
-          else:
-            _execute_operation(operation, operation_args, operation_kwargs)
-        else:
-          _execute_executor(item.operation, group)
+    self._get_execution_plan(
+      self._process_groups_arg(groups), additional_args_position)(
+        additional_args, additional_kwargs)
+  
+  def compile(self, groups=None, additional_args_position=None):
+    """
+    Return a function executing operations in the specified groups that behaves
+    like `execute()` with the same `groups` and `additional_args_position`. The
+    returned function accepts optional `additional_args` and `additional_kwargs`
+    (see `execute()`).
+    
+    Operation arguments are split around `additional_args_position` and for-each
+    operations are bound to the operations they wrap in advance, so that the
+    returned function only inserts additional arguments and calls operations.
+    This is useful if the same groups are executed many times (e.g. once per
+    item).
+    
+    After adding, removing or reordering operations in this instance (via
+    `add()`, `add_to_groups()`, `remove()`, `reorder()` or `remove_groups()`),
+    the returned function is compiled again on its next call. Nested
+    `OperationExecutor` instances are compiled separately and keep track of
+    their own modifications.
+    """
+    return _ExecutionPlan(self, groups, additional_args_position)
   
   def add_to_groups(self, operation_id, groups=None):
     """
@@ -437,6 +433,8 @@ class OperationExecutor(object):
       position = max(len(operation_lists[group]) + position + 1, 0)
     
     operation_lists[group].insert(position, operation_item)
+    
+    self._change_count += 1
   
   def remove(self, operation_id, groups=None, ignore_if_not_exists=False):
     """
@@ -509,6 +507,8 @@ class OperationExecutor(object):
       
       del self._operations[group]
       del self._foreach_operations[group]
+      
+      self._change_count += 1
   
   def _init_group(self, group):
     if group not in self._operations:
@@ -547,6 +547,8 @@ class OperationExecutor(object):
     
     self._operations[group].append(operation_item)
     self._operation_functions[group][operation] += 1
+    
+    self._change_count += 1
   
   def _add_foreach_operation(
         self,
@@ -577,6 +579,8 @@ class OperationExecutor(object):
     
     self._foreach_operations[group].append(operation_item)
     self._foreach_operation_functions[group][foreach_operation] += 1
+    
+    self._change_count += 1
   
   def _add_executor(self, operation_id, executor, group):
     self._init_group(group)
@@ -586,6 +590,8 @@ class OperationExecutor(object):
     
     self._operations[group].append(operation_item)
     self._executors[group][executor] += 1
+    
+    self._change_count += 1
   
   def _get_operation_id(self):
     return self._operation_id_counter.next()
@@ -615,6 +621,8 @@ class OperationExecutor(object):
       del operation_functions[group][operation_item.operation_function]
     
     self._remove_operation_item(operation_id, group)
+    
+    self._change_count += 1
   
   def _remove_operation_item(self, operation_id, group):
     self._operation_items[operation_id].groups.remove(group)
@@ -622,6 +630,69 @@ class OperationExecutor(object):
     if not self._operation_items[operation_id].groups:
       del self._operation_items[operation_id]
   
+  def _get_execution_plan(self, groups, additional_args_position):
+    key = (tuple(groups), additional_args_position)
+    
+    if key not in self._execution_plans:
+      self._execution_plans[key] = _ExecutionPlan(
+        self, list(groups), additional_args_position)
+    
+    return self._execution_plans[key]
+  
+  def _get_operation_calls(self, groups, additional_args_position, profiler=None):
+    operation_calls = []
+    
+    for group in self._process_groups_arg(groups):
+      if group not in self._operations:
+        self._init_group(group)
+      
+      foreach_operation_calls = []
+      
+      for item in self._foreach_operations[group]:
+        foreach_operation_call = _get_operation_call(
+          item.operation, additional_args_position)
+        
+        if profiler is not None:
+          profiler._register_operation(
+            item.operation_id, _get_operation_name(item.operation_function))
+          foreach_operation_call = _get_profiled_foreach_operation_call(
+            foreach_operation_call, profiler, item.operation_id, group)
+        
+        foreach_operation_calls.append(foreach_operation_call)
+      
+      for item in self._operations[group]:
+        if item.operation_type != self._TYPE_EXECUTOR:
+          operation_call = _get_operation_call(item.operation, additional_args_position)
+          
+          if profiler is not None:
+            profiler._register_operation(
+              item.operation_id, _get_operation_name(item.operation_function))
+            operation_call = _get_profiled_operation_call(
+              operation_call, profiler, item.operation_id, group)
+          
+          if foreach_operation_calls:
+            operation_call = _get_operation_call_with_foreach_operations(
+              operation_call, foreach_operation_calls)
+        else:
+          if profiler is None:
+            operation_call = item.operation._get_execution_plan(
+              [group], additional_args_position).execute
+          else:
+            profiler._register_operation(
+              item.operation_id,
+              _get_operation_name(item.operation_function),
+              is_executor=True)
+            operation_call = _get_profiled_operation_call(
+              _ExecutionPlan(
+                item.operation, [group], additional_args_position, profiler).execute,
+              profiler,
+              item.operation_id,
+              group)
+        
+        operation_calls.append(operation_call)
+    
+    return operation_calls
+  
   def _process_groups_arg(self, groups):
     if groups is None or groups == "default":
       return ["default"]
@@ -668,6 +739,127 @@ class OperationExecutor(object):
         operation_id, group))
 
   
+class OperationProfiler(object):
+  """
+  This class records statistics of operations executed by `OperationExecutor`
+  instances - the number of calls, the cumulative time and the maximum time of
+  a single call, for each operation and each group.
+  
+  To profile operations, assign an instance of this class to the `profiler`
+  attribute of an `OperationExecutor` instance.
+  
+  Times of for-each operations exclude the time of the operations they wrap.
+  Statistics of a group are aggregated from operations executed in the group,
+  including operations in nested `OperationExecutor` instances. Nested
+  `OperationExecutor` instances are recorded as operations as well, but are not
+  counted in group statistics to avoid counting the same time twice.
+  """
+  
+  def __init__(self):
+    # key: operation ID; value: operation name
+    self._operation_names = {}
+    
+    # IDs of operations that are nested `OperationExecutor` instances
+    self._executor_ids = set()
+    
+    # key: operation ID; value: `_OperationStatistics` instance
+    self._operation_statistics = collections.OrderedDict()
+    
+    # key: operation ID; value: list of groups the operation was executed in
+    self._operation_groups = collections.defaultdict(list)
+    
+    # key: group; value: `_OperationStatistics` instance
+    self._group_statistics = collections.OrderedDict()
+  
+  def get_operation_name(self, operation_id):
+    """
+    Return the name of the operation specified by its ID, or `None` if the
+    operation has not been executed with this profiler yet.
+    """
+    return self._operation_names.get(operation_id)
+  
+  def set_operation_name(self, operation_id, name):
+    """
+    Set the name of the operation specified by its ID as it appears in the
+    report. By default, the name of the operation function is used.
+    """
+    self._operation_names[operation_id] = name
+  
+  def reset(self):
+    """
+    Remove all recorded statistics. Operation names are preserved.
+    """
+    self._operation_statistics.clear()
+    self._operation_groups.clear()
+    self._group_statistics.clear()
+  
+  def get_report(self):
+    """
+    Return recorded statistics as a dictionary containing the following items:
+    
+    * `"operations"` - list of dictionaries, one for each executed operation,
+      sorted by the cumulative time in descending order. Each dictionary
+      contains the operation ID (`"id"`), operation name (`"name"`), groups the
+      operation was executed in (`"groups"`), number of calls (`"call_count"`),
+      cumulative time (`"total_time"`) and maximum time of a single call
+      (`"max_time"`). Times are in seconds.
+    
+    * `"groups"` - list of dictionaries, one for each group, containing the
+      group name (`"name"`) and the statistics as described above.
+    """
+    operations_report = []
+    
+    for operation_id, statistics in self._operation_statistics.items():
+      operation_report = collections.OrderedDict([
+        ("id", operation_id),
+        ("name", self._operation_names.get(operation_id)),
+        ("groups", list(self._operation_groups[operation_id]))])
+      operation_report.update(statistics.as_dict())
+      operations_report.append(operation_report)
+    
+    operations_report.sort(key=lambda report: report["total_time"], reverse=True)
+    
+    groups_report = []
+    
+    for group, statistics in self._group_statistics.items():
+      group_report = collections.OrderedDict([("name", group)])
+      group_report.update(statistics.as_dict())
+      groups_report.append(group_report)
+    
+    return collections.OrderedDict([
+      ("operations", operations_report),
+      ("groups", groups_report)])
+  
+  def get_report_as_json(self, **json_dumps_kwargs):
+    """
+    Return the report from `get_report()` as a JSON string. `json_dumps_kwargs`
+    are passed to `json.dumps()`.
+    """
+    return json.dumps(self.get_report(), **json_dumps_kwargs)
+  
+  def _register_operation(self, operation_id, default_name, is_executor=False):
+    if operation_id not in self._operation_names:
+      self._operation_names[operation_id] = default_name
+    
+    if is_executor:
+      self._executor_ids.add(operation_id)
+  
+  def _add_record(self, operation_id, group, elapsed_time):
+    if operation_id not in self._operation_statistics:
+      self._operation_statistics[operation_id] = _OperationStatistics()
+    
+    self._operation_statistics[operation_id].add(elapsed_time)
+    
+    if group not in self._operation_groups[operation_id]:
+      self._operation_groups[operation_id].append(group)
+    
+    if operation_id not in self._executor_ids:
+      if group not in self._group_statistics:
+        self._group_statistics[group] = _OperationStatistics()
+      
+      self._group_statistics[group].add(elapsed_time)
+
+
 class _OperationItem(object):
   
   def __init__(
@@ -683,3 +875,168 @@ class _OperationItem(object):
     self.operation_type = (
       operation_type if operation_type is not None else OperationExecutor._TYPE_OPERATION)
     self.operation_function = operation_function
+
+
+class _ExecutionPlan(object):
+  """
+  This class executes operations in the specified groups of an
+  `OperationExecutor` instance in a loop of direct calls. The operations are
+  compiled again if the `OperationExecutor` instance was modified since the
+  last execution.
+  """
+  
+  def __init__(self, executor, groups, additional_args_position, profiler=None):
+    self._executor = executor
+    self._groups = groups
+    self._additional_args_position = additional_args_position
+    # Profiler of the parent `OperationExecutor` instance, taking precedence over
+    # the profiler of `executor`
+    self._parent_profiler = profiler
+    
+    self._operation_calls = None
+    self._change_count = None
+    self._profiler = None
+  
+  def __call__(self, additional_args=None, additional_kwargs=None):
+    self.execute(
+      tuple(additional_args) if additional_args is not None else (),
+      additional_kwargs if additional_kwargs is not None else {})
+  
+  def execute(self, additional_args, additional_kwargs):
+    profiler = (
+      self._parent_profiler if self._parent_profiler is not None
+      else self._executor._profiler)
+    
+    if (self._change_count != self._executor._change_count
+        or self._profiler is not profiler):
+      self._operation_calls = self._executor._get_operation_calls(
+        self._groups, self._additional_args_position, profiler)
+      self._change_count = self._executor._change_count
+      self._profiler = profiler
+    
+    for operation_call in self._operation_calls:
+      operation_call(additional_args, additional_kwargs)
+
+
+def _get_operation_call(operation_with_args, additional_args_position):
+  operation, operation_args, operation_kwargs = operation_with_args
+  
+  if additional_args_position is None:
+    args_before = tuple(operation_args)
+    args_after = ()
+  else:
+    args_before = tuple(operation_args[:additional_args_position])
+    args_after = tuple(operation_args[additional_args_position:])
+  
+  def _call_operation(additional_args, additional_kwargs):
+    if additional_kwargs:
+      kwargs = dict(operation_kwargs, **additional_kwargs)
+    else:
+      kwargs = operation_kwargs
+    
+    return operation(*(args_before + additional_args + args_after), **kwargs)
+  
+  return _call_operation
+
+
+def _get_operation_call_with_foreach_operations(
+      operation_call, foreach_operation_calls):
+  def _call_operation_with_foreach_operations(additional_args, additional_kwargs):
+    operation_generators = [
+      foreach_operation_call(additional_args, additional_kwargs)
+      for foreach_operation_call in foreach_operation_calls]
+    
+    _execute_foreach_operations_once(operation_generators)
+    
+    while operation_generators:
+      result_from_operation = operation_call(additional_args, additional_kwargs)
+      _execute_foreach_operations_once(operation_generators, result_from_operation)
+  
+  return _call_operation_with_foreach_operations
+
+
+def _get_profiled_operation_call(operation_call, profiler, operation_id, group):
+  def _call_profiled_operation(additional_args, additional_kwargs):
+    start_time = timeit.default_timer()
+    try:
+      return operation_call(additional_args, additional_kwargs)
+    finally:
+      profiler._add_record(operation_id, group, timeit.default_timer() - start_time)
+  
+  return _call_profiled_operation
+
+
+def _get_profiled_foreach_operation_call(
+      foreach_operation_call, profiler, operation_id, group):
+  def _call_profiled_foreach_operation(additional_args, additional_kwargs):
+    return _ProfiledGenerator(
+      foreach_operation_call(additional_args, additional_kwargs),
+      lambda elapsed_time: profiler._add_record(operation_id, group, elapsed_time))
+  
+  return _call_profiled_foreach_operation
+
+
+def _get_operation_name(operation_function):
+  if isinstance(operation_function, OperationExecutor):
+    return type(operation_function).__name__
+  else:
+    return getattr(operation_function, "__name__", repr(operation_function))
+
+
+def _execute_foreach_operations_once(operation_generators, result_from_operation=None):
+  operation_generators_to_remove = []
+  
+  for operation_generator in operation_generators:
+    try:
+      operation_generator.send(result_from_operation)
+    except StopIteration:
+      operation_generators_to_remove.append(operation_generator)
+  
+  for operation_generator_to_remove in operation_generators_to_remove:
+    operation_generators.remove(operation_generator_to_remove)
+
+
+class _ProfiledGenerator(object):
+  """
+  This class wraps a generator of a for-each operation and measures the time
+  spent in the generator. The total time is passed to `record_func` once the
+  generator is exhausted.
+  """
+  
+  def __init__(self, generator, record_func):
+    self._generator = generator
+    self._record_func = record_func
+    
+    self._elapsed_time = 0.0
+  
+  def send(self, value):
+    start_time = timeit.default_timer()
+    
+    try:
+      result = self._generator.send(value)
+    except StopIteration:
+      self._record_func(self._elapsed_time + timeit.default_timer() - start_time)
+      raise
+    
+    self._elapsed_time += timeit.default_timer() - start_time
+    
+    return result
+
+
+class _OperationStatistics(object):
+  
+  def __init__(self):
+    self.call_count = 0
+    self.total_time = 0.0
+    self.max_time = 0.0
+  
+  def add(self, elapsed_time):
+    self.call_count += 1
+    self.total_time += elapsed_time
+    self.max_time = max(self.max_time, elapsed_time)
+  
+  def as_dict(self):
+    return collections.OrderedDict([
+      ("call_count", self.call_count),
+      ("total_time", self.total_time),
+      ("max_time", self.max_time)])
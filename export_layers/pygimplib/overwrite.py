@@ -145,7 +145,8 @@ class InteractiveOverwriteChooser(
     pass
 
 
-def handle_overwrite(filepath, overwrite_chooser, uniquifier_position=None):
+def handle_overwrite(
+      filepath, overwrite_chooser, uniquifier_position=None, file_index=None):
   """
   If a file with the specified file path exists, handle the file path conflict
   by executing the `overwrite_chooser` (an `OverwriteChooser` instance).
@@ -160,6 +161,11 @@ def handle_overwrite(filepath, overwrite_chooser, uniquifier_position=None):
   in the file path to insert a unique substring (`" (number)"`). By default, the
   uniquifier is inserted at the end of the file path to be renamed.
   
+  If `file_index` (a `pgpath.FileIndex` instance) is not `None`, use the index
+  to check for existence of files instead of querying the file system directly.
+  The index is updated if the existing file is renamed. Files saved under the
+  returned file path must be added to the index by the caller.
+  
   Returns:
   
     * the overwrite mode as returned by `overwrite_chooser`, which the caller
@@ -168,16 +174,24 @@ def handle_overwrite(filepath, overwrite_chooser, uniquifier_position=None):
     * the file path passed as the argument, modified if `RENAME_NEW` mode is
       returned.
   """
-  if os.path.exists(filepath):
+  if file_index is not None:
+    exists = file_index.exists
+  else:
+    exists = os.path.exists
+  
+  if exists(filepath):
     overwrite_chooser.choose(filepath=os.path.abspath(filepath))
     
     if overwrite_chooser.overwrite_mode in (
          OverwriteModes.RENAME_NEW, OverwriteModes.RENAME_EXISTING):
-      uniq_filepath = pgpath.uniquify_filepath(filepath, uniquifier_position)
+      uniq_filepath = pgpath.uniquify_filepath(
+        filepath, uniquifier_position, file_index=file_index)
       if overwrite_chooser.overwrite_mode == OverwriteModes.RENAME_NEW:
         filepath = uniq_filepath
       else:
         os.rename(filepath, uniq_filepath)
+        if file_index is not None:
+          file_index.add(uniq_filepath)
   
     return overwrite_chooser.overwrite_mode, filepath
   else:
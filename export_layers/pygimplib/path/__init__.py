@@ -23,6 +23,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 from future.builtins import *
 
 from .fileext import *
+from .fileindex import *
 from .pattern import *
 from .uniquify import *
 from .validators import *
@@ -36,27 +36,22 @@ def get_file_extension(filename):
   If `filename` has no file extension, return an empty string.
   
   If `filename` has multiple periods, it is checked against
-  `fileformats.file_formats_dict` for a matching file extension containing
-  periods. If there is no such extension, return the substring after the last
-  period.
+  `fileformats.registry` for a matching file extension containing periods. If
+  there is no such extension, return the substring after the last period.
   """
   filename_lowercase = filename.lower()
   
   if "." not in filename_lowercase:
     return ""
   
-  file_extension = filename_lowercase
+  last_component = filename_lowercase.rsplit(".", 1)[-1]
   
-  while file_extension:
-    next_period_index = file_extension.find(".")
-    if next_period_index == -1:
-      return file_extension
-    
-    file_extension = file_extension[next_period_index + 1:]
-    if file_extension in pgfileformats.file_formats_dict:
+  for file_extension in pgfileformats.registry.get_file_extensions_with_periods(
+        last_component):
+    if filename_lowercase.endswith("." + file_extension):
       return file_extension
   
-  return ""
+  return last_component
 
 
 def get_filename_with_new_file_extension(
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2019 khalim19
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module contains a class to check for existence of files and directories
+without querying the file system for each path.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+import collections
+import errno
+import os
+
+__all__ = [
+  "FileIndex",
+]
+
+
+class FileIndex(object):
+  """
+  This class keeps track of existing files and directories so that checking
+  whether a path exists (`exists()`) does not query the file system for each
+  path.
+  
+  Each directory is listed only once, on the first existence check of a path
+  inside the directory. Files and directories created or renamed afterwards must
+  be recorded via `add()` to keep the index up to date. Changes to the file
+  system made by other means are not reflected.
+  
+  If a directory cannot be listed (e.g. due to insufficient permissions),
+  existence checks for paths inside the directory fall back to
+  `os.path.exists()`. The same applies to paths whose names differ from
+  existing names only in letter case, since the file system may be
+  case-insensitive (e.g. on macOS).
+  """
+  
+  def __init__(self):
+    # key: normalized directory path
+    # value: set of normalized names of files and directories in the directory,
+    # or `None` if the directory could not be listed
+    self._dir_contents = {}
+    
+    # key: normalized directory path
+    # value: `collections.Counter` of lowercase names in the directory
+    self._dir_contents_lowercase = {}
+  
+  def exists(self, path):
+    """
+    Return `True` if the file or directory specified by `path` exists, `False`
+    otherwise.
+    """
+    dirpath, name = _split_path(path)
+    
+    names = self._get_dir_contents(dirpath)
+    
+    if names is None:
+      return os.path.exists(path)
+    
+    if name in names:
+      return True
+    
+    if self._dir_contents_lowercase[dirpath][name.lower()] > 0:
+      return os.path.exists(path)
+    else:
+      return False
+  
+  def add(self, path):
+    """
+    Record that the file or directory specified by `path` exists, along with
+    all of its parent directories.
+    """
+    dirpath, name = _split_path(path)
+    
+    while name:
+      names = self._dir_contents.get(dirpath)
+      if names is not None and name not in names:
+        names.add(name)
+        self._dir_contents_lowercase[dirpath][name.lower()] += 1
+      
+      dirpath, name = os.path.split(dirpath)
+  
+  def remove(self, path):
+    """
+    Record that the file specified by `path` no longer exists.
+    """
+    dirpath, name = _split_path(path)
+    
+    names = self._dir_contents.get(dirpath)
+    if names is not None and name in names:
+      names.remove(name)
+      self._dir_contents_lowercase[dirpath][name.lower()] -= 1
+  
+  def clear(self):
+    """
+    Discard all directory listings. Directories are listed again on subsequent
+    existence checks.
+    """
+    self._dir_contents.clear()
+    self._dir_contents_lowercase.clear()
+  
+  def _get_dir_contents(self, dirpath):
+    try:
+      return self._dir_contents[dirpath]
+    except KeyError:
+      names = _list_dir(dirpath)
+      self._dir_contents[dirpath] = names
+      if names is not None:
+        self._dir_contents_lowercase[dirpath] = collections.Counter(
+          name.lower() for name in names)
+      return names
+
+
+def _split_path(path):
+  return os.path.split(os.path.normcase(os.path.abspath(path)))
+
+
+def _list_dir(dirpath):
+  try:
+    return set(os.path.normcase(name) for name in os.listdir(dirpath))
+  except OSError as e:
+    if e.errno in (errno.ENOENT, errno.ENOTDIR):
+      return set()
+    else:
+      return None
@@ -27,6 +27,7 @@ __all__ = [
   "uniquify_string",
   "uniquify_filepath",
   "uniquify_string_generic",
+  "StringUniquifier",
 ]
 
 
@@ -56,7 +57,8 @@ def uniquify_string(
     uniquifier_generator)
   
 
-def uniquify_filepath(filepath, uniquifier_position=None, uniquifier_generator=None):
+def uniquify_filepath(
+      filepath, uniquifier_position=None, uniquifier_generator=None, file_index=None):
   """
   If a file at the specified path already exists, return a unique file path.
   
@@ -69,10 +71,18 @@ def uniquify_filepath(filepath, uniquifier_position=None, uniquifier_generator=N
   
   * `uniquifier_generator` - See the `uniquifier_generator` parameter in
     `uniquify_string_generic()`.
+  
+  * `file_index` - `FileIndex` instance to check for existence of files. If
+    `None`, query the file system directly.
   """
+  if file_index is not None:
+    exists = file_index.exists
+  else:
+    exists = os.path.exists
+  
   return uniquify_string_generic(
     filepath,
-    lambda filepath_param: not os.path.exists(filepath_param),
+    lambda filepath_param: not exists(filepath_param),
     uniquifier_position,
     uniquifier_generator)
 
@@ -141,3 +151,73 @@ def uniquify_string_generic(
     uniq_str = _get_uniquified_string(uniquifier_generator)
   
   return uniq_str
+
+
+class StringUniquifier(object):
+  """
+  This class makes strings unique among a set of existing strings that only
+  grows over time (strings can be added, but not removed).
+  
+  Uniquification produces the same results as `uniquify_string()` with the
+  default uniquifier generator (" (1)", " (2)", etc.). Unlike
+  `uniquify_string()`, the number of the last uniquifier is kept for each
+  combination of string and uniquifier position, so that uniquifying many
+  identical strings does not repeatedly probe uniquifiers known to be taken.
+  Strings already containing a uniquifier (e.g. "Layer (3)") are still
+  properly taken into account.
+  """
+  
+  def __init__(self, existing_strings=None):
+    self._existing_strings = (
+      set(existing_strings) if existing_strings is not None else set())
+    
+    # key: (string to uniquify, uniquifier position)
+    # value: number in the uniquifier to try first for the key
+    self._next_uniquifier_numbers = {}
+  
+  def __contains__(self, str_):
+    return str_ in self._existing_strings
+  
+  def __len__(self):
+    return len(self._existing_strings)
+  
+  def add(self, str_):
+    """
+    Add the specified string to the existing strings.
+    """
+    self._existing_strings.add(str_)
+  
+  def uniquify(self, str_, uniquifier_position=None):
+    """
+    If string `str_` is among the existing strings, return a unique string by
+    inserting a uniquifier in `str_`. Otherwise, return `str_`. The returned
+    string is not added to the existing strings.
+    
+    For `uniquifier_position`, see the `uniquifier_position` parameter in
+    `uniquify_string_generic()`.
+    """
+    if str_ not in self._existing_strings:
+      return str_
+    
+    if uniquifier_position is None:
+      uniquifier_position = len(str_)
+    
+    key = (str_, uniquifier_position)
+    
+    # Uniquifiers with lower numbers were already found to be among the
+    # existing strings, which they remain since strings are never removed.
+    number = self._next_uniquifier_numbers.get(key, 1)
+    
+    str_head = str_[0:uniquifier_position]
+    str_tail = str_[uniquifier_position:]
+    
+    uniq_str = "{} ({}){}".format(str_head, number, str_tail)
+    while uniq_str in self._existing_strings:
+      number += 1
+      uniq_str = "{} ({}){}".format(str_head, number, str_tail)
+    
+    # The returned string may not be added to the existing strings, hence the
+    # number is not incremented.
+    self._next_uniquifier_numbers[key] = number
+    
+    return uniq_str
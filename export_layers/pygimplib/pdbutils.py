@@ -363,7 +363,13 @@ def merge_layer_group(layer_group):
   Merge layers in the specified layer group belonging to the specified image
   into one layer.
   
-  This function can handle both top-level and nested layer groups.
+  This function can handle both top-level and nested layer groups. The merged
+  layer keeps the visibility of the layer group.
+  
+  If the image contains only a few top-level layers, the layer group is merged
+  in place by temporarily hiding the other top-level layers. Otherwise, the
+  layer group is merged inside a scratch image so that the number of PDB calls
+  does not grow with the number of layers in the image.
   """
   if not pdb.gimp_item_is_group(layer_group):
     raise TypeError("'{}': not a layer group".format(layer_group.name))
@@ -371,28 +377,81 @@ def merge_layer_group(layer_group):
   image = layer_group.image
   
   with undo_group(image):
-    orig_parent_and_pos = ()
-    if layer_group.parent is not None:
-      # Nested layer group
-      orig_parent_and_pos = (
-        layer_group.parent, pdb.gimp_image_get_item_position(image, layer_group))
-      pdb.gimp_image_reorder_item(image, layer_group, None, 0)
+    if len(image.layers) <= _MAX_NUM_TOP_LEVEL_LAYERS_FOR_IN_PLACE_MERGE:
+      return _merge_layer_group_in_place(image, layer_group)
+    else:
+      return _merge_layer_group_in_scratch_image(image, layer_group)
+
+
+# Hiding and restoring top-level layers takes three PDB calls per layer, while
+# merging in a scratch image takes a constant number of PDB calls (about 10),
+# but also copies pixel data twice.
+_MAX_NUM_TOP_LEVEL_LAYERS_FOR_IN_PLACE_MERGE = 5
+
+
+def _merge_layer_group_in_place(image, layer_group):
+  orig_parent_and_pos = ()
+  if layer_group.parent is not None:
+    # Nested layer group
+    orig_parent_and_pos = (
+      layer_group.parent, pdb.gimp_image_get_item_position(image, layer_group))
+    pdb.gimp_image_reorder_item(image, layer_group, None, 0)
+  
+  visible = layer_group.visible
+  orig_layer_visibility = [layer.visible for layer in image.layers]
+  
+  for layer in image.layers:
+    layer.visible = False
+  layer_group.visible = True
+  
+  merged_layer_group = pdb.gimp_image_merge_visible_layers(
+    image, gimpenums.EXPAND_AS_NECESSARY)
+  
+  for layer, orig_visible in zip(image.layers, orig_layer_visibility):
+    layer.visible = orig_visible
+  
+  merged_layer_group.visible = visible
+  
+  if orig_parent_and_pos:
+    pdb.gimp_image_reorder_item(
+      image, merged_layer_group, orig_parent_and_pos[0], orig_parent_and_pos[1])
+  
+  return merged_layer_group
+
+
+def _merge_layer_group_in_scratch_image(image, layer_group):
+  scratch_image = pdb.gimp_image_new(image.width, image.height, image.base_type)
+  pdb.gimp_image_undo_disable(scratch_image)
+  
+  try:
+    if image.base_type == gimpenums.INDEXED:
+      pdb.gimp_image_set_colormap(scratch_image, *pdb.gimp_image_get_colormap(image))
     
-    orig_layer_visibility = [layer.visible for layer in image.layers]
+    if gimp.version >= (2, 10):
+      pdb.gimp_image_convert_precision(
+        scratch_image, pdb.gimp_image_get_precision(image))
+      pdb.gimp_image_set_color_profile(
+        scratch_image, *pdb.gimp_image_get_color_profile(image))
     
-    for layer in image.layers:
-      layer.visible = False
-    layer_group.visible = True
+    layer_group_copy = copy_and_paste_layer(layer_group, scratch_image)
+    layer_group_copy.visible = True
     
-    merged_layer_group = pdb.gimp_image_merge_visible_layers(
-      image, gimpenums.EXPAND_AS_NECESSARY)
+    merged_layer_group_copy = pdb.gimp_image_merge_visible_layers(
+      scratch_image, gimpenums.EXPAND_AS_NECESSARY)
     
-    for layer, orig_visible in zip(image.layers, orig_layer_visibility):
-      layer.visible = orig_visible
-  
-    if orig_parent_and_pos:
-      pdb.gimp_image_reorder_item(
-        image, merged_layer_group, orig_parent_and_pos[0], orig_parent_and_pos[1])
+    parent = layer_group.parent
+    position = pdb.gimp_image_get_item_position(image, layer_group)
+    visible = layer_group.visible
+    
+    # The layer group is removed before inserting the merged layer so that the
+    # merged layer keeps the name of the layer group.
+    pdb.gimp_image_remove_layer(image, layer_group)
+    
+    merged_layer_group = copy_and_paste_layer(
+      merged_layer_group_copy, image, parent, position)
+    merged_layer_group.visible = visible
+  finally:
+    pdb.gimp_image_delete(scratch_image)
   
   return merged_layer_group
 
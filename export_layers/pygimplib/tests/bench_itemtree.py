@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2019 khalim19
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module benchmarks the `itemtree` module.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+import unittest
+
+import mock
+
+from . import stubs_gimp
+from . import utils_benchmark
+from . import utils_itemtree
+from .. import itemtree as pgitemtree
+from .. import constants as pgconstants
+from .. import path as pgpath
+
+
+@mock.patch(
+  pgconstants.PYGIMPLIB_MODULE_PATH + ".itemtree.pdb",
+  new=stubs_gimp.PdbStub())
+@mock.patch(
+  pgconstants.PYGIMPLIB_MODULE_PATH + ".itemtree.gimp.GroupLayer",
+  new=stubs_gimp.LayerGroupStub)
+class BenchmarkLayerTree(unittest.TestCase):
+  
+  NUM_LAYERS = [1000, 10000, 100000]
+  
+  # Maximum allowed ratio of time per layer between the largest and the smallest
+  # number of layers. Linear growth yields a ratio close to 1.
+  MAX_TIME_PER_LAYER_RATIO = 3.0
+  
+  def test_create_layer_tree_nested_layers(self):
+    self._test_create_layer_tree("LayerTree creation - nested layers", 10)
+  
+  def test_create_layer_tree_top_level_layers(self):
+    self._test_create_layer_tree("LayerTree creation - top-level layers", None)
+  
+  def _test_create_layer_tree(self, title, num_children_per_group):
+    results = []
+    
+    for num_layers in self.NUM_LAYERS:
+      image = utils_itemtree.create_image_with_layers(
+        num_layers,
+        num_children_per_group if num_children_per_group is not None else num_layers)
+      results.append(
+        (num_layers, utils_benchmark.measure(pgitemtree.LayerTree, image)))
+    
+    utils_benchmark.print_results(
+      title,
+      [("{} layers".format(num_layers), elapsed_time)
+       for num_layers, elapsed_time in results])
+    
+    time_per_layer_smallest = results[0][1] / results[0][0]
+    time_per_layer_largest = results[-1][1] / results[-1][0]
+    
+    self.assertLess(
+      time_per_layer_largest,
+      time_per_layer_smallest * self.MAX_TIME_PER_LAYER_RATIO)
+  
+  def test_uniquify_duplicate_names(self):
+    num_layers_list = [500, 5000]
+    results = []
+    
+    for num_layers in num_layers_list:
+      image = utils_itemtree.create_image_with_layers(
+        num_layers, num_layers, layer_name="Layer")
+      layer_tree = pgitemtree.LayerTree(image)
+      
+      results.append(
+        (num_layers, utils_benchmark.measure(_uniquify_all_names, layer_tree)))
+    
+    utils_benchmark.print_results(
+      "LayerTree uniquification - top-level layers with identical names",
+      [("{} layers".format(num_layers), elapsed_time)
+       for num_layers, elapsed_time in results])
+    
+    image = utils_itemtree.create_image_with_layers(
+      num_layers_list[0], num_layers_list[0], layer_name="Layer")
+    layer_tree = pgitemtree.LayerTree(image)
+    _uniquify_all_names(layer_tree)
+    
+    self.assertListEqual(
+      [layer_elem.name for layer_elem in layer_tree],
+      _uniquify_names_by_probing([layer_elem.orig_name for layer_elem in layer_tree]))
+    
+    time_per_layer_smallest = results[0][1] / results[0][0]
+    time_per_layer_largest = results[-1][1] / results[-1][0]
+    
+    self.assertLess(
+      time_per_layer_largest,
+      time_per_layer_smallest * self.MAX_TIME_PER_LAYER_RATIO)
+
+
+def _uniquify_all_names(layer_tree):
+  layer_tree.reset_all_names()
+  
+  for layer_elem in layer_tree:
+    layer_tree.uniquify_name(layer_elem)
+
+
+def _uniquify_names_by_probing(names):
+  existing_names = set()
+  uniquified_names = []
+  
+  for name in names:
+    uniquified_name = pgpath.uniquify_string(name, existing_names)
+    existing_names.add(uniquified_name)
+    uniquified_names.append(uniquified_name)
+  
+  return uniquified_names
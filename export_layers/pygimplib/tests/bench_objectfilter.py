@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2019 khalim19
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module benchmarks the `objectfilter` module.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+import unittest
+
+from . import utils_benchmark
+from .. import objectfilter as pgobjectfilter
+
+
+class FilterableItem(object):
+  
+  ITEM, NONEMPTY_GROUP, EMPTY_GROUP = (0, 1, 2)
+  
+  def __init__(self, item_type, path_visible, name):
+    self.item_type = item_type
+    self.path_visible = path_visible
+    self.name = name
+
+
+def is_layer(item):
+  return item.item_type == item.ITEM
+
+
+def is_nonempty_group(item):
+  return item.item_type == item.NONEMPTY_GROUP
+
+
+def is_empty_group(item):
+  return item.item_type == item.EMPTY_GROUP
+
+
+def is_path_visible(item):
+  return item.path_visible
+
+
+def has_matching_file_extension(item, file_extension):
+  return item.name.endswith("." + file_extension)
+
+
+def is_layer_many(columns):
+  return [item_type == FilterableItem.ITEM for item_type in columns["item_type"]]
+
+
+def is_nonempty_group_many(columns):
+  return [
+    item_type == FilterableItem.NONEMPTY_GROUP for item_type in columns["item_type"]]
+
+
+def is_path_visible_many(columns):
+  return columns["path_visible"]
+
+
+def has_matching_file_extension_many(columns, file_extension):
+  return [
+    file_extension_ == file_extension for file_extension_ in columns["file_extension"]]
+
+
+def _is_match_without_compiling(object_filter, object_to_match):
+  """
+  Match the object by walking the rules and subfilters of the filter on each
+  call, which is how `ObjectFilter.is_match()` operated before compiling the
+  rules was introduced. Used as a baseline for comparison.
+  """
+  if not object_filter._filter_items:
+    return True
+  
+  is_match_all = object_filter.match_type == object_filter.MATCH_ALL
+  
+  for key, value in object_filter._filter_items.items():
+    if isinstance(value, pgobjectfilter.ObjectFilter):
+      is_match = _is_match_without_compiling(value, object_to_match)
+    else:
+      is_match = key(object_to_match, *value)
+    
+    if is_match_all and not is_match:
+      return False
+    elif not is_match_all and is_match:
+      return True
+  
+  return is_match_all
+
+
+class BenchmarkObjectFilter(unittest.TestCase):
+  
+  NUM_ITEMS = 50000
+  
+  def setUp(self):
+    self.filter = pgobjectfilter.ObjectFilter(pgobjectfilter.ObjectFilter.MATCH_ALL)
+    
+    self.filter.add_subfilter(
+      "layer_types", pgobjectfilter.ObjectFilter(pgobjectfilter.ObjectFilter.MATCH_ANY))
+    self.filter["layer_types"].add_rule(is_layer)
+    self.filter["layer_types"].add_rule(is_nonempty_group)
+    
+    self.filter["layer_types"].add_subfilter(
+      "empty_groups", pgobjectfilter.ObjectFilter(pgobjectfilter.ObjectFilter.MATCH_ALL))
+    self.filter["layer_types"]["empty_groups"].add_rule(is_empty_group)
+    self.filter["layer_types"]["empty_groups"].add_rule(is_path_visible)
+    
+    self.filter.add_rule(is_path_visible)
+    self.filter.add_rule(has_matching_file_extension, "png")
+    
+    self.items = [
+      FilterableItem(
+        i % 3, i % 5 != 0, "item {}.{}".format(i, "png" if i % 2 == 0 else "jpg"))
+      for i in range(self.NUM_ITEMS)]
+  
+  def test_is_match_nested_subfilters(self):
+    def _match_all_items(match_func):
+      for item in self.items:
+        match_func(item)
+    
+    elapsed_time_without_compiling = utils_benchmark.measure(
+      _match_all_items, lambda item: _is_match_without_compiling(self.filter, item))
+    elapsed_time = utils_benchmark.measure(_match_all_items, self.filter.is_match)
+    elapsed_time_compiled = utils_benchmark.measure(
+      _match_all_items, self.filter.compile())
+    
+    utils_benchmark.print_results(
+      "ObjectFilter matching - {} items, nested subfilters".format(self.NUM_ITEMS),
+      [("without compiling", elapsed_time_without_compiling),
+       ("is_match()", elapsed_time),
+       ("compile()", elapsed_time_compiled)])
+    
+    self.assertEqual(
+      [_is_match_without_compiling(self.filter, item) for item in self.items],
+      [self.filter.is_match(item) for item in self.items])
+    
+    self.assertLess(elapsed_time, elapsed_time_without_compiling)
+  
+  def test_match_many(self):
+    vectorized_rule_funcs = [
+      (is_layer, is_layer_many),
+      (is_nonempty_group, is_nonempty_group_many),
+      (is_path_visible, is_path_visible_many),
+      (has_matching_file_extension, has_matching_file_extension_many)]
+    
+    for rule_func, vectorized_rule_func in vectorized_rule_funcs:
+      pgobjectfilter.set_vectorized_rule_func(rule_func, vectorized_rule_func)
+      self.addCleanup(pgobjectfilter.set_vectorized_rule_func, rule_func, None)
+    
+    columns = {
+      "item_type": [item.item_type for item in self.items],
+      "path_visible": [item.path_visible for item in self.items],
+      "file_extension": [item.name.rsplit(".", 1)[-1] for item in self.items],
+    }
+    
+    elapsed_time = utils_benchmark.measure(
+      lambda: [self.filter.is_match(item) for item in self.items])
+    elapsed_time_match_many = utils_benchmark.measure(
+      self.filter.match_many, self.items, columns)
+    
+    utils_benchmark.print_results(
+      "ObjectFilter batch matching - {} items, nested subfilters".format(
+        self.NUM_ITEMS),
+      [("is_match()", elapsed_time),
+       ("match_many()", elapsed_time_match_many)])
+    
+    self.assertEqual(
+      self.filter.match_many(self.items, columns),
+      [self.filter.is_match(item) for item in self.items])
+    
+    self.assertLess(elapsed_time_match_many, elapsed_time)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2019 khalim19
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module benchmarks the `operations` module.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+import unittest
+
+from . import utils_benchmark
+from .. import operations as pgoperations
+
+
+def process_item(image, item, counter, increment):
+  counter[0] += increment
+
+
+def process_item_after_each_operation(image, item, counter):
+  yield
+  counter[0] += 1
+
+
+def _execute_without_compiling(
+      executor, groups, additional_args, additional_kwargs, additional_args_position):
+  """
+  Execute operations by walking the operations of the executor on each call,
+  which is how `OperationExecutor.execute()` operated before compiling the
+  operations was introduced. Used as a baseline for comparison.
+  """
+  
+  def _execute_operation(operation, operation_args, operation_kwargs):
+    args = list(operation_args)
+    args[additional_args_position:additional_args_position] = additional_args
+    kwargs = dict(operation_kwargs, **additional_kwargs)
+    return operation(*args, **kwargs)
+  
+  for group in groups:
+    for item in executor._operations[group]:
+      if item.operation_type != executor._TYPE_EXECUTOR:
+        operation, operation_args, operation_kwargs = item.operation
+        if executor._foreach_operations[group]:
+          operation_generators = [
+            _execute_operation(*foreach_item.operation)
+            for foreach_item in executor._foreach_operations[group]]
+          pgoperations._execute_foreach_operations_once(operation_generators)
+          while operation_generators:
+            result_from_operation = _execute_operation(
+              operation, operation_args, operation_kwargs)
+            pgoperations._execute_foreach_operations_once(
+              operation_generators, result_from_operation)
+        else:
+          _execute_operation(operation, operation_args, operation_kwargs)
+      else:
+        _execute_without_compiling(
+          item.operation, [group], additional_args, additional_kwargs,
+          additional_args_position)
+
+
+class BenchmarkOperationExecutor(unittest.TestCase):
+  
+  NUM_ITEMS = 2000
+  NUM_OPERATIONS = 20
+  
+  def setUp(self):
+    self.executor = pgoperations.OperationExecutor()
+    self.nested_executor = pgoperations.OperationExecutor()
+    
+    self.counter = [0]
+    
+    for unused_ in range(self.NUM_OPERATIONS // 2):
+      self.executor.add(process_item, args=[self.counter, 1])
+      self.nested_executor.add(process_item, args=[self.counter, 1])
+    
+    self.executor.add(self.nested_executor)
+    self.executor.add(
+      process_item_after_each_operation, args=[self.counter], foreach=True)
+  
+  def test_execute_per_item(self):
+    def _execute_for_all_items(execute_func):
+      for item in range(self.NUM_ITEMS):
+        execute_func(["image", item])
+    
+    def _execute_without_compiling_for_item(args):
+      _execute_without_compiling(self.executor, ["default"], args, {}, 0)
+    
+    def _execute_for_item(args):
+      self.executor.execute(additional_args=args, additional_args_position=0)
+    
+    elapsed_time_without_compiling = utils_benchmark.measure(
+      _execute_for_all_items, _execute_without_compiling_for_item)
+    self.counter[0] = 0
+    
+    elapsed_time = utils_benchmark.measure(_execute_for_all_items, _execute_for_item)
+    self.counter[0] = 0
+    
+    elapsed_time_compiled = utils_benchmark.measure(
+      _execute_for_all_items, self.executor.compile(additional_args_position=0))
+    self.counter[0] = 0
+    
+    utils_benchmark.print_results(
+      "OperationExecutor - {} operations, {} items".format(
+        self.NUM_OPERATIONS, self.NUM_ITEMS),
+      [("without compiling", elapsed_time_without_compiling),
+       ("execute()", elapsed_time),
+       ("compile()", elapsed_time_compiled)])
+    
+    _execute_for_all_items(_execute_without_compiling_for_item)
+    expected_count = self.counter[0]
+    self.counter[0] = 0
+    
+    _execute_for_all_items(self.executor.compile(additional_args_position=0))
+    self.assertEqual(self.counter[0], expected_count)
+    
+    self.assertLess(elapsed_time_compiled, elapsed_time_without_compiling)
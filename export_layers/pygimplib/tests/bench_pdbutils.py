@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2019 khalim19
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module benchmarks the `pdbutils` module.
+
+This benchmark requires GIMP to be running.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+import unittest
+
+from gimp import pdb
+import gimpenums
+
+from . import utils_benchmark
+from .. import pdbutils as pgpdbutils
+
+
+def _merge_layer_groups(image, merge_func):
+  layer_groups = [layer for layer in image.layers if pdb.gimp_item_is_group(layer)]
+  for layer_group in layer_groups:
+    merge_func(layer_group)
+
+
+def _merge_layer_group_in_place(layer_group):
+  """
+  Merge the layer group by hiding all other top-level layers, which is how
+  `pdbutils.merge_layer_group()` operated regardless of the number of
+  top-level layers. Used as a baseline for comparison.
+  """
+  return pgpdbutils._merge_layer_group_in_place(layer_group.image, layer_group)
+
+
+class BenchmarkMergeLayerGroup(unittest.TestCase):
+  
+  NUM_TOP_LEVEL_LAYERS = 500
+  NUM_LAYER_GROUPS = 20
+  NUM_LAYERS_IN_GROUP = 3
+  
+  @classmethod
+  def setUpClass(cls):
+    cls.image = pdb.gimp_image_new(100, 100, gimpenums.RGB)
+    
+    for i in range(cls.NUM_TOP_LEVEL_LAYERS - cls.NUM_LAYER_GROUPS):
+      cls._insert_layer(cls.image, None, i)
+    
+    for unused_ in range(cls.NUM_LAYER_GROUPS):
+      layer_group = pdb.gimp_layer_group_new(cls.image)
+      pdb.gimp_image_insert_layer(cls.image, layer_group, None, 0)
+      
+      for i in range(cls.NUM_LAYERS_IN_GROUP):
+        cls._insert_layer(cls.image, layer_group, i)
+  
+  @classmethod
+  def tearDownClass(cls):
+    pdb.gimp_image_delete(cls.image)
+  
+  @staticmethod
+  def _insert_layer(image, parent, index):
+    layer = pdb.gimp_layer_new(
+      image, 10, 10, gimpenums.RGBA_IMAGE, "Layer {}".format(index), 100.0,
+      gimpenums.NORMAL_MODE)
+    pdb.gimp_image_insert_layer(image, layer, parent, 0)
+    pdb.gimp_layer_set_offsets(layer, index % 90, index % 90)
+  
+  def test_merge_layer_group(self):
+    elapsed_time_in_place = self._measure(_merge_layer_group_in_place)
+    elapsed_time = self._measure(pgpdbutils.merge_layer_group)
+    
+    utils_benchmark.print_results(
+      "merge_layer_group - {} top-level layers, {} layer groups".format(
+        self.NUM_TOP_LEVEL_LAYERS, self.NUM_LAYER_GROUPS),
+      [("hiding top-level layers", elapsed_time_in_place),
+       ("merge_layer_group()", elapsed_time)])
+    
+    self.assertLess(elapsed_time, elapsed_time_in_place)
+  
+  def _measure(self, merge_func):
+    elapsed_times = []
+    
+    for unused_ in range(3):
+      image = pdb.gimp_image_duplicate(self.image)
+      elapsed_times.append(
+        utils_benchmark.measure(_merge_layer_groups, image, merge_func, repeat=1))
+      pdb.gimp_image_delete(image)
+    
+    return min(elapsed_times)
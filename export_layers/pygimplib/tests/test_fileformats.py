@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2019 khalim19
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+import unittest
+
+import mock
+
+from .. import constants as pgconstants
+from .. import fileformats as pgfileformats
+
+
+@mock.patch(
+  pgconstants.PYGIMPLIB_MODULE_PATH + ".fileformats.gimp.version", new=(2, 8, 22))
+class TestSaveProcedureCapabilities(unittest.TestCase):
+  
+  def test_file_extension_unsupported(self):
+    capabilities = pgfileformats.SaveProcedureCapabilities()
+    
+    self.assertTrue(capabilities.is_file_extension_supported("unknown"))
+    self.assertFalse(capabilities.is_modified)
+    
+    capabilities.set_file_extension_unsupported("unknown")
+    
+    self.assertFalse(capabilities.is_file_extension_supported("unknown"))
+    self.assertTrue(capabilities.is_file_extension_supported("png"))
+    self.assertTrue(capabilities.is_modified)
+  
+  def test_run_mode_unsupported_is_shared_by_file_extensions_of_same_format(self):
+    capabilities = pgfileformats.SaveProcedureCapabilities()
+    
+    capabilities.set_run_mode_unsupported("jpg", 2)
+    
+    self.assertFalse(capabilities.is_run_mode_supported("jpg", 2))
+    self.assertFalse(capabilities.is_run_mode_supported("jpeg", 2))
+    self.assertTrue(capabilities.is_run_mode_supported("jpg", 1))
+    self.assertTrue(capabilities.is_run_mode_supported("png", 2))
+  
+  def test_setting_already_recorded_capability_does_not_modify(self):
+    capabilities = pgfileformats.SaveProcedureCapabilities(
+      {"2.8.22": {"gimp-file-save:png": {"unsupported_run_modes": [2]}}})
+    
+    capabilities.set_run_mode_unsupported("png", 2)
+    
+    self.assertFalse(capabilities.is_modified)
+  
+  def test_capabilities_for_other_gimp_versions_are_discarded(self):
+    capabilities = pgfileformats.SaveProcedureCapabilities(
+      {"2.8.22": {"gimp-file-save:png": {"unsupported": True}},
+       "2.8.20": {"gimp-file-save:jpg": {"unsupported": True}}})
+    
+    self.assertFalse(capabilities.is_file_extension_supported("png"))
+    self.assertTrue(capabilities.is_file_extension_supported("jpg"))
+    self.assertEqual(list(capabilities.data), ["2.8.22"])
+
+
+class TestFileFormatRegistry(unittest.TestCase):
+  
+  def setUp(self):
+    self.file_formats = pgfileformats._create_file_formats([
+      {"description": "PNG image",
+       "file_extensions": ["png"]},
+      {"description": "gzip archive",
+       "file_extensions": ["xcf.gz", "xcfgz"]},
+      {"description": "tar.gz archive",
+       "file_extensions": ["tar.xcf.gz"]},
+      {"description": "Unsupported image",
+       "file_extensions": ["unsupported"],
+       "versions": lambda: False},
+      {"description": "DDS image",
+       "file_extensions": ["dds"],
+       "save_procedure_name": "file-dds-save"},
+      {"description": "Valve Texture Format",
+       "file_extensions": ["vtf"],
+       "save_procedure_name": "file-vtf-save"},
+    ])
+    
+    self.registry = pgfileformats._FileFormatRegistry(self.file_formats)
+  
+  def test_get_file_format(self):
+    self.assertEqual(self.registry.get_file_format("png"), self.file_formats[0])
+    self.assertEqual(self.registry.get_file_format("xcf.gz"), self.file_formats[1])
+    self.assertIsNone(self.registry.get_file_format("unsupported"))
+    self.assertIsNone(self.registry.get_file_format("unknown"))
+  
+  def test_get_file_extensions_with_periods(self):
+    self.assertEqual(
+      self.registry.get_file_extensions_with_periods("gz"), ["tar.xcf.gz", "xcf.gz"])
+    self.assertEqual(self.registry.get_file_extensions_with_periods("png"), [])
+  
+  @mock.patch(pgconstants.PYGIMPLIB_MODULE_PATH + ".fileformats.pdb")
+  def test_is_save_procedure_installed_queries_pdb_once(self, mock_pdb):
+    mock_pdb.gimp_procedural_db_query.return_value = (
+      2, ["file-png-save", "file-dds-save"])
+    
+    self.assertTrue(self.registry.is_save_procedure_installed("file-dds-save"))
+    self.assertFalse(self.registry.is_save_procedure_installed("file-vtf-save"))
+    self.assertFalse(self.registry.is_save_procedure_installed("file-png-save"))
+    
+    self.assertEqual(mock_pdb.gimp_procedural_db_query.call_count, 1)
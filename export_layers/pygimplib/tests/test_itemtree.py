@@ -40,6 +40,7 @@ from . import stubs_gimp
 from . import utils_itemtree
 from .. import itemtree as pgitemtree
 from .. import constants as pgconstants
+from .. import objectfilter as pgobjectfilter
 
 
 class LayerFilterRules(object):
@@ -61,6 +62,14 @@ class LayerFilterRules(object):
     return layer_elem.name.endswith("." + file_extension)
 
 
+def _get_rule_func(rule_func_mock):
+  # `ObjectFilter` only accepts functions as rules.
+  def _rule_func(layer_elem):
+    return rule_func_mock(layer_elem)
+  
+  return _rule_func
+
+
 @mock.patch(
   pgconstants.PYGIMPLIB_MODULE_PATH + ".itemtree.pdb",
   new=stubs_gimp.PdbStub())
@@ -169,6 +178,151 @@ class TestLayerTree(unittest.TestCase):
     
     self.assertEqual(len(self.layer_tree), layer_count_only_layers)
   
+  def test_get_len_is_cached(self):
+    is_layer_mock = mock.Mock(wraps=LayerFilterRules.is_layer)
+    
+    self.layer_tree.is_filtered = True
+    self.layer_tree.filter.add_rule(_get_rule_func(is_layer_mock))
+    
+    self.assertEqual(len(self.layer_tree), 13)
+    self.assertEqual(len(self.layer_tree), 13)
+    self.assertEqual(len(list(self.layer_tree)), 13)
+    
+    self.assertEqual(is_layer_mock.call_count, 20)
+  
+  def test_get_len_cache_is_invalidated_on_filter_change(self):
+    self.layer_tree.is_filtered = True
+    self.layer_tree.filter.add_subfilter(
+      "layer_types", pgobjectfilter.ObjectFilter(pgobjectfilter.ObjectFilter.MATCH_ANY))
+    self.layer_tree.filter["layer_types"].add_rule(LayerFilterRules.is_layer)
+    
+    self.assertEqual(len(self.layer_tree), 13)
+    
+    with self.layer_tree.filter["layer_types"].add_rule_temp(
+           LayerFilterRules.is_layer_or_empty_group):
+      self.assertEqual(len(self.layer_tree), 15)
+    
+    self.assertEqual(len(self.layer_tree), 13)
+    
+    self.layer_tree.reset_filter()
+    self.assertEqual(len(self.layer_tree), 20)
+  
+  def test_get_len_cache_is_invalidated_on_item_change(self):
+    self.layer_tree.is_filtered = True
+    self.layer_tree.filter.add_rule(
+      LayerFilterRules.has_matching_file_extension, "jpg")
+    
+    self.assertEqual(len(self.layer_tree), 1)
+    self.assertTrue(self.layer_tree.is_match(self.layer_tree["main-background.jpg"]))
+    
+    self.layer_tree["Corners"].name = "Corners.jpg"
+    
+    self.assertEqual(len(self.layer_tree), 2)
+    self.assertTrue(self.layer_tree.is_match(self.layer_tree["Corners"]))
+    
+    self.layer_tree.reset_all_names()
+    
+    self.assertEqual(len(self.layer_tree), 1)
+    self.assertFalse(self.layer_tree.is_match(self.layer_tree["Corners"]))
+  
+  def test_get_len_cache_is_invalidated_only_for_changed_item(self):
+    is_layer_mock = mock.Mock(wraps=LayerFilterRules.is_layer)
+    
+    self.layer_tree.is_filtered = True
+    self.layer_tree.filter.add_rule(_get_rule_func(is_layer_mock))
+    
+    self.assertEqual(len(self.layer_tree), 13)
+    
+    is_layer_mock.reset_mock()
+    
+    self.layer_tree["Corners"].name = "Corners.jpg"
+    self.layer_tree["top-frame"].name = "top-frame.jpg"
+    
+    self.assertEqual(len(self.layer_tree), 13)
+    self.assertEqual(is_layer_mock.call_count, 2)
+  
+  def test_get_len_with_vectorized_rules(self):
+    is_layer_mock = mock.Mock(wraps=LayerFilterRules.is_layer)
+    is_layer = _get_rule_func(is_layer_mock)
+    
+    def is_layer_many(columns):
+      return [item_type == pgitemtree.ITEM for item_type in columns["item_type"]]
+    
+    pgobjectfilter.set_vectorized_rule_func(is_layer, is_layer_many)
+    self.addCleanup(pgobjectfilter.set_vectorized_rule_func, is_layer, None)
+    
+    self.layer_tree.is_filtered = True
+    self.layer_tree.filter.add_rule(is_layer)
+    
+    self.assertEqual(len(self.layer_tree), 13)
+    self.assertEqual(len(list(self.layer_tree)), 13)
+    self.assertTrue(self.layer_tree.is_match(self.layer_tree["top-frame"]))
+    self.assertFalse(self.layer_tree.is_match(self.layer_tree["Frames"]))
+    
+    self.assertEqual(is_layer_mock.call_count, 0)
+  
+  def test_columns(self):
+    columns = self.layer_tree.columns
+    
+    self.assertEqual(len(columns["ID"]), 20)
+    self.assertListEqual(
+      columns["ID"], [layer_elem.item.ID for layer_elem in self.layer_tree])
+    self.assertListEqual(
+      columns["item_type"][:4],
+      [pgitemtree.NONEMPTY_GROUP, pgitemtree.ITEM, pgitemtree.ITEM,
+       pgitemtree.EMPTY_GROUP])
+    self.assertListEqual(columns["depth"][:6], [0, 1, 1, 1, 1, 2])
+    self.assertEqual(columns["file_extension"][12], "jpg")
+    
+    with self.assertRaises(KeyError):
+      columns["invalid_column"]
+  
+  def test_columns_are_recomputed_on_item_change(self):
+    self.assertEqual(self.layer_tree.columns["file_extension"][0], "")
+    
+    self.layer_tree["Corners"].name = "Corners.jpg"
+    
+    self.assertEqual(self.layer_tree.columns["file_extension"][0], "jpg")
+  
+  def test_columns_are_updated_only_for_changed_item(self):
+    columns = self.layer_tree.columns
+    depth_column = columns["depth"]
+    
+    self.layer_tree["bottom-right-corner"].parents = []
+    
+    self.assertIs(self.layer_tree.columns, columns)
+    self.assertIs(self.layer_tree.columns["depth"], depth_column)
+    self.assertListEqual(columns["depth"][:6], [0, 1, 1, 1, 1, 0])
+  
+  def test_tags_are_not_loaded_on_creation(self):
+    with self._count_parasite_find_calls() as parasite_find_mock:
+      pgitemtree.LayerTree(self.layer_tree.image)
+    
+    self.assertEqual(parasite_find_mock.call_count, 0)
+  
+  def test_tags_are_loaded_once_on_first_access(self):
+    with self._count_parasite_find_calls() as parasite_find_mock:
+      self.layer_tree["Corners"].tags
+      self.layer_tree["Corners"].tags
+    
+    self.assertEqual(parasite_find_mock.call_count, 1)
+  
+  def test_tags_of_all_items_are_loaded_with_one_call_per_item(self):
+    with self._count_parasite_find_calls() as parasite_find_mock:
+      for unused_ in range(2):
+        for layer_elem in self.layer_tree:
+          layer_elem.tags
+    
+    self.assertEqual(parasite_find_mock.call_count, len(self.layer_tree))
+  
+  @staticmethod
+  def _count_parasite_find_calls():
+    return mock.patch.object(
+      stubs_gimp.ParasiteFunctionsStubMixin,
+      "parasite_find",
+      autospec=True,
+      side_effect=stubs_gimp.ParasiteFunctionsStubMixin.parasite_find)
+  
   def test_get_filepath(self):
     output_dirpath = os.path.join("D:", os.sep, "testgimp")
     
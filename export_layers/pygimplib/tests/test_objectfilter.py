@@ -295,3 +295,212 @@ class TestObjectFilter(unittest.TestCase):
     self.filter.add_rule(FilterRules.has_uppercase_letters)
     self.filter.reset()
     self.assertFalse(bool(self.filter))
+  
+  def test_change_count(self):
+    change_count = self.filter.change_count
+    
+    self.filter.add_rule(FilterRules.is_object_id_even)
+    self.assertGreater(self.filter.change_count, change_count)
+    
+    change_count = self.filter.change_count
+    self.filter.add_rule(FilterRules.is_object_id_even)
+    self.assertEqual(self.filter.change_count, change_count)
+    
+    self.filter.remove_rule(FilterRules.is_object_id_even)
+    self.assertGreater(self.filter.change_count, change_count)
+    
+    change_count = self.filter.change_count
+    with self.filter.add_rule_temp(FilterRules.is_empty):
+      self.assertGreater(self.filter.change_count, change_count)
+      change_count = self.filter.change_count
+    self.assertGreater(self.filter.change_count, change_count)
+  
+  def test_change_count_with_nested_subfilters(self):
+    subfilter = pgobjectfilter.ObjectFilter(pgobjectfilter.ObjectFilter.MATCH_ANY)
+    nested_subfilter = pgobjectfilter.ObjectFilter(pgobjectfilter.ObjectFilter.MATCH_ALL)
+    
+    subfilter.add_subfilter("nested", nested_subfilter)
+    self.filter.add_subfilter("subfilter", subfilter)
+    
+    change_count = self.filter.change_count
+    nested_subfilter.add_rule(FilterRules.has_red_color)
+    self.assertGreater(self.filter.change_count, change_count)
+    
+    self.filter.remove_subfilter("subfilter")
+    change_count = self.filter.change_count
+    nested_subfilter.add_rule(FilterRules.has_green_color)
+    self.assertEqual(self.filter.change_count, change_count)
+    
+    self.filter.add_subfilter("subfilter", subfilter)
+    self.filter.reset()
+    change_count = self.filter.change_count
+    nested_subfilter.remove_rule(FilterRules.has_green_color)
+    self.assertEqual(self.filter.change_count, change_count)
+  
+  def test_match_after_modifying_nested_subfilter(self):
+    subfilter = pgobjectfilter.ObjectFilter(pgobjectfilter.ObjectFilter.MATCH_ANY)
+    nested_subfilter = pgobjectfilter.ObjectFilter(pgobjectfilter.ObjectFilter.MATCH_ALL)
+    subfilter.add_subfilter("nested", nested_subfilter)
+    self.filter.add_subfilter("subfilter", subfilter)
+    
+    obj = FilterableObject(1, "", is_empty=True, colors={"green"})
+    
+    self.assertTrue(self.filter.is_match(obj))
+    
+    nested_subfilter.add_rule(FilterRules.has_red_color)
+    self.assertFalse(self.filter.is_match(obj))
+    
+    with subfilter.add_rule_temp(FilterRules.is_empty):
+      self.assertTrue(self.filter.is_match(obj))
+    
+    self.assertFalse(self.filter.is_match(obj))
+    
+    with nested_subfilter.remove_rule_temp(FilterRules.has_red_color):
+      self.assertTrue(self.filter.is_match(obj))
+    
+    self.assertFalse(self.filter.is_match(obj))
+  
+  def test_match_any_with_empty_subfilter(self):
+    self.filter_match_any.add_rule(FilterRules.has_red_color)
+    self.filter_match_any.add_subfilter(
+      "empty", pgobjectfilter.ObjectFilter(pgobjectfilter.ObjectFilter.MATCH_ALL))
+    
+    self.assertTrue(self.filter_match_any.is_match(FilterableObject(1, "")))
+  
+  def test_compile(self):
+    self.filter.add_rule(FilterRules.has_matching_file_extension, "png")
+    self.filter.add_subfilter(
+      "colors", pgobjectfilter.ObjectFilter(pgobjectfilter.ObjectFilter.MATCH_ANY))
+    self.filter["colors"].add_rule(FilterRules.has_red_color)
+    self.filter["colors"].add_rule(FilterRules.has_green_color)
+    
+    match_func = self.filter.compile()
+    
+    self.assertTrue(match_func(FilterableObject(1, "Foo.png", colors={"red"})))
+    self.assertFalse(match_func(FilterableObject(1, "Foo.jpg", colors={"red"})))
+    self.assertFalse(match_func(FilterableObject(1, "Foo.png", colors={"blue"})))
+    
+    self.filter.remove_rule(FilterRules.has_matching_file_extension)
+    
+    self.assertFalse(match_func(FilterableObject(1, "Foo.jpg", colors={"red"})))
+    self.assertTrue(self.filter.is_match(FilterableObject(1, "Foo.jpg", colors={"red"})))
+  
+  def test_match_many(self):
+    self.filter.add_rule(FilterRules.is_object_id_even)
+    self.filter.add_subfilter(
+      "colors", pgobjectfilter.ObjectFilter(pgobjectfilter.ObjectFilter.MATCH_ANY))
+    self.filter["colors"].add_rule(FilterRules.has_red_color)
+    self.filter["colors"].add_rule(FilterRules.has_green_color)
+    self.filter["colors"].add_subfilter(
+      "empty", pgobjectfilter.ObjectFilter(pgobjectfilter.ObjectFilter.MATCH_ALL))
+    self.filter["colors"]["empty"].add_rule(FilterRules.is_empty)
+    self.filter["colors"]["empty"].add_rule(
+      FilterRules.has_matching_file_extension, "png")
+    
+    objects = [
+      FilterableObject(1, "Foo.png", colors={"red"}),
+      FilterableObject(2, "Foo.png", colors={"red"}),
+      FilterableObject(4, "Foo.png", colors={"blue"}),
+      FilterableObject(6, "Foo.png", is_empty=True, colors={"blue"}),
+      FilterableObject(8, "Foo.jpg", is_empty=True, colors={"blue"}),
+      FilterableObject(10, "Foo.jpg", colors={"green"}),
+    ]
+    
+    self.assertListEqual(
+      self.filter.match_many(objects), [False, True, False, True, False, True])
+    self.assertListEqual(
+      self.filter.match_many(objects),
+      [self.filter.is_match(obj) for obj in objects])
+  
+  def test_match_many_empty_filter(self):
+    self.assertListEqual(
+      self.filter.match_many([FilterableObject(1, ""), FilterableObject(2, "")]),
+      [True, True])
+    self.assertListEqual(self.filter.match_many([]), [])
+  
+  def test_match_many_with_vectorized_rules(self):
+    object_ids = []
+    
+    def is_object_id_even(obj):
+      object_ids.append(obj.object_id)
+      return FilterRules.is_object_id_even(obj)
+    
+    vectorized_calls = []
+    
+    def is_object_id_even_many(columns):
+      vectorized_calls.append(list(columns["object_id"]))
+      return [object_id % 2 == 0 for object_id in columns["object_id"]]
+    
+    pgobjectfilter.set_vectorized_rule_func(is_object_id_even, is_object_id_even_many)
+    self.addCleanup(pgobjectfilter.set_vectorized_rule_func, is_object_id_even, None)
+    
+    self.assertEqual(
+      pgobjectfilter.get_vectorized_rule_func(is_object_id_even), is_object_id_even_many)
+    
+    self.filter.add_rule(FilterRules.has_red_color)
+    self.filter.add_rule(is_object_id_even)
+    
+    objects = [
+      FilterableObject(1, "", colors={"red"}),
+      FilterableObject(2, "", colors={"red"}),
+      FilterableObject(4, "", colors={"blue"}),
+    ]
+    columns = {"object_id": [obj.object_id for obj in objects]}
+    
+    self.assertListEqual(self.filter.match_many(objects, columns), [False, True, False])
+    self.assertListEqual(object_ids, [])
+    # The vectorized rule is evaluated once for the whole batch.
+    self.assertListEqual(vectorized_calls, [[1, 2, 4]])
+    
+    self.assertListEqual(self.filter.match_many(objects), [False, True, False])
+    # Rules are evaluated in the order they were added, hence only objects
+    # matching the first rule are passed to the second rule.
+    self.assertListEqual(object_ids, [1, 2])
+    self.assertEqual(len(vectorized_calls), 1)
+  
+  def test_match_many_evaluates_vectorized_rules_first(self):
+    evaluated_rules = []
+    
+    def has_red_color(obj):
+      evaluated_rules.append(("has_red_color", obj.object_id))
+      return FilterRules.has_red_color(obj)
+    
+    def is_object_id_even(obj):
+      evaluated_rules.append(("is_object_id_even", obj.object_id))
+      return FilterRules.is_object_id_even(obj)
+    
+    def has_uppercase_letters(obj):
+      evaluated_rules.append(("has_uppercase_letters", obj.object_id))
+      return FilterRules.has_uppercase_letters(obj)
+    
+    def is_object_id_even_many(columns):
+      evaluated_rules.append(("is_object_id_even_many", list(columns["object_id"])))
+      return [object_id % 2 == 0 for object_id in columns["object_id"]]
+    
+    pgobjectfilter.set_vectorized_rule_func(is_object_id_even, is_object_id_even_many)
+    self.addCleanup(pgobjectfilter.set_vectorized_rule_func, is_object_id_even, None)
+    
+    self.filter.add_rule(has_red_color)
+    self.filter.add_rule(has_uppercase_letters)
+    self.filter.add_rule(is_object_id_even)
+    
+    objects = [
+      FilterableObject(1, "Hi", colors={"red"}),
+      FilterableObject(2, "Hi", colors={"blue"}),
+      FilterableObject(4, "hello", colors={"red"}),
+      FilterableObject(6, "Hey", colors={"red"}),
+    ]
+    columns = {"object_id": [obj.object_id for obj in objects]}
+    
+    self.assertListEqual(
+      self.filter.match_many(objects, columns), [False, False, False, True])
+    # The vectorized rule is evaluated first even though it was added last. The
+    # other rules follow in the order they were added.
+    self.assertListEqual(
+      evaluated_rules,
+      [("is_object_id_even_many", [1, 2, 4, 6]),
+       ("has_red_color", 2),
+       ("has_red_color", 4),
+       ("has_red_color", 6),
+       ("has_uppercase_letters", 4),
+       ("has_uppercase_letters", 6)])
@@ -143,7 +143,7 @@ class TestOperationExecutor(OperationExecutorTestCase):
     self.assertEqual(len(operation_ids), len(set(operation_ids)))
   
   def test_add_return_unique_ids_across_multiple_executors(self):
-    operation_id = self.executor.add(append_test)
+    operation_id = self.executor.add(append_test, args=[[]])
     
     additional_executor = pgoperations.OperationExecutor()
     additional_operation_id = additional_executor.add(append_test)
@@ -387,7 +387,7 @@ class TestOperationExecutor(OperationExecutorTestCase):
       self.executor.find(additional_executor, foreach=True), [])
   
   def test_find_non_existing_group(self):
-    operation_id = self.executor.add(append_test)
+    operation_id = self.executor.add(append_test, args=[[]])
     self.assertEqual(
       self.executor.find(append_test, ["non_existing_group"]),
       [])
@@ -431,7 +431,7 @@ class TestOperationExecutor(OperationExecutorTestCase):
       self.executor.reorder(-1, 0)
   
   def test_reorder_non_existing_group(self):
-    operation_id = self.executor.add(append_test)
+    operation_id = self.executor.add(append_test, args=[[]])
     with self.assertRaises(ValueError):
       self.executor.reorder(operation_id, 0, "non_existing_group")
   
@@ -576,6 +576,28 @@ class TestOperationExecutor(OperationExecutorTestCase):
     self.assertIsNone(self.executor.list_operations("main"))
     self.assertIsNone(self.executor.list_operations("additional"))
   
+  def test_change_count(self):
+    change_count = self.executor.change_count
+    
+    operation_id = self.executor.add(append_test, args=[[]])
+    self.assertGreater(self.executor.change_count, change_count)
+    
+    change_count = self.executor.change_count
+    self.executor.add_to_groups(operation_id, ["additional"])
+    self.assertGreater(self.executor.change_count, change_count)
+    
+    change_count = self.executor.change_count
+    self.executor.reorder(operation_id, 0)
+    self.assertGreater(self.executor.change_count, change_count)
+    
+    change_count = self.executor.change_count
+    self.executor.remove(operation_id, ["additional"])
+    self.assertGreater(self.executor.change_count, change_count)
+    
+    change_count = self.executor.change_count
+    self.executor.execute()
+    self.assertEqual(self.executor.change_count, change_count)
+  
   def test_remove_groups_non_existing_group(self):
     try:
       self.executor.remove_groups(["non_existing_group"])
@@ -865,3 +887,202 @@ class TestOperationExecutorExecuteWithExecutor(OperationExecutorTestCase):
     except Exception:
       self.fail("adding operations from an empty group from another "
                 "OperationExecutor instance should not raise exception")
+
+
+class TestOperationExecutorCompile(OperationExecutorTestCase):
+  
+  def test_compile(self):
+    test_list = []
+    self.executor.add(append_to_list_multiple_args, args=[test_list, 1, 3])
+    self.executor.add(append_to_list, args=[test_list], groups=["additional"])
+    
+    execute_operations = self.executor.compile(additional_args_position=2)
+    
+    execute_operations(additional_args=[2])
+    self.assertListEqual(test_list, [1, 2, 3])
+    
+    execute_operations(additional_args=[4])
+    self.assertListEqual(test_list, [1, 2, 3, 1, 4, 3])
+  
+  def test_compile_with_kwargs(self):
+    test_dict = {}
+    self.executor.add(update_dict, args=[test_dict], kwargs={"one": 1, "two": 2})
+    
+    execute_operations = self.executor.compile()
+    
+    execute_operations(additional_kwargs={"two": "two"})
+    self.assertDictEqual(test_dict, {"one": 1, "two": "two"})
+    
+    execute_operations()
+    self.assertDictEqual(test_dict, {"one": 1, "two": 2})
+  
+  def test_compile_with_foreach_operations(self):
+    test_list = []
+    self.executor.add(append_to_list, args=[test_list])
+    self.executor.add(append_to_list_before_and_after, args=[test_list], foreach=True)
+    
+    execute_operations = self.executor.compile()
+    
+    execute_operations(additional_args=[1])
+    execute_operations(additional_args=[2])
+    
+    self.assertListEqual(test_list, [1, 1, 1, 2, 2, 2])
+  
+  def test_compile_is_updated_after_modifying_executor(self):
+    test_list = []
+    operation_id = self.executor.add(append_to_list, args=[test_list, 1])
+    
+    execute_operations = self.executor.compile()
+    
+    execute_operations()
+    self.assertListEqual(test_list, [1])
+    
+    another_operation_id = self.executor.add(append_to_list, args=[test_list, 2])
+    test_list[:] = []
+    execute_operations()
+    self.assertListEqual(test_list, [1, 2])
+    
+    self.executor.reorder(another_operation_id, 0)
+    test_list[:] = []
+    execute_operations()
+    self.assertListEqual(test_list, [2, 1])
+    
+    self.executor.remove(operation_id)
+    test_list[:] = []
+    execute_operations()
+    self.assertListEqual(test_list, [2])
+    
+    test_list[:] = []
+    self.executor.compile(["additional"])()
+    self.assertListEqual(test_list, [])
+    
+    self.executor.add_to_groups(another_operation_id, ["additional"])
+    execute_operations = self.executor.compile(["additional"])
+    execute_operations()
+    self.assertListEqual(test_list, [2])
+    
+    self.executor.remove_groups(["additional"])
+    test_list[:] = []
+    execute_operations()
+    self.assertListEqual(test_list, [])
+  
+  def test_compile_all_groups_includes_groups_added_later(self):
+    test_list = []
+    self.executor.add(append_to_list, args=[test_list, 1])
+    
+    execute_operations = self.executor.compile("all")
+    
+    self.executor.add(append_to_list, ["additional"], args=[test_list, 2])
+    execute_operations()
+    
+    self.assertListEqual(test_list, [1, 2])
+  
+  def test_compile_is_updated_after_modifying_nested_executor(self):
+    test_list = []
+    another_executor = pgoperations.OperationExecutor()
+    
+    self.executor.add(another_executor)
+    self.executor.add(append_to_list, args=[test_list, 2])
+    
+    execute_operations = self.executor.compile()
+    execute_operations()
+    self.assertListEqual(test_list, [2])
+    
+    another_executor.add(append_to_list, args=[test_list, 1])
+    test_list[:] = []
+    execute_operations()
+    self.assertListEqual(test_list, [1, 2])
+
+
+class TestOperationProfiler(OperationExecutorTestCase):
+  
+  def setUp(self):
+    super(TestOperationProfiler, self).setUp()
+    
+    self.profiler = pgoperations.OperationProfiler()
+  
+  def test_profile_operations(self):
+    test_list = []
+    operation_id = self.executor.add(
+      append_to_list, ["main", "additional"], [test_list])
+    foreach_operation_id = self.executor.add(
+      append_to_list_before_and_after, ["main"], [test_list], foreach=True)
+    
+    self.executor.profiler = self.profiler
+    
+    self.executor.execute(["main", "additional"], [1])
+    self.executor.execute(["main"], [2])
+    
+    self.assertListEqual(test_list, [1, 1, 1, 1, 2, 2, 2])
+    
+    report = self.profiler.get_report()
+    operation_reports = {
+      operation_report["id"]: operation_report
+      for operation_report in report["operations"]}
+    
+    self.assertEqual(operation_reports[operation_id]["name"], "append_to_list")
+    self.assertEqual(operation_reports[operation_id]["call_count"], 3)
+    self.assertListEqual(
+      operation_reports[operation_id]["groups"], ["main", "additional"])
+    self.assertGreaterEqual(
+      operation_reports[operation_id]["total_time"],
+      operation_reports[operation_id]["max_time"])
+    
+    self.assertEqual(
+      operation_reports[foreach_operation_id]["name"], "append_to_list_before_and_after")
+    self.assertEqual(operation_reports[foreach_operation_id]["call_count"], 2)
+    
+    group_reports = {
+      group_report["name"]: group_report for group_report in report["groups"]}
+    self.assertEqual(group_reports["main"]["call_count"], 4)
+    self.assertEqual(group_reports["additional"]["call_count"], 1)
+  
+  def test_profile_nested_executor(self):
+    test_list = []
+    another_executor = pgoperations.OperationExecutor()
+    nested_operation_id = another_executor.add(append_to_list, args=[test_list, 1])
+    executor_id = self.executor.add(another_executor)
+    
+    self.executor.profiler = self.profiler
+    self.executor.execute()
+    
+    self.assertEqual(self.profiler.get_operation_name(executor_id), "OperationExecutor")
+    self.assertEqual(
+      self.profiler.get_operation_name(nested_operation_id), "append_to_list")
+    
+    report = self.profiler.get_report()
+    self.assertEqual(len(report["operations"]), 2)
+    self.assertEqual(report["groups"][0]["call_count"], 1)
+  
+  def test_profiling_is_disabled_after_removing_profiler(self):
+    self.executor.add(append_to_list, args=[[], 1])
+    
+    self.executor.profiler = self.profiler
+    self.executor.execute()
+    
+    self.executor.profiler = None
+    self.executor.execute()
+    
+    self.assertEqual(self.profiler.get_report()["operations"][0]["call_count"], 1)
+  
+  def test_set_operation_name(self):
+    operation_id = self.executor.add(append_to_list, args=[[], 1])
+    self.profiler.set_operation_name(operation_id, "append")
+    
+    self.executor.profiler = self.profiler
+    self.executor.execute()
+    
+    self.assertEqual(self.profiler.get_report()["operations"][0]["name"], "append")
+  
+  def test_reset_and_get_report_as_json(self):
+    self.executor.add(append_to_list, args=[[], 1])
+    
+    self.executor.profiler = self.profiler
+    self.executor.execute()
+    
+    self.assertIn('"name": "append_to_list"', self.profiler.get_report_as_json())
+    
+    self.profiler.reset()
+    
+    self.assertEqual(
+      self.profiler.get_report_as_json(), '{"operations": [], "groups": []}')
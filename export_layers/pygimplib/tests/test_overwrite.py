@@ -23,6 +23,7 @@ import mock
 
 from .. import constants as pgconstants
 from .. import overwrite as pgoverwrite
+from .. import path as pgpath
 
 
 class InteractiveOverwriteChooserStub(pgoverwrite.InteractiveOverwriteChooser):
@@ -94,3 +95,46 @@ class TestHandleOverwrite(unittest.TestCase):
     self.assertEqual(
       pgoverwrite.handle_overwrite(self.filepath, self.overwrite_chooser),
       (pgoverwrite.OverwriteModes.DO_NOTHING, self.filepath))
+  
+  @mock.patch(pgconstants.PYGIMPLIB_MODULE_PATH + ".path.fileindex.os.listdir")
+  @mock.patch(pgconstants.PYGIMPLIB_MODULE_PATH + ".overwrite.os.path.exists")
+  def test_handle_overwrite_with_file_index(
+        self, mock_os_path_exists, mock_os_listdir):
+    mock_os_listdir.return_value = ["image.png", "image (1).png"]
+    
+    file_index = pgpath.FileIndex()
+    overwrite_chooser = pgoverwrite.NoninteractiveOverwriteChooser(
+      pgoverwrite.OverwriteModes.RENAME_NEW)
+    
+    self.assertEqual(
+      pgoverwrite.handle_overwrite(
+        self.filepath, overwrite_chooser, len(self.filepath) - len(".png"),
+        file_index=file_index),
+      (pgoverwrite.OverwriteModes.RENAME_NEW, "/test/image (2).png"))
+    
+    self.assertEqual(
+      pgoverwrite.handle_overwrite(
+        "/test/image.jpg", overwrite_chooser, file_index=file_index),
+      (pgoverwrite.OverwriteModes.DO_NOTHING, "/test/image.jpg"))
+    
+    self.assertEqual(mock_os_listdir.call_count, 1)
+    self.assertEqual(mock_os_path_exists.call_count, 0)
+  
+  @mock.patch(pgconstants.PYGIMPLIB_MODULE_PATH + ".overwrite.os.rename")
+  @mock.patch(pgconstants.PYGIMPLIB_MODULE_PATH + ".path.fileindex.os.listdir")
+  def test_handle_overwrite_rename_existing_with_file_index(
+        self, mock_os_listdir, mock_os_rename):
+    mock_os_listdir.return_value = ["image.png"]
+    
+    file_index = pgpath.FileIndex()
+    overwrite_chooser = pgoverwrite.NoninteractiveOverwriteChooser(
+      pgoverwrite.OverwriteModes.RENAME_EXISTING)
+    
+    self.assertEqual(
+      pgoverwrite.handle_overwrite(
+        self.filepath, overwrite_chooser, len(self.filepath) - len(".png"),
+        file_index=file_index),
+      (pgoverwrite.OverwriteModes.RENAME_EXISTING, self.filepath))
+    
+    mock_os_rename.assert_called_once_with(self.filepath, "/test/image (1).png")
+    self.assertTrue(file_index.exists("/test/image (1).png"))
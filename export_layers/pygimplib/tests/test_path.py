@@ -17,11 +17,14 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 from future.builtins import *
 
+import errno
 import os
 import unittest
 
+import mock
 import parameterized
 
+from .. import constants as pgconstants
 from .. import path as pgpath
 
 
@@ -62,6 +65,161 @@ class TestUniquifyString(unittest.TestCase):
       expected_str)
 
 
+class TestStringUniquifier(unittest.TestCase):
+  
+  @parameterized.parameterized.expand([
+    ("one_identical_string", "one", ["one", "two", "three"], "one (1)"),
+    
+    ("identical_string_and_existing_string_with_uniquifier",
+     "one", ["one", "one (1)", "three"], "one (2)"),
+    
+    ("existing_string_with_uniquifier",
+     "one (1)", ["one (1)", "two", "three"], "one (1) (1)"),
+    
+    ("string_not_among_existing_strings", "four", ["one", "two", "three"], "four"),
+  ])
+  def test_uniquify(self, test_case_name_suffix, str_, existing_strings, expected_str):
+    self.assertEqual(
+      pgpath.StringUniquifier(existing_strings).uniquify(str_), expected_str)
+  
+  def test_uniquify_same_string_repeatedly(self):
+    uniquifier = pgpath.StringUniquifier(["one"])
+    
+    for expected_str in ["one (1)", "one (2)", "one (3)"]:
+      uniq_str = uniquifier.uniquify("one")
+      self.assertEqual(uniq_str, expected_str)
+      uniquifier.add(uniq_str)
+  
+  def test_uniquify_without_adding_result(self):
+    uniquifier = pgpath.StringUniquifier(["one"])
+    
+    self.assertEqual(uniquifier.uniquify("one"), "one (1)")
+    self.assertEqual(uniquifier.uniquify("one"), "one (1)")
+  
+  def test_uniquify_with_existing_strings_with_uniquifier_added_later(self):
+    uniquifier = pgpath.StringUniquifier(["one"])
+    
+    uniquifier.add(uniquifier.uniquify("one"))
+    uniquifier.add("one (2)")
+    uniquifier.add("one (4)")
+    
+    self.assertEqual(uniquifier.uniquify("one"), "one (3)")
+    uniquifier.add("one (3)")
+    self.assertEqual(uniquifier.uniquify("one"), "one (5)")
+  
+  def test_uniquify_with_custom_uniquifier_position(self):
+    uniquifier = pgpath.StringUniquifier(["one.png", "one (1).png"])
+    
+    self.assertEqual(uniquifier.uniquify("one.png", len("one")), "one (2).png")
+    self.assertEqual(uniquifier.uniquify("one.png"), "one.png (1)")
+  
+  def test_uniquify_gives_same_results_as_uniquify_string(self):
+    strings = ["one", "one (2)", "one", "two", "one (1)", "one", "one (2)", "one"]
+    
+    existing_strings = set()
+    uniquifier = pgpath.StringUniquifier()
+    
+    for str_ in strings:
+      expected_str = pgpath.uniquify_string(str_, existing_strings)
+      existing_strings.add(expected_str)
+      
+      uniq_str = uniquifier.uniquify(str_)
+      uniquifier.add(uniq_str)
+      
+      self.assertEqual(uniq_str, expected_str)
+    
+    self.assertEqual(len(uniquifier), len(strings))
+
+
+@mock.patch(pgconstants.PYGIMPLIB_MODULE_PATH + ".path.fileindex.os.listdir")
+class TestFileIndex(unittest.TestCase):
+  
+  def setUp(self):
+    self.file_index = pgpath.FileIndex()
+    self.dirpath = os.path.abspath(os.path.join("test", "images"))
+  
+  def test_exists(self, mock_os_listdir):
+    mock_os_listdir.return_value = ["image.png", "subdir"]
+    
+    self.assertTrue(self.file_index.exists(os.path.join(self.dirpath, "image.png")))
+    self.assertTrue(self.file_index.exists(os.path.join(self.dirpath, "subdir")))
+    self.assertFalse(self.file_index.exists(os.path.join(self.dirpath, "image.jpg")))
+    
+    self.assertEqual(mock_os_listdir.call_count, 1)
+  
+  def test_exists_directory_does_not_exist(self, mock_os_listdir):
+    mock_os_listdir.side_effect = OSError(errno.ENOENT, "No such file or directory")
+    
+    self.assertFalse(self.file_index.exists(os.path.join(self.dirpath, "image.png")))
+    self.assertFalse(self.file_index.exists(os.path.join(self.dirpath, "image.jpg")))
+    
+    self.assertEqual(mock_os_listdir.call_count, 1)
+  
+  @mock.patch(pgconstants.PYGIMPLIB_MODULE_PATH + ".path.fileindex.os.path.exists")
+  def test_exists_directory_cannot_be_listed(self, mock_os_path_exists, mock_os_listdir):
+    mock_os_listdir.side_effect = OSError(errno.EACCES, "Permission denied")
+    mock_os_path_exists.return_value = True
+    
+    self.assertTrue(self.file_index.exists(os.path.join(self.dirpath, "image.png")))
+    self.assertEqual(mock_os_path_exists.call_count, 1)
+  
+  @mock.patch(pgconstants.PYGIMPLIB_MODULE_PATH + ".path.fileindex.os.path.exists")
+  def test_exists_name_differing_only_in_case(
+        self, mock_os_path_exists, mock_os_listdir):
+    mock_os_listdir.return_value = ["Image.png"]
+    mock_os_path_exists.return_value = True
+    
+    self.assertTrue(self.file_index.exists(os.path.join(self.dirpath, "IMAGE.png")))
+    self.assertEqual(mock_os_path_exists.call_count, 1)
+    
+    mock_os_path_exists.return_value = False
+    
+    self.assertFalse(self.file_index.exists(os.path.join(self.dirpath, "IMAGE.png")))
+    self.assertFalse(self.file_index.exists(os.path.join(self.dirpath, "image.jpg")))
+    self.assertEqual(mock_os_path_exists.call_count, 2)
+    
+    self.file_index.remove(os.path.join(self.dirpath, "Image.png"))
+    
+    self.assertFalse(self.file_index.exists(os.path.join(self.dirpath, "IMAGE.png")))
+    self.assertEqual(mock_os_path_exists.call_count, 2)
+  
+  def test_add(self, mock_os_listdir):
+    mock_os_listdir.side_effect = [["images"], []]
+    
+    self.assertTrue(self.file_index.exists(self.dirpath))
+    self.assertFalse(self.file_index.exists(os.path.join(self.dirpath, "image.png")))
+    self.assertFalse(self.file_index.exists(os.path.join(self.dirpath, "subdir")))
+    
+    self.file_index.add(os.path.join(self.dirpath, "subdir", "image.png"))
+    
+    self.assertTrue(self.file_index.exists(os.path.join(self.dirpath, "subdir")))
+    self.assertFalse(self.file_index.exists(os.path.join(self.dirpath, "image.png")))
+    
+    self.file_index.add(os.path.join(self.dirpath, "image.png"))
+    
+    self.assertTrue(self.file_index.exists(os.path.join(self.dirpath, "image.png")))
+  
+  def test_remove(self, mock_os_listdir):
+    mock_os_listdir.return_value = ["image.png"]
+    
+    self.file_index.remove(os.path.join(self.dirpath, "image.png"))
+    self.assertTrue(self.file_index.exists(os.path.join(self.dirpath, "image.png")))
+    
+    self.file_index.remove(os.path.join(self.dirpath, "image.png"))
+    self.assertFalse(self.file_index.exists(os.path.join(self.dirpath, "image.png")))
+  
+  def test_uniquify_filepath(self, mock_os_listdir):
+    mock_os_listdir.return_value = ["image.png", "image (1).png"]
+    
+    filepath = os.path.join(self.dirpath, "image.png")
+    
+    self.assertEqual(
+      pgpath.uniquify_filepath(
+        filepath, len(filepath) - len(".png"), file_index=self.file_index),
+      os.path.join(self.dirpath, "image (2).png"))
+    self.assertEqual(mock_os_listdir.call_count, 1)
+
+
 def _get_field_value(field, arg1=1, arg2=2):
   return "{}{}".format(arg1, arg2)
 
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2019 khalim19
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module tests the `pdbutils` module.
+
+These tests require GIMP to be running.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+import unittest
+
+import mock
+
+import gimp
+from gimp import pdb
+import gimpenums
+
+from .. import constants as pgconstants
+from .. import pdbutils as pgpdbutils
+
+
+class TestMergeLayerGroup(unittest.TestCase):
+  """
+  Test that merging a layer group in a scratch image, used for images with many
+  top-level layers, produces the same result as merging the layer group in
+  place.
+  """
+  
+  NUM_TOP_LEVEL_LAYERS = pgpdbutils._MAX_NUM_TOP_LEVEL_LAYERS_FOR_IN_PLACE_MERGE + 3
+  
+  def setUp(self):
+    pdb.gimp_context_push()
+    
+    self.image = self._create_image()
+    self.images_to_delete = [self.image]
+  
+  def tearDown(self):
+    for image in self.images_to_delete:
+      pdb.gimp_image_delete(image)
+    
+    pdb.gimp_context_pop()
+  
+  def test_merge_top_level_layer_group(self):
+    self._test_merge_layer_group(self.image, "Group")
+  
+  def test_merge_nested_layer_group(self):
+    self._test_merge_layer_group(self.image, "Nested group")
+  
+  def test_merge_hidden_layer_group(self):
+    pdb.gimp_image_get_layer_by_name(self.image, "Group").visible = False
+    
+    self._test_merge_layer_group(self.image, "Group")
+  
+  def test_merge_layer_group_in_indexed_image(self):
+    pdb.gimp_image_convert_indexed(
+      self.image, gimpenums.NO_DITHER, gimpenums.MAKE_PALETTE, 16, False, False, "")
+    
+    self._test_merge_layer_group(self.image, "Group")
+  
+  @unittest.skipUnless(gimp.version >= (2, 10), "precision requires GIMP 2.10")
+  def test_merge_layer_group_in_image_with_non_default_precision(self):
+    pdb.gimp_image_convert_precision(self.image, gimpenums.PRECISION_U16_GAMMA)
+    
+    self._test_merge_layer_group(self.image, "Group")
+  
+  def _test_merge_layer_group(self, image, layer_group_name):
+    image_in_place = pdb.gimp_image_duplicate(image)
+    self.images_to_delete.append(image_in_place)
+    
+    image_scratch = pdb.gimp_image_duplicate(image)
+    self.images_to_delete.append(image_scratch)
+    
+    layer_group_in_place = pdb.gimp_image_get_layer_by_name(
+      image_in_place, layer_group_name)
+    parent_name_in_place = self._get_parent_name(layer_group_in_place)
+    merged_layer_in_place = pgpdbutils._merge_layer_group_in_place(
+      image_in_place, layer_group_in_place)
+    
+    layer_group_scratch = pdb.gimp_image_get_layer_by_name(
+      image_scratch, layer_group_name)
+    parent_name_scratch = self._get_parent_name(layer_group_scratch)
+    visible_scratch = layer_group_scratch.visible
+    
+    with mock.patch(
+           pgconstants.PYGIMPLIB_MODULE_PATH
+           + ".pdbutils._merge_layer_group_in_scratch_image",
+           wraps=pgpdbutils._merge_layer_group_in_scratch_image
+         ) as merge_in_scratch_mock:
+      merged_layer_scratch = pgpdbutils.merge_layer_group(layer_group_scratch)
+    
+    self.assertTrue(merge_in_scratch_mock.called)
+    
+    self.assertTrue(
+      pgpdbutils.compare_layers([merged_layer_in_place, merged_layer_scratch]))
+    
+    self.assertEqual(merged_layer_scratch.offsets, merged_layer_in_place.offsets)
+    self.assertEqual(merged_layer_scratch.width, merged_layer_in_place.width)
+    self.assertEqual(merged_layer_scratch.height, merged_layer_in_place.height)
+    self.assertEqual(merged_layer_scratch.name, merged_layer_in_place.name)
+    self.assertEqual(merged_layer_scratch.visible, merged_layer_in_place.visible)
+    self.assertEqual(merged_layer_scratch.visible, visible_scratch)
+    self.assertEqual(self._get_parent_name(merged_layer_scratch), parent_name_scratch)
+    self.assertEqual(
+      self._get_parent_name(merged_layer_in_place), parent_name_in_place)
+    self.assertEqual(
+      pdb.gimp_image_get_item_position(image_scratch, merged_layer_scratch),
+      pdb.gimp_image_get_item_position(image_in_place, merged_layer_in_place))
+  
+  @staticmethod
+  def _get_parent_name(layer):
+    return layer.parent.name if layer.parent is not None else None
+  
+  @classmethod
+  def _create_image(cls):
+    image = pdb.gimp_image_new(40, 30, gimpenums.RGB)
+    
+    for i in range(cls.NUM_TOP_LEVEL_LAYERS):
+      cls._insert_layer(
+        image, None, len(image.layers), "Layer {}".format(i),
+        (i * 3, i * 2), (i * 30 % 256, 100, 200))
+    
+    layer_group = cls._insert_layer_group(image, None, 3, "Group")
+    layer_group.opacity = 60.0
+    layer_group.mode = gimpenums.MULTIPLY_MODE
+    
+    cls._insert_layer(
+      image, layer_group, 0, "Group layer 1", (12, 9), (250, 40, 40), opacity=75.0)
+    
+    nested_layer_group = cls._insert_layer_group(image, layer_group, 1, "Nested group")
+    nested_layer_group.mode = gimpenums.SCREEN_MODE
+    
+    cls._insert_layer(
+      image, nested_layer_group, 0, "Nested layer 1", (20, 4), (0, 90, 0))
+    cls._insert_layer(
+      image, nested_layer_group, 1, "Nested layer 2", (16, 14), (30, 30, 220),
+      opacity=50.0)
+    
+    cls._insert_layer(image, layer_group, 2, "Group layer 2", (6, 15), (255, 220, 0))
+    
+    # Hidden layers inside the layer group must be ignored by both merge methods.
+    hidden_layer = cls._insert_layer(
+      image, layer_group, 3, "Hidden layer", (0, 0), (255, 255, 255))
+    hidden_layer.visible = False
+    
+    return image
+  
+  @staticmethod
+  def _insert_layer(image, parent, position, name, offsets, color, opacity=100.0):
+    layer = pdb.gimp_layer_new(
+      image, 12, 10, gimpenums.RGBA_IMAGE, name, opacity, gimpenums.NORMAL_MODE)
+    pdb.gimp_image_insert_layer(image, layer, parent, position)
+    pdb.gimp_layer_set_offsets(layer, *offsets)
+    
+    pdb.gimp_context_set_foreground(color)
+    pdb.gimp_drawable_fill(layer, gimpenums.FOREGROUND_FILL)
+    
+    return layer
+  
+  @staticmethod
+  def _insert_layer_group(image, parent, position, name):
+    layer_group = pdb.gimp_layer_group_new(image)
+    pdb.gimp_image_insert_layer(image, layer_group, parent, position)
+    layer_group.name = name
+    
+    return layer_group
+
+
+@mock.patch(pgconstants.PYGIMPLIB_MODULE_PATH + ".pdbutils.pdb")
+class TestMergeLayerGroupVisibility(unittest.TestCase):
+  """
+  Test that both methods of merging a layer group preserve the visibility of the
+  layer group without requiring GIMP to be running.
+  """
+  
+  def setUp(self):
+    self.layer_group = mock.Mock(visible=False, parent=None)
+    self.image = mock.Mock(
+      layers=[mock.Mock(visible=True), self.layer_group], base_type=gimpenums.RGB)
+    self.layer_group.image = self.image
+  
+  def test_merge_hidden_layer_group_in_place(self, pdb_mock):
+    merged_layer_group = mock.Mock(visible=True)
+    pdb_mock.gimp_image_merge_visible_layers.return_value = merged_layer_group
+    
+    self.assertIs(
+      pgpdbutils._merge_layer_group_in_place(self.image, self.layer_group),
+      merged_layer_group)
+    self.assertFalse(merged_layer_group.visible)
+    self.assertTrue(self.image.layers[0].visible)
+  
+  def test_merge_hidden_layer_group_in_scratch_image(self, pdb_mock):
+    merged_layer_group = mock.Mock(visible=True)
+    pdb_mock.gimp_layer_new_from_drawable.side_effect = [
+      mock.Mock(visible=False), merged_layer_group]
+    pdb_mock.gimp_image_get_precision.return_value = 0
+    pdb_mock.gimp_image_get_color_profile.return_value = (0, [])
+    
+    self.assertIs(
+      pgpdbutils._merge_layer_group_in_scratch_image(self.image, self.layer_group),
+      merged_layer_group)
+    self.assertFalse(merged_layer_group.visible)
@@ -77,3 +77,35 @@ class TestGetCurrentModuleFilepath(unittest.TestCase):
     self.assertEqual(
       pgutils.get_current_module_filepath(),
       inspect.getfile(inspect.currentframe()))
+
+
+class TestGetArgspec(unittest.TestCase):
+  
+  def test_get_argspec(self):
+    def func(arg1, arg2, arg3=None):
+      pass
+    
+    self.assertEqual(pgutils.get_argspec(func), inspect.getargspec(func))
+    self.assertIs(pgutils.get_argspec(func), pgutils.get_argspec(func))
+  
+  def test_get_argspec_closures_with_different_signatures(self):
+    def create_func(with_arg):
+      if with_arg:
+        def _func(arg):
+          pass
+      else:
+        def _func():
+          pass
+      
+      return _func
+    
+    self.assertListEqual(pgutils.get_argspec(create_func(True)).args, ["arg"])
+    self.assertListEqual(pgutils.get_argspec(create_func(False)).args, [])
+  
+  def test_get_argspec_bound_method(self):
+    class Foo(object):
+      def bar(self, arg):
+        pass
+    
+    self.assertListEqual(pgutils.get_argspec(Foo().bar).args, ["self", "arg"])
+    self.assertIs(pgutils.get_argspec(Foo().bar), pgutils.get_argspec(Foo().bar))
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014-2019 khalim19
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module provides utility functions for benchmarks.
+
+Benchmarks are modules starting with the `"bench_"` prefix. Unlike tests, they
+are not executed by default. To run benchmarks, pass `"bench_"` as the prefix
+of test modules to `plug_in_run_tests`.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+import sys
+import timeit
+
+
+def measure(func, *args, **kwargs):
+  """
+  Execute `func` with the specified arguments and keyword arguments several
+  times and return the shortest elapsed time in seconds.
+  
+  The number of executions can be adjusted by passing the `repeat` keyword
+  argument (defaults to 3). `repeat` is not passed to `func`.
+  """
+  repeat = kwargs.pop("repeat", 3)
+  
+  elapsed_times = []
+  
+  for unused_ in range(repeat):
+    start_time = timeit.default_timer()
+    func(*args, **kwargs)
+    elapsed_times.append(timeit.default_timer() - start_time)
+  
+  return min(elapsed_times)
+
+
+def print_results(title, results, stream=sys.stderr):
+  """
+  Print benchmark results to the specified stream.
+  
+  `results` is a list of (label, elapsed time in seconds) tuples.
+  """
+  stream.write("\n{}\n".format(title))
+  for label, elapsed_time in results:
+    stream.write("  {}: {:.6f} s\n".format(label, elapsed_time))
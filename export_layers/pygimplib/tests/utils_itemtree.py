@@ -22,6 +22,8 @@ This module provides various utility functions and classes for the
 from __future__ import absolute_import, division, print_function, unicode_literals
 from future.builtins import *
 
+import collections
+
 from . import stubs_gimp
 
 
@@ -63,3 +65,39 @@ def parse_layers(layer_tree_string):
       layer.parent = current_parent
   
   return image
+
+
+def create_image_with_layers(num_layers, num_children_per_group=10, layer_name=None):
+  """
+  Return an image containing the specified number of layers and layer groups in
+  total.
+  
+  The items form a balanced tree where each layer group contains at most
+  `num_children_per_group` children. The depth of the tree thus grows
+  logarithmically with the number of items.
+  
+  If `layer_name` is not `None`, all layers (except layer groups) are given
+  the same name.
+  """
+  image = stubs_gimp.ImageStub()
+  
+  num_groups = num_layers // num_children_per_group
+  parents = collections.deque([image])
+  
+  for i in range(num_layers):
+    parent = parents[0]
+    
+    if i < num_groups:
+      layer = stubs_gimp.LayerGroupStub("group {}".format(i))
+      parents.append(layer)
+    else:
+      layer = stubs_gimp.LayerStub(
+        layer_name if layer_name is not None else "layer {}".format(i))
+    
+    parent.layers.append(layer)
+    layer.parent = parent
+    
+    if len(parent.layers) >= num_children_per_group:
+      parents.popleft()
+  
+  return image
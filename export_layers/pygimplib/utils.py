@@ -23,6 +23,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 from future.builtins import *
 
 import inspect
+import weakref
 
 
 class EmptyContext(object):
@@ -85,6 +86,30 @@ def is_bound_method(func):
   return hasattr(func, "__self__") and func.__self__ is not None
 
 
+def get_argspec(func):
+  """
+  Return the argument specification of `func` as returned by
+  `inspect.getargspec()`.
+  
+  The specification is cached for each function, so that `func` is inspected
+  only once. Functions are not kept alive by the cache, hence the cache can be
+  used for short-lived functions such as closures. Bound methods share the
+  cache entry with their underlying function.
+  """
+  function = getattr(func, "__func__", func)
+  
+  try:
+    return _argspecs[function]
+  except KeyError:
+    argspec = inspect.getargspec(func)
+    _argspecs[function] = argspec
+    return argspec
+
+
+# key: function; value: argument specification of the function
+_argspecs = weakref.WeakKeyDictionary()
+
+
 def stringify_object(object_, name):
   """
   Return a string representation of the specified object, using the specified
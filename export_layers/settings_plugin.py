@@ -136,6 +136,93 @@ def create_settings():
          pg.overwrite.OverwriteModes.RENAME_EXISTING)],
       "display_name": _("Overwrite mode (non-interactive run mode only)"),
     },
+    {
+      "type": pg.SettingTypes.boolean,
+      "name": "skip_unchanged_layers",
+      "default_value": False,
+      "display_name": _("Skip layers unchanged since last export"),
+      "description": _(
+        "Skip layers whose output files are up to date. Files from a previous "
+        "export that were not modified since are replaced without asking if "
+        "the overwrite mode is \"Replace\" or if the overwrite mode is chosen "
+        "interactively for each file; other overwrite modes are respected"),
+      "gui_type": None,
+    },
+    {
+      "type": pg.SettingTypes.string,
+      "name": "output_archive",
+      "default_value": "",
+      "display_name": _("Output archive"),
+      "description": _(
+        "ZIP or TAR archive to save exported layers to instead of the output "
+        "directory, replacing an existing archive (empty string = save layers "
+        "to the output directory)"),
+      "gui_type": None,
+    },
+    {
+      "type": pg.SettingTypes.integer,
+      "name": "atlas_max_sheet_size",
+      "default_value": 0,
+      "min_value": 0,
+      "display_name": _("Maximum atlas sheet size"),
+      "description": _(
+        "Maximum width and height of texture atlas sheets to pack exported layers "
+        "into (0 = export layers as separate files)"),
+      "gui_type": None,
+    },
+    {
+      "type": pg.SettingTypes.array,
+      "name": "output_scales",
+      "element_type": pg.SettingTypes.float,
+      "element_default_value": 1.0,
+      "element_min_value": 0.0,
+      "default_value": (),
+      "display_name": _("Output scales"),
+      "description": _(
+        "Scales to export each layer at (no scales = export layers at their "
+        "original size only)"),
+    },
+    {
+      "type": pg.SettingTypes.array,
+      "name": "output_scale_filename_suffixes",
+      "element_type": pg.SettingTypes.string,
+      "element_default_value": "",
+      "default_value": (),
+      "display_name": _("Output scale file name suffixes"),
+      "description": _(
+        "Suffixes appended to file names of layers exported at the output scale "
+        "with the same index (missing suffix = no suffix)"),
+    },
+    {
+      "type": pg.SettingTypes.array,
+      "name": "output_scale_subdirectories",
+      "element_type": pg.SettingTypes.string,
+      "element_default_value": "",
+      "default_value": (),
+      "display_name": _("Output scale subdirectories"),
+      "description": _(
+        "Subdirectories of the output directory to save layers exported at the "
+        "output scale with the same index to (missing subdirectory = output "
+        "directory)"),
+    },
+    {
+      "type": pg.SettingTypes.array,
+      "name": "additional_file_extensions",
+      "element_type": pg.SettingTypes.file_extension,
+      "element_default_value": "png",
+      "default_value": (),
+      "display_name": _("Additional file extensions"),
+      "description": _("File extensions to additionally export each layer in"),
+    },
+    {
+      "type": pg.SettingTypes.generic,
+      "name": "save_procedure_capabilities",
+      # Capabilities of file save procedures determined from failed exports,
+      # see `pygimplib.fileformats.SaveProcedureCapabilities`.
+      "default_value": {},
+      "pdb_type": None,
+      "gui_type": None,
+    },
     {
       "type": pg.SettingTypes.generic,
       "name": "available_tags",
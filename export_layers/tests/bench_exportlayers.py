@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Export Layers.
+#
+# Copyright (C) 2013-2019 khalim19 <khalim19@gmail.com>
+#
+# Export Layers is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Export Layers is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Export Layers.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+This module benchmarks the `exportlayers` module.
+"""
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+import unittest
+
+import mock
+
+import gimpenums
+
+from export_layers import pygimplib as pg
+
+from export_layers.pygimplib.tests import stubs_gimp
+from export_layers.pygimplib.tests import utils_benchmark
+
+from .. import exportlayers
+from .. import operations
+from .. import placeholders
+
+
+def _get_operation_func_with_wrapper_chain(pdb_procedure, setting_enabled):
+  """
+  Return a function executing the PDB procedure as an operation through a chain
+  of wrappers, which is how `exportlayers.add_operation_from_settings()` created
+  operations before the wrappers were flattened. Used as a baseline for
+  comparison.
+  """
+  def _pdb_procedure_as_operation(image, layer, layer_exporter, *args, **kwargs):
+    pdb_procedure(*args, **kwargs)
+  
+  def _operation(image, layer, layer_exporter, *args, **kwargs):
+    new_args, new_kwargs = placeholders.get_replaced_args_and_kwargs(
+      args, kwargs, image, layer, layer_exporter)
+    _pdb_procedure_as_operation(image, layer, layer_exporter, *new_args, **new_kwargs)
+  
+  def _execute_operation(*operation_args, **operation_kwargs):
+    if setting_enabled.value:
+      return _operation(*operation_args, **operation_kwargs)
+    else:
+      return False
+  
+  return _execute_operation
+
+
+class BenchmarkAddOperationFromSettings(unittest.TestCase):
+  
+  NUM_LAYERS = 1000
+  NUM_OPERATIONS = 20
+  NUM_DISABLED_OPERATIONS = 5
+  
+  def setUp(self):
+    self.pdb_procedure = stubs_gimp.PdbProcedureStub(
+      name="plug-in-stub",
+      type_=gimpenums.PLUGIN,
+      params=(
+        (gimpenums.PDB_INT32, "run-mode", "The run mode"),
+        (gimpenums.PDB_IMAGE, "image", "Input image"),
+        (gimpenums.PDB_DRAWABLE, "drawable", "Input drawable"),
+        (gimpenums.PDB_INT32, "amount", "Amount")))
+    
+    self.procedures = operations.create("procedures")
+    
+    for i in range(self.NUM_OPERATIONS):
+      procedure = operations.add(self.procedures, self.pdb_procedure)
+      procedure["enabled"].set_value(i >= self.NUM_DISABLED_OPERATIONS)
+    
+    self.image = stubs_gimp.ImageStub()
+    self.layers = [stubs_gimp.LayerStub() for unused_ in range(self.NUM_LAYERS)]
+  
+  def test_execute_pdb_procedures_for_layers(self):
+    executor_with_wrapper_chain = pg.operations.OperationExecutor()
+    
+    for procedure in operations.walk(self.procedures):
+      function_args = tuple(arg_setting.value for arg_setting in procedure["arguments"])
+      executor_with_wrapper_chain.add(
+        _get_operation_func_with_wrapper_chain(self.pdb_procedure, procedure["enabled"]),
+        procedure["operation_groups"].value,
+        function_args[1:],
+        {b"run_mode": function_args[0]})
+    
+    executor = pg.operations.OperationExecutor()
+    
+    with mock.patch("export_layers.exportlayers.pdb") as pdb_mock:
+      pdb_mock.__getitem__.return_value = self.pdb_procedure
+      
+      for procedure in operations.walk(self.procedures):
+        exportlayers.add_operation_from_settings(procedure, executor)
+    
+    def _execute_for_all_layers(executor):
+      execute_operations = executor.compile(
+        [operations.DEFAULT_PROCEDURES_GROUP], additional_args_position=0)
+      
+      for layer in self.layers:
+        execute_operations([self.image, layer, None])
+    
+    elapsed_time_with_wrapper_chain = utils_benchmark.measure(
+      _execute_for_all_layers, executor_with_wrapper_chain)
+    elapsed_time = utils_benchmark.measure(_execute_for_all_layers, executor)
+    
+    utils_benchmark.print_results(
+      "Operations from settings - {} PDB procedures ({} disabled), {} layers".format(
+        self.NUM_OPERATIONS, self.NUM_DISABLED_OPERATIONS, self.NUM_LAYERS),
+      [("wrapper chain", elapsed_time_with_wrapper_chain),
+       ("add_operation_from_settings()", elapsed_time)])
+    
+    self.assertLess(elapsed_time, elapsed_time_with_wrapper_chain)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Export Layers.
+#
+# Copyright (C) 2013-2019 khalim19 <khalim19@gmail.com>
+#
+# Export Layers is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Export Layers is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Export Layers.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+import itertools
+import unittest
+
+from .. import atlas
+
+
+class TestPackRectangles(unittest.TestCase):
+  
+  def test_pack_rectangles(self):
+    sizes = [(10, 5), (20, 10), (10, 10), (30, 5)]
+    
+    positions, sheet_sizes = atlas.pack_rectangles(sizes, 40, 40)
+    
+    self.assertEqual(positions, [(0, 30, 0), (0, 0, 0), (0, 20, 0), (0, 0, 10)])
+    self.assertEqual(sheet_sizes, [(40, 15)])
+  
+  def test_pack_rectangles_into_multiple_sheets(self):
+    sizes = [(20, 20)] * 5
+    
+    positions, sheet_sizes = atlas.pack_rectangles(sizes, 40, 40)
+    
+    self.assertEqual([position[0] for position in positions], [0, 0, 0, 0, 1])
+    self.assertEqual(sheet_sizes, [(40, 40), (20, 20)])
+  
+  def test_pack_rectangles_do_not_overlap(self):
+    sizes = list(itertools.product(range(1, 12, 3), repeat=2))
+    
+    positions, sheet_sizes = atlas.pack_rectangles(sizes, 16, 16)
+    
+    for (index1, position1), (index2, position2) in itertools.combinations(
+          enumerate(positions), 2):
+      if position1[0] != position2[0]:
+        continue
+      
+      self.assertFalse(
+        position1[1] < position2[1] + sizes[index2][0]
+        and position2[1] < position1[1] + sizes[index1][0]
+        and position1[2] < position2[2] + sizes[index2][1]
+        and position2[2] < position1[2] + sizes[index1][1])
+    
+    for position, size in zip(positions, sizes):
+      sheet_width, sheet_height = sheet_sizes[position[0]]
+      self.assertLessEqual(position[1] + size[0], sheet_width)
+      self.assertLessEqual(position[2] + size[1], sheet_height)
+  
+  def test_pack_rectangles_larger_than_sheet(self):
+    with self.assertRaises(ValueError):
+      atlas.pack_rectangles([(10, 10), (50, 10)], 40, 40)
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Export Layers.
+#
+# Copyright (C) 2013-2019 khalim19 <khalim19@gmail.com>
+#
+# Export Layers is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Export Layers is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Export Layers.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *
+
+import unittest
+
+import mock
+
+import gimpenums
+
+from .. import builtin_procedures
+
+
+class _ItemStub(object):
+  
+  def __init__(self, id_, mode=gimpenums.NORMAL_MODE):
+    self.ID = id_
+    self._visible = True
+    self.opacity = 100.0
+    self.mode = mode
+    
+    self.num_visible_reads = 0
+  
+  @property
+  def visible(self):
+    self.num_visible_reads += 1
+    return self._visible
+  
+  @visible.setter
+  def visible(self, value):
+    self._visible = value
+
+
+class _ItemElemStub(object):
+  
+  def __init__(self, item, children=None):
+    self.item = item
+    self._orig_children = children
+  
+  @property
+  def orig_children(self):
+    return iter(self._orig_children) if self._orig_children is not None else None
+
+
+@mock.patch("export_layers.builtin_procedures.pdb")
+class TestLayerGroupComposites(unittest.TestCase):
+  
+  def setUp(self):
+    # Group
+    #   Layer
+    #   Child group
+    #     Nested group
+    #       Nested layer
+    self.items = {
+      name: _ItemStub(id_) for id_, name in enumerate(
+        ["Group", "Layer", "Child group", "Nested group", "Nested layer"])}
+    
+    item_elems = {
+      name: _ItemElemStub(item, children=[] if "group" in name.lower() else None)
+      for name, item in self.items.items()}
+    
+    item_elems["Group"]._orig_children = [item_elems["Layer"], item_elems["Child group"]]
+    item_elems["Child group"]._orig_children = [item_elems["Nested group"]]
+    item_elems["Nested group"]._orig_children = [item_elems["Nested layer"]]
+    
+    self.layer_tree = {
+      item_elem.item.ID: item_elem for item_elem in item_elems.values()}
+    self.item_elems = item_elems
+    
+    self.layer_group_composites = builtin_procedures.LayerGroupComposites(
+      self.layer_tree)
+  
+  def test_copy_and_insert_layer_reuses_cached_composite(self, pdb_mock):
+    pdb_mock.gimp_item_is_group.return_value = True
+    composite = mock.Mock()
+    
+    self.layer_group_composites.add(self.items["Group"], composite)
+    
+    with mock.patch(
+           "export_layers.builtin_procedures.pg.pdbutils.merge_layer_group"
+         ) as merge_layer_group_mock:
+      layer_copy = builtin_procedures.copy_and_insert_layer(
+        mock.Mock(), self.items["Group"], None, 0, self.layer_group_composites)
+    
+    self.assertFalse(merge_layer_group_mock.called)
+    self.assertEqual(layer_copy, pdb_mock.gimp_layer_new_from_drawable.return_value)
+    self.assertEqual(
+      pdb_mock.gimp_layer_new_from_drawable.call_args[0][0], composite)
+  
+  def test_composite_is_not_reused_after_child_changes(self, pdb_mock):
+    self.layer_group_composites.add(self.items["Group"], mock.Mock())
+    
+    self.items["Nested layer"].visible = False
+    
+    layer_group_composites_after_change = builtin_procedures.LayerGroupComposites(
+      self.layer_tree)
+    layer_group_composites_after_change._composites = (
+      self.layer_group_composites._composites)
+    
+    self.assertIsNone(layer_group_composites_after_change.get(self.items["Group"]))
+  
+  def test_item_attributes_are_read_once(self, pdb_mock):
+    for name in ["Group", "Child group", "Nested group"]:
+      self.layer_group_composites.add(self.items[name], mock.Mock())
+      self.assertIsNotNone(self.layer_group_composites.get(self.items[name]))
+    
+    for name in ["Layer", "Child group", "Nested group", "Nested layer"]:
+      self.assertEqual(self.items[name].num_visible_reads, 1)
+  
+  def test_delete(self, pdb_mock):
+    composites = [mock.Mock(), mock.Mock()]
+    self.layer_group_composites.add(self.items["Group"], composites[0])
+    self.layer_group_composites.add(self.items["Child group"], composites[1])
+    
+    self.layer_group_composites.delete()
+    
+    self.assertEqual(len(self.layer_group_composites), 0)
+    self.assertItemsEqual(
+      [call_args[0][0] for call_args in pdb_mock.gimp_item_delete.call_args_list],
+      composites)
+  
+  def test_is_composite_reusable(self, pdb_mock):
+    self.assertTrue(
+      self.layer_group_composites.is_composite_reusable(self.item_elems["Child group"]))
+    self.assertFalse(
+      self.layer_group_composites.is_composite_reusable(self.item_elems["Layer"]))
+  
+  def test_is_composite_reusable_with_non_normal_mode(self, pdb_mock):
+    self.items["Child group"].mode = gimpenums.MULTIPLY_MODE
+    
+    self.assertFalse(
+      self.layer_group_composites.is_composite_reusable(self.item_elems["Child group"]))
+  
+  @mock.patch("export_layers.builtin_procedures._PASS_THROUGH_LAYER_MODE", new=61)
+  def test_is_composite_reusable_with_pass_through_mode(self, pdb_mock):
+    self.items["Child group"].mode = 61
+    
+    self.assertTrue(
+      self.layer_group_composites.is_composite_reusable(self.item_elems["Child group"]))
+    
+    self.items["Nested group"].mode = gimpenums.MULTIPLY_MODE
+    
+    self.assertFalse(
+      builtin_procedures.LayerGroupComposites(self.layer_tree).is_composite_reusable(
+        self.item_elems["Child group"]))
@@ -20,8 +20,15 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 from future.builtins import *
 
-import mock
+import io
+import os
+import shutil
+import tarfile
+import tempfile
 import unittest
+import zipfile
+
+import mock
 
 from gimp import pdb
 import gimpenums
@@ -110,6 +117,71 @@ class TestAddOperationFromSettings(unittest.TestCase):
     self.assertEqual(added_operation_items[0][1], ("background",))
     self.assertEqual(added_operation_items[0][2], {})
   
+  def test_add_operation_from_settings_disabled_operation_is_not_added(self):
+    procedure = operations.add(
+      self.procedures, builtin_procedures.BUILTIN_PROCEDURES["insert_background_layers"])
+    procedure["enabled"].set_value(False)
+    
+    self.assertIsNone(exportlayers.add_operation_from_settings(procedure, self.executor))
+    self.assertFalse(
+      self.executor.list_operations(group=operations.DEFAULT_PROCEDURES_GROUP))
+  
+  def test_add_operation_from_settings_discards_return_value(self):
+    function = mock.Mock(return_value=False)
+    procedure = operations.add(
+      self.procedures,
+      {"name": "return_false", "type": "procedure", "function": function,
+       "display_name": "Return false"})
+    
+    exportlayers.add_operation_from_settings(procedure, self.executor)
+    
+    operation_func = self.executor.list_operations(
+      group=operations.DEFAULT_PROCEDURES_GROUP)[0][0]
+    
+    self.assertIsNone(operation_func(None, None, None))
+    function.assert_called_once_with(None, None, None)
+  
+  def test_add_pdb_proc_as_operation_discards_return_value(self):
+    procedure = operations.add(self.procedures, self.procedure_stub)
+    
+    pdb_procedure_mock = mock.Mock(params=self.procedure_stub.params, return_value=0)
+    
+    with mock.patch("export_layers.exportlayers.pdb") as pdb_mock:
+      pdb_mock.__getitem__.return_value = pdb_procedure_mock
+      
+      exportlayers.add_operation_from_settings(procedure, self.executor)
+    
+    operation_func = self.executor.list_operations(
+      group=operations.DEFAULT_PROCEDURES_GROUP)[0][0]
+    
+    self.assertIsNone(operation_func(None, None, None))
+    self.assertTrue(pdb_procedure_mock.called)
+  
+  def test_add_pdb_proc_as_operation_replaces_placeholders(self):
+    self.procedure_stub.params = (
+      (gimpenums.PDB_INT32, "run-mode", "The run mode"),
+      (gimpenums.PDB_IMAGE, "image", "Input image"),
+      (gimpenums.PDB_DRAWABLE, "drawable", "Input drawable"))
+    procedure = operations.add(self.procedures, self.procedure_stub)
+    
+    pdb_procedure_mock = mock.Mock(params=self.procedure_stub.params)
+    
+    with mock.patch("export_layers.exportlayers.pdb") as pdb_mock:
+      pdb_mock.__getitem__.return_value = pdb_procedure_mock
+      
+      exportlayers.add_operation_from_settings(procedure, self.executor)
+    
+    image = stubs_gimp.ImageStub()
+    layer = stubs_gimp.LayerStub()
+    
+    self.executor.execute(
+      [operations.DEFAULT_PROCEDURES_GROUP],
+      [image, layer, None],
+      additional_args_position=0)
+    
+    pdb_procedure_mock.assert_called_once_with(
+      image, layer, run_mode=gimpenums.RUN_NONINTERACTIVE)
+  
   def test_add_pdb_proc_as_operation_without_run_mode(self):
     self.procedure_stub.params = self.procedure_stub.params[1:]
     self._test_add_pdb_proc_as_operation(self.procedure_stub, ((), ""), {})
@@ -132,3 +204,680 @@ class TestAddOperationFromSettings(unittest.TestCase):
     self.assertEqual(len(added_operation_items), 1)
     self.assertEqual(added_operation_items[0][1], expected_args)
     self.assertDictEqual(added_operation_items[0][2], expected_kwargs)
+
+
+@mock.patch("export_layers.exportlayers.pdb")
+class TestMergeAndResizeLayer(unittest.TestCase):
+  
+  def setUp(self):
+    self.settings = settings_plugin.create_settings()
+    self.layer_exporter = exportlayers.LayerExporter(0, None, self.settings["main"])
+    
+    # Any attribute access on the image or the layers would be a PDB call.
+    self.image = mock.NonCallableMock(spec=[])
+    self.layer = mock.NonCallableMock(spec=[])
+    self.merged_layer = mock.NonCallableMock(spec=[])
+  
+  def test_default_procedures_require_merge_only(self, pdb_mock):
+    self._test_merge_and_resize_layer(pdb_mock, False)
+  
+  def test_layer_is_resized_without_use_layer_size(self, pdb_mock):
+    self.settings["main/procedures/added/use_layer_size/enabled"].set_value(False)
+    self._test_merge_and_resize_layer(pdb_mock, True)
+  
+  def test_layer_is_resized_if_tagged_layers_may_be_inserted(self, pdb_mock):
+    operations.add(
+      self.settings["main/procedures"],
+      builtin_procedures.BUILTIN_PROCEDURES["insert_background_layers"])
+    self._test_merge_and_resize_layer(pdb_mock, True)
+  
+  def test_layer_is_resized_if_initial_procedures_are_added(self, pdb_mock):
+    self.layer_exporter.add_procedure(
+      pg.utils.empty_func, [operations.DEFAULT_PROCEDURES_GROUP])
+    self._test_merge_and_resize_layer(pdb_mock, True)
+  
+  def test_layer_is_not_resized_if_inheriting_transparency_from_layer_groups(
+        self, pdb_mock):
+    operations.add(
+      self.settings["main/procedures"],
+      builtin_procedures.BUILTIN_PROCEDURES["inherit_transparency_from_layer_groups"])
+    self._test_merge_and_resize_layer(pdb_mock, False)
+  
+  def _test_merge_and_resize_layer(self, pdb_mock, is_resized):
+    pdb_mock.gimp_image_merge_visible_layers.return_value = self.merged_layer
+    self.layer_exporter._init_attributes(None, mock.Mock(), False)
+    pdb_mock.reset_mock()
+    
+    layer = self.layer_exporter._merge_and_resize_layer(self.image, self.layer)
+    
+    expected_calls = [
+      mock.call.gimp_image_merge_visible_layers(
+        self.image, gimpenums.EXPAND_AS_NECESSARY)]
+    if is_resized:
+      expected_calls.append(mock.call.gimp_layer_resize_to_image_size(self.merged_layer))
+    
+    self.assertIs(layer, self.merged_layer)
+    self.assertEqual(pdb_mock.mock_calls, expected_calls)
+
+
+class TestCleanup(unittest.TestCase):
+  
+  def setUp(self):
+    self.settings = settings_plugin.create_settings()
+    self.layer_exporter = exportlayers.LayerExporter(0, None, self.settings["main"])
+  
+  @mock.patch("export_layers.exportlayers.pg.pdbutils.try_delete_image")
+  @mock.patch("export_layers.builtin_procedures.pdb")
+  @mock.patch("export_layers.exportlayers.pdb")
+  def test_cleanup_deletes_layer_group_composites(
+        self, pdb_mock, builtin_procedures_pdb_mock, mock_try_delete_image):
+    pdb_mock.gimp_image_get_parasite_list.return_value = (0, [])
+    
+    layer_group = mock.Mock(ID=1)
+    composite = mock.Mock(ID=2)
+    layer_tree = {layer_group.ID: mock.Mock(item=layer_group, orig_children=[])}
+    
+    self.layer_exporter._init_attributes(None, layer_tree, False)
+    self.layer_exporter.layer_group_composites.add(layer_group, composite)
+    
+    self.assertEqual(len(self.layer_exporter.layer_group_composites), 1)
+    
+    with mock.patch.object(self.layer_exporter, "_save_save_procedure_capabilities"):
+      self.layer_exporter._cleanup()
+    
+    builtin_procedures_pdb_mock.gimp_item_delete.assert_called_once_with(composite)
+    self.assertEqual(len(self.layer_exporter.layer_group_composites), 0)
+  
+  @mock.patch("export_layers.exportlayers.pg.pdbutils.try_delete_image")
+  @mock.patch("export_layers.exportlayers.pdb")
+  def test_cleanup_saves_save_procedure_capabilities_only_without_exception(
+        self, pdb_mock, mock_try_delete_image):
+    pdb_mock.gimp_image_get_parasite_list.return_value = (0, [])
+    
+    self.layer_exporter._init_attributes(None, mock.Mock(), False)
+    
+    with mock.patch.object(
+           self.layer_exporter, "_save_save_procedure_capabilities"
+         ) as save_save_procedure_capabilities_mock:
+      self.layer_exporter._cleanup(exception_occurred=True)
+      
+      self.assertFalse(save_save_procedure_capabilities_mock.called)
+      
+      self.layer_exporter._cleanup()
+      
+      self.assertTrue(save_save_procedure_capabilities_mock.called)
+
+
+class TestSetup(unittest.TestCase):
+  
+  def setUp(self):
+    self.settings = settings_plugin.create_settings()
+    self.layer_exporter = exportlayers.LayerExporter(0, None, self.settings["main"])
+    
+    self.temp_dirpath = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.temp_dirpath)
+  
+  @mock.patch("export_layers.exportlayers.pg.pdbutils.create_image_from_metadata")
+  @mock.patch("export_layers.exportlayers.pdb")
+  def test_failure_to_open_archive_does_not_modify_gimp_state(
+        self, pdb_mock, mock_create_image_from_metadata):
+    self.settings["main/output_archive"].set_value(
+      os.path.join(self.temp_dirpath, "layers.rar"))
+    
+    self.layer_exporter._init_attributes(None, mock.Mock(), False)
+    
+    with self.assertRaises(exportlayers.InvalidOutputDirectoryError):
+      self.layer_exporter._setup()
+    
+    self.assertFalse(pdb_mock.gimp_context_push.called)
+    self.assertFalse(mock_create_image_from_metadata.called)
+
+
+class TestGetConstraintFunc(unittest.TestCase):
+  
+  def test_layer_exporter_arg_position_is_determined_once(self):
+    def _rule_func(layer_elem, layer_exporter):
+      return True
+    
+    layer_exporter = mock.Mock()
+    
+    with mock.patch(
+           "export_layers.exportlayers.pg.utils.get_argspec",
+           wraps=pg.utils.get_argspec) as get_argspec_mock:
+      constraint_func = exportlayers._get_constraint_func(_rule_func)
+      constraint_func(layer_exporter)
+      constraint_func(layer_exporter)
+    
+    self.assertEqual(get_argspec_mock.call_count, 1)
+    layer_exporter.layer_tree.filter.add_rule.assert_called_with(
+      _rule_func, layer_exporter)
+  
+  def test_constraint_func_without_layer_exporter_arg(self):
+    def _rule_func(layer_elem, file_extension):
+      return True
+    
+    layer_exporter = mock.Mock()
+    
+    constraint_func = exportlayers._get_constraint_func(_rule_func)
+    constraint_func("png", layer_exporter)
+    
+    layer_exporter.layer_tree.filter.add_rule.assert_called_once_with(
+      _rule_func, "png")
+
+
+class TestGetScaledOutputFilepath(unittest.TestCase):
+  
+  def setUp(self):
+    self.layer_exporter = exportlayers.LayerExporter(
+      0, None, settings_plugin.create_settings()["main"])
+    self.layer_exporter._output_directory = os.path.join("output", "dir")
+    self.layer_exporter._current_file_extension = "png"
+    
+    self.layer_elem = mock.Mock()
+    self.layer_elem.get_filepath.side_effect = (
+      lambda dirpath: os.path.join(dirpath, "group", "layer.png"))
+  
+  def test_with_filename_suffix(self):
+    self.assertEqual(
+      self.layer_exporter._get_scaled_output_filepath(self.layer_elem, "@2x", ""),
+      os.path.join("output", "dir", "group", "layer@2x.png"))
+  
+  def test_with_subdirectory(self):
+    self.assertEqual(
+      self.layer_exporter._get_scaled_output_filepath(self.layer_elem, "", "2x"),
+      os.path.join("output", "dir", "2x", "group", "layer.png"))
+
+
+class TestGetOutputScales(unittest.TestCase):
+  
+  def test_get_output_scales(self):
+    self.assertListEqual(
+      exportlayers._get_output_scales((1.0, 2.0, 0.5), ("", "@2x"), ("", "2x", "half")),
+      [(1.0, "", ""), (2.0, "@2x", "2x"), (0.5, "", "half")])
+
+
+class TestExportInAdditionalFileExtensions(unittest.TestCase):
+  
+  def setUp(self):
+    self.settings = settings_plugin.create_settings()
+    self.settings["main/additional_file_extensions"].set_value(["webp", "jpg"])
+    
+    self.layer_exporter = exportlayers.LayerExporter(0, None, self.settings["main"])
+    self.layer_exporter._init_attributes(None, mock.Mock(), False)
+    
+    self.layer_elem = mock.Mock()
+    self.layer_elem.name = "layer.png"
+  
+  def test_export_in_additional_file_extensions(self):
+    exported_names_and_file_extensions = []
+    
+    def _export(layer_elem, image, layer):
+      exported_names_and_file_extensions.append(
+        (layer_elem.name, self.layer_exporter._current_file_extension))
+      self.layer_exporter._current_layer_export_status = (
+        exportlayers.ExportStatuses.EXPORT_SUCCESSFUL)
+    
+    self.layer_elem.set_file_extension.side_effect = (
+      lambda file_extension, **kwargs: setattr(
+        self.layer_elem, "name", "layer." + file_extension))
+    self.layer_exporter._current_layer_export_status = (
+      exportlayers.ExportStatuses.SKIPPED_UNCHANGED)
+    
+    with mock.patch.object(self.layer_exporter, "_export_at_output_scales", _export):
+      self.layer_exporter._export_in_additional_file_extensions(
+        self.layer_elem, None, None)
+    
+    self.assertEqual(
+      exported_names_and_file_extensions, [("layer.webp", "webp"), ("layer.jpg", "jpg")])
+    self.assertEqual(
+      self.layer_exporter._file_extension_properties["webp"].processed_count, 1)
+    self.assertEqual(
+      self.layer_exporter._file_extension_properties["png"].processed_count, 0)
+    
+    self.assertEqual(self.layer_elem.name, "layer.png")
+    self.assertEqual(self.layer_exporter._current_file_extension, "png")
+    self.assertEqual(
+      self.layer_exporter._current_layer_export_status,
+      exportlayers.ExportStatuses.SKIPPED_UNCHANGED)
+
+
+class TestSaveProcedureCapabilities(unittest.TestCase):
+  
+  def setUp(self):
+    self.settings = settings_plugin.create_settings()
+    
+    self.layer_exporter = exportlayers.LayerExporter(
+      gimpenums.RUN_INTERACTIVE, None, self.settings["main"])
+    self.layer_exporter._init_attributes(None, mock.Mock(), False)
+    self.layer_exporter._file_extension_properties["png"].processed_count = 1
+    
+    self.export_func = mock.Mock()
+    
+    patcher = mock.patch.object(
+      self.layer_exporter, "_get_export_func", return_value=self.export_func)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+  
+  def test_run_mode_is_unsupported_if_interactive_export_succeeds(self):
+    self.export_func.side_effect = [RuntimeError("Calling error"), None]
+    
+    self.assertEqual(self.layer_exporter._get_run_mode(), gimpenums.RUN_WITH_LAST_VALS)
+    
+    self.layer_exporter._export_file(mock.Mock(), mock.Mock(), "layer.png")
+    
+    self.assertEqual(self.layer_exporter._get_run_mode(), gimpenums.RUN_INTERACTIVE)
+    self.assertTrue(self.layer_exporter._save_procedure_capabilities.is_modified)
+  
+  def test_run_mode_is_not_unsupported_on_transient_failure(self):
+    self.export_func.side_effect = [
+      RuntimeError("Calling error"), RuntimeError("Permission denied")]
+    
+    with self.assertRaises(exportlayers.ExportLayersError):
+      self.layer_exporter._export_file(mock.Mock(), mock.Mock(), "layer.png")
+    
+    self.assertEqual(self.layer_exporter._get_run_mode(), gimpenums.RUN_WITH_LAST_VALS)
+    self.assertFalse(self.layer_exporter._save_procedure_capabilities.is_modified)
+  
+  def test_file_extension_is_unsupported_if_export_with_default_succeeds(self):
+    self._export_layer_with_unknown_file_extension(self._export_successfully)
+    
+    self.layer_exporter._file_extension_properties["unknown"].is_valid = True
+    
+    self.assertFalse(self.layer_exporter._is_file_extension_valid("unknown"))
+    self.assertTrue(self.layer_exporter._is_file_extension_valid("png"))
+  
+  def test_file_extension_is_not_unsupported_on_transient_failure(self):
+    with self.assertRaises(exportlayers.ExportLayersError):
+      self._export_layer_with_unknown_file_extension(self._fail_export)
+    
+    self.layer_exporter._file_extension_properties["unknown"].is_valid = True
+    
+    self.assertTrue(self.layer_exporter._is_file_extension_valid("unknown"))
+    self.assertFalse(self.layer_exporter._save_procedure_capabilities.is_modified)
+  
+  def test_reset_setting_discards_recorded_capabilities(self):
+    self.settings["main/save_procedure_capabilities"].set_value(
+      self.layer_exporter._save_procedure_capabilities.data)
+    
+    self.settings["main/save_procedure_capabilities"].reset()
+    
+    self.assertEqual(self.settings["main/save_procedure_capabilities"].value, {})
+    self.assertIsNone(self.layer_exporter._save_procedure_capabilities)
+  
+  def _export_layer_with_unknown_file_extension(self, export_with_default_file_extension):
+    self.layer_exporter._current_file_extension = "unknown"
+    
+    export_funcs = [
+      self._export_with_unknown_file_extension, export_with_default_file_extension]
+    
+    for name in [
+          "_process_layer_name", "_set_file_extension",
+          "_export_in_additional_file_extensions"]:
+      patcher = mock.patch.object(self.layer_exporter, name)
+      patcher.start()
+      self.addCleanup(patcher.stop)
+    
+    with mock.patch.object(
+           self.layer_exporter, "_export_at_output_scales",
+           side_effect=lambda *args: export_funcs.pop(0)()):
+      self.layer_exporter._export_layer(mock.Mock(), mock.Mock(), mock.Mock())
+  
+  def _export_with_unknown_file_extension(self):
+    self.layer_exporter._prepare_export_with_default_file_extension()
+  
+  def _export_successfully(self):
+    self.layer_exporter._current_layer_export_status = (
+      exportlayers.ExportStatuses.EXPORT_SUCCESSFUL)
+  
+  def _fail_export(self):
+    raise exportlayers.ExportLayersError("Permission denied")
+
+
+class TestIterExport(unittest.TestCase):
+  
+  def setUp(self):
+    self.settings = settings_plugin.create_settings()
+    self.layer_exporter = exportlayers.LayerExporter(0, None, self.settings["main"])
+    
+    self.export_results = [mock.Mock(), mock.Mock(), mock.Mock()]
+    
+    for name in ["_init_attributes", "_preprocess_layers", "_setup", "_cleanup"]:
+      patcher = mock.patch.object(self.layer_exporter, name)
+      patcher.start()
+      self.addCleanup(patcher.stop)
+  
+  def test_iter_export_yields_results(self):
+    with mock.patch.object(
+           self.layer_exporter, "_iter_export_layers",
+           return_value=iter(self.export_results)):
+      self.assertListEqual(list(self.layer_exporter.iter_export()), self.export_results)
+    
+    self.layer_exporter._cleanup.assert_called_once_with(False)
+  
+  def test_iter_export_performs_cleanup_when_closed(self):
+    with mock.patch.object(
+           self.layer_exporter, "_iter_export_layers",
+           return_value=iter(self.export_results)):
+      export_results = self.layer_exporter.iter_export()
+      next(export_results)
+      
+      self.assertFalse(self.layer_exporter._cleanup.called)
+      
+      export_results.close()
+    
+    self.layer_exporter._cleanup.assert_called_once_with(False)
+  
+  def test_iter_export_performs_cleanup_on_exception(self):
+    def _iter_export_layers():
+      yield self.export_results[0]
+      raise exportlayers.ExportLayersError()
+    
+    with mock.patch.object(
+           self.layer_exporter, "_iter_export_layers", _iter_export_layers):
+      export_results = self.layer_exporter.iter_export()
+      next(export_results)
+      
+      with self.assertRaises(exportlayers.ExportLayersError):
+        next(export_results)
+    
+    self.layer_exporter._cleanup.assert_called_once_with(True)
+  
+  def test_iter_export_yields_results_for_atlas_sheets(self):
+    self.layer_exporter._layer_tree = []
+    self.layer_exporter._default_file_extension = "png"
+    self.layer_exporter._output_directory = "output"
+    self.layer_exporter._atlas = mock.Mock(frames=[mock.Mock()])
+    self.layer_exporter._atlas.create_sheets.return_value = iter([
+      (mock.Mock(width=64, height=64), mock.Mock(), []),
+      (mock.Mock(width=32, height=32), mock.Mock(), [])])
+    
+    def _save_atlas_sheet(image, layer, output_filepath):
+      self.layer_exporter._current_layer_export_status = (
+        exportlayers.ExportStatuses.EXPORT_SUCCESSFUL)
+      self.layer_exporter._current_output_filepaths.append(output_filepath)
+      return output_filepath
+    
+    for patcher in [
+          mock.patch.object(
+            self.layer_exporter, "_save_atlas_sheet", side_effect=_save_atlas_sheet),
+          mock.patch.object(self.layer_exporter, "_save_atlas_index"),
+          mock.patch("export_layers.exportlayers.pg.pdbutils.try_delete_image")]:
+      patcher.start()
+      self.addCleanup(patcher.stop)
+    
+    export_results = list(self.layer_exporter.iter_export())
+    
+    self.assertEqual(len(export_results), 2)
+    
+    for sheet_number, export_result in enumerate(export_results):
+      self.assertIsNone(export_result.layer_elem)
+      self.assertEqual(
+        export_result.export_status, exportlayers.ExportStatuses.EXPORT_SUCCESSFUL)
+      self.assertListEqual(
+        export_result.output_filepaths,
+        [os.path.join("output", "atlas_{}.png".format(sheet_number))])
+    
+    self.assertTrue(self.layer_exporter._save_atlas_index.called)
+
+
+class TestExportResultOperationsProfileReport(unittest.TestCase):
+  
+  def setUp(self):
+    self.settings = settings_plugin.create_settings()
+    
+    self.layer_elem = mock.Mock(item_type=0, ITEM=1, NONEMPTY_GROUP=2, EMPTY_GROUP=0)
+    self.layer_tree = mock.MagicMock()
+    self.layer_tree.__iter__.return_value = iter([self.layer_elem])
+  
+  def test_export_result_contains_report_if_profiling_operations(self):
+    layer_exporter = self._create_layer_exporter(profile_operations=True)
+    
+    export_results = list(layer_exporter.iter_export(layer_tree=self.layer_tree))
+    
+    self.assertEqual(len(export_results), 1)
+    self.assertIsNotNone(export_results[0].operations_profile_report)
+    self.assertEqual(
+      export_results[0].operations_profile_report,
+      layer_exporter.operations_profile_report)
+  
+  def test_export_result_does_not_contain_report_if_not_profiling_operations(self):
+    layer_exporter = self._create_layer_exporter(profile_operations=False)
+    
+    export_results = list(layer_exporter.iter_export(layer_tree=self.layer_tree))
+    
+    self.assertEqual(len(export_results), 1)
+    self.assertIsNone(export_results[0].operations_profile_report)
+  
+  def _create_layer_exporter(self, profile_operations):
+    layer_exporter = exportlayers.LayerExporter(
+      0,
+      None,
+      self.settings["main"],
+      progress_updater=mock.Mock(),
+      profile_operations=profile_operations)
+    
+    # `_enable_disable_processing_groups()` would restore the patched methods.
+    for name in [
+          "_enable_disable_processing_groups", "_preprocess_layers", "_setup",
+          "_cleanup", "_preprocess_empty_group_name", "_make_dirs"]:
+      patcher = mock.patch.object(layer_exporter, name)
+      patcher.start()
+      self.addCleanup(patcher.stop)
+    
+    return layer_exporter
+
+
+class TestCanReplaceOutdatedFiles(unittest.TestCase):
+  
+  def setUp(self):
+    self.settings = settings_plugin.create_settings()
+  
+  def test_noninteractive_replace(self):
+    self._test_can_replace_outdated_files(
+      pg.overwrite.NoninteractiveOverwriteChooser(
+        pg.overwrite.OverwriteModes.REPLACE),
+      True)
+  
+  def test_noninteractive_other_modes_are_respected(self):
+    for overwrite_mode in [
+          pg.overwrite.OverwriteModes.SKIP,
+          pg.overwrite.OverwriteModes.RENAME_NEW,
+          pg.overwrite.OverwriteModes.RENAME_EXISTING]:
+      self._test_can_replace_outdated_files(
+        pg.overwrite.NoninteractiveOverwriteChooser(overwrite_mode), False)
+  
+  def test_interactive_without_apply_to_all(self):
+    self._test_can_replace_outdated_files(
+      mock.Mock(
+        spec=pg.overwrite.InteractiveOverwriteChooser,
+        overwrite_mode=pg.overwrite.OverwriteModes.SKIP,
+        is_apply_to_all=False),
+      True)
+  
+  def test_interactive_with_apply_to_all(self):
+    self._test_can_replace_outdated_files(
+      mock.Mock(
+        spec=pg.overwrite.InteractiveOverwriteChooser,
+        overwrite_mode=pg.overwrite.OverwriteModes.SKIP,
+        is_apply_to_all=True),
+      False)
+    
+    self._test_can_replace_outdated_files(
+      mock.Mock(
+        spec=pg.overwrite.InteractiveOverwriteChooser,
+        overwrite_mode=pg.overwrite.OverwriteModes.REPLACE,
+        is_apply_to_all=True),
+      True)
+  
+  def _test_can_replace_outdated_files(self, overwrite_chooser, expected_result):
+    layer_exporter = exportlayers.LayerExporter(
+      0, None, self.settings["main"], overwrite_chooser=overwrite_chooser)
+    
+    self.assertEqual(layer_exporter._can_replace_outdated_files(), expected_result)
+
+
+class TestExportManifest(unittest.TestCase):
+  
+  def setUp(self):
+    self.output_dirpath = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.output_dirpath)
+    
+    self.filepath = os.path.join(self.output_dirpath, "image.png")
+    self._write_file(self.filepath, b"image data")
+    
+    self.manifest = exportlayers._ExportManifest(self.output_dirpath)
+  
+  def test_is_up_to_date(self):
+    self.assertFalse(self.manifest.is_up_to_date(self.filepath, "fingerprint"))
+    
+    self.manifest.add(self.filepath, "fingerprint")
+    
+    self.assertTrue(self.manifest.is_up_to_date(self.filepath, "fingerprint"))
+    self.assertFalse(self.manifest.is_up_to_date(self.filepath, "other fingerprint"))
+    self.assertTrue(self.manifest.is_exported_file_unmodified(self.filepath))
+  
+  def test_is_up_to_date_file_modified_or_removed(self):
+    self.manifest.add(self.filepath, "fingerprint")
+    
+    self._write_file(self.filepath, b"modified image data")
+    
+    self.assertFalse(self.manifest.is_up_to_date(self.filepath, "fingerprint"))
+    self.assertFalse(self.manifest.is_exported_file_unmodified(self.filepath))
+    
+    os.remove(self.filepath)
+    
+    self.assertFalse(self.manifest.is_up_to_date(self.filepath, "fingerprint"))
+  
+  def test_save_load(self):
+    self.manifest.add(self.filepath, "fingerprint")
+    self.manifest.save()
+    
+    manifest = exportlayers._ExportManifest(self.output_dirpath)
+    manifest.load()
+    
+    self.assertTrue(manifest.is_up_to_date(self.filepath, "fingerprint"))
+  
+  def test_load_invalid_manifest(self):
+    self._write_file(
+      os.path.join(self.output_dirpath, exportlayers._ExportManifest.MANIFEST_FILENAME),
+      b"invalid data")
+    
+    self.manifest.load()
+    
+    self.assertFalse(self.manifest.is_up_to_date(self.filepath, "fingerprint"))
+  
+  @staticmethod
+  def _write_file(filepath, data):
+    with io.open(filepath, "wb") as file_:
+      file_.write(data)
+
+
+class TestExportArchive(unittest.TestCase):
+  
+  def setUp(self):
+    self.temp_dirpath = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.temp_dirpath)
+    
+    self.output_dirpath = os.path.join(self.temp_dirpath, "output")
+  
+  def test_write_zip(self):
+    archive = self._create_archive("layers.zip")
+    
+    self._write(archive, os.path.join("group", "image.png"), b"image data")
+    archive.add_dir(os.path.join(self.output_dirpath, "empty_group"))
+    archive.close()
+    
+    with zipfile.ZipFile(archive.archive_filepath) as zip_file:
+      self.assertEqual(zip_file.namelist(), ["group/image.png", "empty_group/"])
+      self.assertEqual(zip_file.read("group/image.png"), b"image data")
+  
+  def test_write_tar(self):
+    archive = self._create_archive("layers.tar.gz")
+    
+    self._write(archive, os.path.join("group", "image.png"), b"image data")
+    archive.add_dir(os.path.join(self.output_dirpath, "empty_group"))
+    archive.close()
+    
+    with tarfile.open(archive.archive_filepath) as tar_file:
+      self.assertEqual(tar_file.getnames(), ["group/image.png", "empty_group"])
+      self.assertTrue(tar_file.getmember("empty_group").isdir())
+      self.assertEqual(
+        tar_file.extractfile("group/image.png").read(), b"image data")
+  
+  def test_temporary_files_are_removed(self):
+    archive = self._create_archive("layers.zip")
+    
+    temp_filepath = self._write(archive, "image.png", b"image data")
+    
+    archive.close()
+    self.assertFalse(os.path.exists(temp_filepath))
+    self.assertFalse(os.path.exists(os.path.dirname(temp_filepath)))
+  
+  def test_write_replaces_existing_entry_zip(self):
+    archive = self._create_archive("layers.zip")
+    
+    self._write_and_replace_entry(archive)
+    
+    with zipfile.ZipFile(archive.archive_filepath) as zip_file:
+      self.assertEqual(zip_file.namelist(), ["image.png", "image2.png"])
+      self.assertEqual(zip_file.read("image.png"), b"new image data")
+  
+  def test_write_replaces_existing_entry_tar(self):
+    archive = self._create_archive("layers.tar")
+    
+    self._write_and_replace_entry(archive)
+    
+    with tarfile.open(archive.archive_filepath) as tar_file:
+      self.assertEqual(tar_file.getnames(), ["image.png", "image2.png"])
+      self.assertEqual(tar_file.extractfile("image.png").read(), b"new image data")
+  
+  def test_handle_overwrite_operates_on_entry_names(self):
+    archive = self._create_archive("layers.zip")
+    filepath = os.path.join(self.output_dirpath, "image.png")
+    overwrite_chooser = pg.overwrite.NoninteractiveOverwriteChooser(
+      pg.overwrite.OverwriteModes.RENAME_NEW)
+    
+    self.assertEqual(
+      archive.handle_overwrite(filepath, overwrite_chooser, len(filepath) - 4),
+      (pg.overwrite.OverwriteModes.DO_NOTHING, filepath))
+    
+    self._write(archive, "image.png", b"image data")
+    
+    self.assertEqual(
+      archive.handle_overwrite(filepath, overwrite_chooser, len(filepath) - 4),
+      (pg.overwrite.OverwriteModes.RENAME_NEW,
+       os.path.join(self.output_dirpath, "image (1).png")))
+    
+    archive.close()
+  
+  def test_open_unsupported_archive_format(self):
+    archive = exportlayers._ExportArchive(
+      os.path.join(self.temp_dirpath, "layers.rar"), self.output_dirpath)
+    
+    with self.assertRaises(ValueError):
+      archive.open()
+  
+  def _create_archive(self, archive_filename):
+    archive = exportlayers._ExportArchive(
+      os.path.join(self.temp_dirpath, archive_filename), self.output_dirpath)
+    archive.open()
+    self.addCleanup(archive.close)
+    
+    return archive
+  
+  def _write_and_replace_entry(self, archive):
+    self._write(archive, "image.png", b"image data")
+    self._write(archive, "image2.png", b"image2 data")
+    self._write(archive, "image.png", b"new image data")
+    archive.close()
+  
+  def _write(self, archive, relative_filepath, data):
+    filepath = os.path.join(self.output_dirpath, relative_filepath)
+    temp_filepath = archive.get_temp_filepath(filepath)
+    
+    with io.open(temp_filepath, "wb") as file_:
+      file_.write(data)
+    
+    archive.write(temp_filepath, filepath)
+    
+    return temp_filepath
@@ -30,6 +30,7 @@ from gimp import pdb
 
 from export_layers import pygimplib as pg
 
+from .. import builtin_constraints
 from .. import builtin_procedures
 from .. import exportlayers
 from .. import operations
@@ -41,6 +42,8 @@ TEST_IMAGES_DIRPATH = os.path.join(_CURRENT_MODULE_DIRPATH, "test_images")
 
 DEFAULT_EXPECTED_RESULTS_DIRPATH = os.path.join(TEST_IMAGES_DIRPATH, "expected_results")
 OUTPUT_DIRPATH = os.path.join(TEST_IMAGES_DIRPATH, "temp_output")
+TEMP_EXPECTED_RESULTS_DIRPATH = os.path.join(
+  TEST_IMAGES_DIRPATH, "temp_expected_results")
 INCORRECT_RESULTS_DIRPATH = os.path.join(TEST_IMAGES_DIRPATH, "incorrect_results")
 
 
@@ -98,6 +101,11 @@ class TestExportLayersCompareLayerContents(unittest.TestCase):
   def test_default_settings(self):
     self.compare()
   
+  def test_layer_with_opacity_and_mask(self):
+    # The "overlay" layer has opacity below 100, a layer mask and a non-normal
+    # mode, all of which must be applied even if no procedure inserts layers.
+    self.compare(layer_names_to_compare=["overlay"])
+  
   def test_use_image_size(self):
     self.compare(
       procedure_names_to_remove=["use_layer_size"],
@@ -143,12 +151,35 @@ class TestExportLayersCompareLayerContents(unittest.TestCase):
     
     self._reload_image()
   
+  def test_nested_layer_groups(self):
+    nested_layer_group = pdb.gimp_layer_group_new(self.test_image)
+    pdb.gimp_image_insert_layer(self.test_image, nested_layer_group, None, 0)
+    nested_layer_group.name = "Nested frames"
+    
+    for position, layer_name in enumerate(["Frames", "main-background"]):
+      pdb.gimp_image_reorder_item(
+        self.test_image,
+        pdb.gimp_image_get_layer_by_name(self.test_image, layer_name),
+        nested_layer_group,
+        position)
+    
+    # Merging "Nested frames" reuses the composite of "Frames".
+    self.compare(
+      procedure_names_to_add={"ignore_folder_structure": None},
+      constraint_names_to_add=["include_layer_groups"],
+      expected_results_dirpath=self._create_expected_results_for_layer_groups(
+        self.expected_results_root_dirpath, ["Nested frames", "Frames"]))
+    
+    self._reload_image()
+  
   def compare(
         self,
         procedure_names_to_add=None,
         procedure_names_to_remove=None,
+        constraint_names_to_add=None,
         different_results_and_expected_layers=None,
-        expected_results_dirpath=None):
+        expected_results_dirpath=None,
+        layer_names_to_compare=None):
     settings = settings_plugin.create_settings()
     settings["special/image"].set_value(self.test_image)
     settings["main/output_directory"].set_value(self.output_dirpath)
@@ -165,7 +196,9 @@ class TestExportLayersCompareLayerContents(unittest.TestCase):
         layer.name: layer
         for layer in self.expected_images[expected_results_dirpath].layers}
     
-    self._export(settings, procedure_names_to_add, procedure_names_to_remove)
+    self._export(
+      settings, procedure_names_to_add, procedure_names_to_remove,
+      constraint_names_to_add)
     
     self.image_with_results, layers = self._load_layers_from_dirpath(self.output_dirpath)
     
@@ -173,6 +206,10 @@ class TestExportLayersCompareLayerContents(unittest.TestCase):
       for layer_name, expected_layer_name in different_results_and_expected_layers:
         expected_layers[layer_name] = expected_layers[expected_layer_name]
     
+    if layer_names_to_compare is not None:
+      self.assertTrue(all(layer_name in layers for layer_name in layer_names_to_compare))
+      layers = {layer_name: layers[layer_name] for layer_name in layer_names_to_compare}
+    
     for layer in layers.values():
       test_case_name = inspect.stack()[1][-3]
       self._compare_layers(
@@ -183,13 +220,18 @@ class TestExportLayersCompareLayerContents(unittest.TestCase):
         expected_results_dirpath)
   
   @staticmethod
-  def _export(settings, procedure_names_to_add, procedure_names_to_remove):
+  def _export(
+        settings, procedure_names_to_add, procedure_names_to_remove,
+        constraint_names_to_add=None):
     if procedure_names_to_add is None:
       procedure_names_to_add = {}
     
     if procedure_names_to_remove is None:
       procedure_names_to_remove = []
     
+    if constraint_names_to_add is None:
+      constraint_names_to_add = []
+    
     for procedure_name, order in procedure_names_to_add.items():
       operations.add(
         settings["main/procedures"],
@@ -201,6 +243,11 @@ class TestExportLayersCompareLayerContents(unittest.TestCase):
       if procedure_name in settings["main/procedures/added"]:
         operations.remove(settings["main/procedures"], procedure_name)
     
+    for constraint_name in constraint_names_to_add:
+      operations.add(
+        settings["main/constraints"],
+        builtin_constraints.BUILTIN_CONSTRAINTS[constraint_name])
+    
     layer_exporter = exportlayers.LayerExporter(
       settings["special/run_mode"].value,
       settings["special/image"].value,
@@ -249,6 +296,44 @@ class TestExportLayersCompareLayerContents(unittest.TestCase):
       os.path.join(layer_dirpath, layer_input_filename),
       os.path.join(incorrect_layers_dirpath, layer_output_filename))
   
+  def _create_expected_results_for_layer_groups(
+        self, expected_results_dirpath, layer_group_names):
+    """
+    Create a directory containing expected results from
+    `expected_results_dirpath` and expected results for the specified layer
+    groups in the test image, obtained by merging each layer group without
+    reusing composites of its child groups. Return the path to the directory.
+    """
+    if os.path.exists(TEMP_EXPECTED_RESULTS_DIRPATH):
+      shutil.rmtree(TEMP_EXPECTED_RESULTS_DIRPATH)
+    
+    pg.path.make_dirs(TEMP_EXPECTED_RESULTS_DIRPATH)
+    self.addCleanup(shutil.rmtree, TEMP_EXPECTED_RESULTS_DIRPATH)
+    
+    for filepath in self._list_layer_filepaths(expected_results_dirpath):
+      shutil.copy(filepath, TEMP_EXPECTED_RESULTS_DIRPATH)
+    
+    for layer_group_name in layer_group_names:
+      image = pdb.gimp_image_duplicate(self.test_image)
+      merged_layer_group = pg.pdbutils.merge_layer_group(
+        pdb.gimp_image_get_layer_by_name(image, layer_group_name))
+      
+      expected_image = pdb.gimp_image_new(
+        merged_layer_group.width, merged_layer_group.height, image.base_type)
+      expected_layer = pg.pdbutils.copy_and_paste_layer(
+        merged_layer_group, expected_image)
+      pdb.gimp_layer_set_offsets(expected_layer, 0, 0)
+      pdb.gimp_item_set_visible(expected_layer, True)
+      
+      filepath = os.path.join(
+        TEMP_EXPECTED_RESULTS_DIRPATH, "{}.xcf".format(layer_group_name))
+      pdb.gimp_xcf_save(0, expected_image, expected_layer, filepath, filepath)
+      
+      pdb.gimp_image_delete(expected_image)
+      pdb.gimp_image_delete(image)
+    
+    return TEMP_EXPECTED_RESULTS_DIRPATH
+  
   @classmethod
   def _load_image(cls):
     return pdb.gimp_file_load(
@@ -436,6 +436,29 @@ class TestManageOperations(unittest.TestCase):
     self.assertEqual(len(procedures["_added_data"].value), 1)
     self.assertDictEqual(_find_in_added_data(procedures, "autocrop"), self.autocrop_dict)
     self.assertIsNot(_find_in_added_data(procedures, "autocrop"), self.autocrop_dict)
+  
+  def test_get_change_count(self):
+    change_count = operations.get_change_count(self.procedures)
+    
+    operations.add(self.procedures, self.test_procedures["autocrop"])
+    self.assertGreater(operations.get_change_count(self.procedures), change_count)
+    
+    change_count = operations.get_change_count(self.procedures)
+    self.procedures["added/autocrop/arguments/offset_x"].set_value(10)
+    self.assertGreater(operations.get_change_count(self.procedures), change_count)
+    
+    operations.add(self.procedures, self.test_procedures["autocrop_background"])
+    change_count = operations.get_change_count(self.procedures)
+    operations.reorder(self.procedures, "autocrop_background", 0)
+    self.assertGreater(operations.get_change_count(self.procedures), change_count)
+    
+    change_count = operations.get_change_count(self.procedures)
+    operations.remove(self.procedures, "autocrop")
+    self.assertGreater(operations.get_change_count(self.procedures), change_count)
+    
+    change_count = operations.get_change_count(self.procedures)
+    operations.clear(self.procedures)
+    self.assertGreater(operations.get_change_count(self.procedures), change_count)
 
 
 class TestWalkOperations(unittest.TestCase):
@@ -762,6 +785,18 @@ class TestManagePdbProceduresAsOperations(unittest.TestCase):
     del operation["arguments/save-options"][-1]
     self.assertEqual(operation["arguments/num-save-options"].value, 0)
   
+  def test_get_change_count_after_adding_and_reordering_array_elements(self):
+    operation = operations.add(self.procedures, self.procedure_stub)
+    
+    change_count = operations.get_change_count(self.procedures)
+    operation["arguments/save-options"].add_element()
+    operation["arguments/save-options"].add_element()
+    self.assertGreater(operations.get_change_count(self.procedures), change_count)
+    
+    change_count = operations.get_change_count(self.procedures)
+    operation["arguments/save-options"].reorder_element(0, 1)
+    self.assertGreater(operations.get_change_count(self.procedures), change_count)
+  
   @mock.patch(
     pg.PYGIMPLIB_MODULE_PATH + ".setting.sources.gimpshelf.shelf",
     new_callable=stubs_gimp.ShelfStub)
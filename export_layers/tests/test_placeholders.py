@@ -47,6 +47,14 @@ class TestGetReplacedArgsAndKwargs(unittest.TestCase):
     
     self.assertListEqual(new_args, [image, layer, "some_other_arg"])
     self.assertDictEqual(new_kwargs, {"run_mode": 0, "image": image, "layer": layer})
+  
+  def test_get_replacement_func(self):
+    image = stubs_gimp.ImageStub()
+    layer = stubs_gimp.LayerStub()
+    
+    self.assertEqual(
+      placeholders.get_replacement_func("current_layer")(image, layer, object()), layer)
+    self.assertIsNone(placeholders.get_replacement_func("some_other_arg"))
 
 
 class TestPlaceHolderSetting(unittest.TestCase):